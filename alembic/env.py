@@ -12,6 +12,10 @@ from app.db.base import Base
 from app.models.user_model import User
 from app.models.course_model import Course
 from app.models.enrollment_model import Enrollment 
+from app.models.audit_model import AuditLog
+from app.models.refresh_token_model import RefreshToken
+from app.models.stats_model import CourseEnrollmentStats, StudentEnrollmentStats, EnrollmentHourlyStats
+from app.models.outbox_model import OutboxEvent
 
 
 # this is the Alembic Config object, which provides
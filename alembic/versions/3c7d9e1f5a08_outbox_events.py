@@ -0,0 +1,45 @@
+"""outbox events
+
+Revision ID: 3c7d9e1f5a08
+Revises: 9a4f0d3b6e21
+Create Date: 2026-10-19 17:02:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d9e1f5a08'
+down_revision: Union[str, Sequence[str], None] = '9a4f0d3b6e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('aggregate_id', sa.String(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_outbox_events_pending', 'outbox_events', ['id'],
+        unique=False, postgresql_where=sa.text('dispatched_at IS NULL')
+    )
+    op.create_index('ix_outbox_events_dispatched_at', 'outbox_events', ['dispatched_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_dispatched_at', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.drop_table('outbox_events')
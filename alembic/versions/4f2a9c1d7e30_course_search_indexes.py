@@ -0,0 +1,42 @@
+"""course search indexes
+
+Revision ID: 4f2a9c1d7e30
+Revises: dd7d12098a82
+Create Date: 2026-10-19 09:12:04.512331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c1d7e30'
+down_revision: Union[str, Sequence[str], None] = 'dd7d12098a82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram GIN indexes serve both ILIKE '%term%' filters and similarity ranking
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_courses_title_trgm', 'courses', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_courses_code_trgm', 'courses', ['code'], unique=False,
+        postgresql_using='gin', postgresql_ops={'code': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_courses_code_trgm', table_name='courses')
+    op.drop_index('ix_courses_title_trgm', table_name='courses')
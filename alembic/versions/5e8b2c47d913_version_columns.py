@@ -0,0 +1,30 @@
+"""version columns
+
+Revision ID: 5e8b2c47d913
+Revises: 2d94e7a1c6f5
+Create Date: 2026-10-19 15:02:11.640273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b2c47d913'
+down_revision: Union[str, Sequence[str], None] = '2d94e7a1c6f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('courses', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'version')
+    op.drop_column('courses', 'version')
@@ -0,0 +1,50 @@
+"""active course and email indexes
+
+Revision ID: 6b1f8d2a4c97
+Revises: 3c7d9e1f5a08
+Create Date: 2026-10-19 18:24:37.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1f8d2a4c97'
+down_revision: Union[str, Sequence[str], None] = '3c7d9e1f5a08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Emails that differ only in case would break the unique index, list them
+    # instead (not possible when only generating SQL)
+    if not op.get_context().as_sql:
+        duplicates = op.get_bind().execute(sa.text(
+            'SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1 LIMIT 20'
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                'Users share these emails up to case, merge or rename them first: ' + ', '.join(duplicates)
+            )
+
+    # Supersedes the case-sensitive unique index; lookups go through lower(email)
+    op.create_index('ux_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+
+    op.create_index(
+        'ix_courses_active_code', 'courses', ['code'], unique=False,
+        postgresql_include=['id', 'title', 'capacity', 'is_active', 'version'],
+        postgresql_where=sa.text('is_active IS TRUE'),
+        sqlite_where=sa.text('is_active IS 1')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_courses_active_code', table_name='courses')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.drop_index('ux_users_email_lower', table_name='users')
@@ -0,0 +1,39 @@
+"""audit logs
+
+Revision ID: 8c3e51b0a7d2
+Revises: 4f2a9c1d7e30
+Create Date: 2026-10-19 10:41:27.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3e51b0a7d2'
+down_revision: Union[str, Sequence[str], None] = '4f2a9c1d7e30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_logs',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('actor_id', sa.UUID(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('target_type', sa.String(), nullable=False),
+    sa.Column('target_id', sa.String(), nullable=True),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs')
+    op.drop_table('audit_logs')
@@ -0,0 +1,28 @@
+"""outbox events created_at index
+
+Revision ID: a8c4e2f60b19
+Revises: 6b1f8d2a4c97
+Create Date: 2026-10-20 10:05:41.227630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e2f60b19'
+down_revision: Union[str, Sequence[str], None] = '6b1f8d2a4c97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_outbox_events_created_at', 'outbox_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_created_at', table_name='outbox_events')
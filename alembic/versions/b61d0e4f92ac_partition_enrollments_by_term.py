@@ -0,0 +1,113 @@
+"""partition enrollments by term
+
+Revision ID: b61d0e4f92ac
+Revises: 8c3e51b0a7d2
+Create Date: 2026-10-19 11:58:13.730912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61d0e4f92ac'
+down_revision: Union[str, Sequence[str], None] = '8c3e51b0a7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# One partition per half-year term (see app/core/terms.py). Rows outside this
+# range land in enrollments_default until a later migration adds their term.
+FIRST_TERM_YEAR = 2025
+LAST_TERM_YEAR = 2028
+
+
+def term_partitions():
+    for year in range(FIRST_TERM_YEAR, LAST_TERM_YEAR + 1):
+        yield f'enrollments_{year}_h1', f'{year}-01-01', f'{year}-07-01'
+        yield f'enrollments_{year}_h2', f'{year}-07-01', f'{year + 1}-01-01'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('enrollments_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_enrollments_archive_course_id'), 'enrollments_archive', ['course_id'], unique=False)
+    op.create_index(op.f('ix_enrollments_archive_user_id'), 'enrollments_archive', ['user_id'], unique=False)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        op.create_index('ix_enrollments_course_id_created_at', 'enrollments', ['course_id', 'created_at'], unique=False)
+        op.create_index('ix_enrollments_user_id', 'enrollments', ['user_id'], unique=False)
+        return
+
+    # A partitioned table needs the partition key in its primary key, so the
+    # live table is rebuilt and its rows copied across, keeping the id sequence.
+    op.execute('ALTER TABLE enrollments RENAME TO enrollments_unpartitioned')
+    op.execute('ALTER INDEX enrollments_pkey RENAME TO enrollments_unpartitioned_pkey')
+    op.execute('ALTER SEQUENCE enrollments_id_seq OWNED BY NONE')
+    op.execute('UPDATE enrollments_unpartitioned SET created_at = now() WHERE created_at IS NULL')
+
+    op.execute("""
+        CREATE TABLE enrollments (
+            id INTEGER NOT NULL DEFAULT nextval('enrollments_id_seq'),
+            user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            course_id UUID NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    for name, start, end in term_partitions():
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF enrollments "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    op.execute('CREATE TABLE enrollments_default PARTITION OF enrollments DEFAULT')
+
+    op.execute('CREATE INDEX ix_enrollments_course_id_created_at ON enrollments (course_id, created_at)')
+    op.execute('CREATE INDEX ix_enrollments_user_id ON enrollments (user_id)')
+
+    op.execute("""
+        INSERT INTO enrollments (id, user_id, course_id, created_at)
+        SELECT id, user_id, course_id, created_at FROM enrollments_unpartitioned
+    """)
+    op.execute('DROP TABLE enrollments_unpartitioned')
+    op.execute('ALTER SEQUENCE enrollments_id_seq OWNED BY enrollments.id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_enrollments_user_id', table_name='enrollments')
+        op.drop_index('ix_enrollments_course_id_created_at', table_name='enrollments')
+    else:
+        op.execute('ALTER TABLE enrollments RENAME TO enrollments_partitioned')
+        op.execute('ALTER INDEX enrollments_pkey RENAME TO enrollments_partitioned_pkey')
+        op.execute('ALTER SEQUENCE enrollments_id_seq OWNED BY NONE')
+        op.execute("""
+            CREATE TABLE enrollments (
+                id INTEGER NOT NULL DEFAULT nextval('enrollments_id_seq'),
+                user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+                course_id UUID NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                CONSTRAINT enrollments_pkey PRIMARY KEY (id)
+            )
+        """)
+        op.execute("""
+            INSERT INTO enrollments (id, user_id, course_id, created_at)
+            SELECT id, user_id, course_id, created_at FROM enrollments_partitioned
+        """)
+        # Dropping the parent drops every partition with it
+        op.execute('DROP TABLE enrollments_partitioned')
+        op.execute('ALTER SEQUENCE enrollments_id_seq OWNED BY enrollments.id')
+
+    op.drop_index(op.f('ix_enrollments_archive_user_id'), table_name='enrollments_archive')
+    op.drop_index(op.f('ix_enrollments_archive_course_id'), table_name='enrollments_archive')
+    op.drop_table('enrollments_archive')
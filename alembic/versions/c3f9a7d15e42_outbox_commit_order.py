@@ -0,0 +1,40 @@
+"""outbox commit order
+
+Revision ID: c3f9a7d15e42
+Revises: a8c4e2f60b19
+Create Date: 2026-10-20 11:32:08.614952
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a7d15e42'
+down_revision: Union[str, Sequence[str], None] = 'a8c4e2f60b19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox_events', sa.Column('txid', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('outbox_events', sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True))
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.create_index(
+        'ix_outbox_events_pending', 'outbox_events', ['txid', 'id'],
+        unique=False, postgresql_where=sa.text('dispatched_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.create_index(
+        'ix_outbox_events_pending', 'outbox_events', ['id'],
+        unique=False, postgresql_where=sa.text('dispatched_at IS NULL')
+    )
+    op.drop_column('outbox_events', 'claimed_until')
+    op.drop_column('outbox_events', 'txid')
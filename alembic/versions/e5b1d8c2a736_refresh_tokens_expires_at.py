@@ -0,0 +1,29 @@
+"""refresh tokens expires_at index
+
+Revision ID: e5b1d8c2a736
+Revises: c3f9a7d15e42
+Create Date: 2026-10-20 13:47:19.338105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1d8c2a736'
+down_revision: Union[str, Sequence[str], None] = 'c3f9a7d15e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Expired tokens are pruned by expires_at
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
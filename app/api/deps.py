@@ -1,5 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.user_model import User, UserRole
 from app.db.session import SessionLocal
@@ -10,6 +11,8 @@ from app.core.security import verify_token
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/token")
+# For dependencies that run ahead of authentication; None without a token
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/token", auto_error=False)
 
 
 def get_db():
@@ -25,7 +28,7 @@ def get_current_user(
         token: str = Depends(oauth2_scheme), db:Session=Depends(get_db)
 ):
     token_data = verify_token(token)
-    user = db.query(User).filter(User.email == token_data.email).first()    
+    user = db.query(User).filter(func.lower(User.email) == token_data.email.lower()).first()
     if user is None:
         raise HTTPException(
                 status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from app.schemas.audit_schema import AuditLogPage
+from app.api.deps import get_db, get_current_active_admin
+from app.models.user_model import User
+from app.services.audit_service import audit_service, audit_logger
+
+
+
+router = APIRouter()
+
+
+
+@router.get("/admin/audit-logs", response_model=AuditLogPage)
+def view_audit_logs(
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    action: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return audit_service.get_audit_logs(
+        db=db,
+        before=before,
+        before_id=before_id,
+        limit=limit,
+        action=action
+    )
+
+
+@router.get("/admin/audit-logs/metrics")
+def audit_log_metrics(current_user: User = Depends(get_current_active_admin)):
+    return audit_logger.metrics()
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends,  status
+from fastapi import APIRouter, Depends, File, Query, UploadFile, status
 from fastapi.security import  OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.schemas.user_schema import UserResponse, UserCreate
+from typing import Literal, Optional
+from app.schemas.user_schema import UserResponse, UserCreate, UserImportResult, UserBulkStatusRequest
+from app.schemas.bulk_schema import BulkStatusResult
 from app.models.user_model import User
 from app.api.deps import get_db,get_current_active_admin,get_current_active_student,get_current_user
-from app.schemas.auth_schema import Token
+from app.schemas.auth_schema import Token, RefreshTokenRequest
 from app.services.auth_service import auth_route
+from app.services.user_import_service import user_import_service, parse_user_rows, guess_format, read_upload
 
 
 
@@ -19,6 +22,18 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     return auth_route.register_user(db=db, user_data=user)
 
 
+@router.post("/admin/users/import", response_model=UserImportResult)
+def import_users(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    fmt = format or guess_format(file.filename, file.content_type)
+    rows = parse_user_rows(read_upload(file.file), fmt)
+    return user_import_service.import_users(db=db, rows=rows, current_admin=current_user)
+
+
 @router.post("/token", response_model=Token) 
 def login_for_access_token(         
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -27,6 +42,34 @@ def login_for_access_token(
     return auth_route.login(db=db, form_data=form_data)
 
 
+@router.post("/token/refresh", response_model=Token)
+def refresh_access_token(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    return auth_route.refresh_access_token(db=db, refresh_token=body.refresh_token)
+
+
+@router.post("/token/revoke", status_code=status.HTTP_200_OK)
+def revoke_refresh_token(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    return auth_route.revoke_refresh_token(db=db, refresh_token=body.refresh_token)
+
+
+
+@router.patch("/admin/users/deactivate", response_model=BulkStatusResult)
+def bulk_deactivate_users(
+    selection: UserBulkStatusRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return auth_route.bulk_deactivate_users(db=db, selection=selection, current_admin=current_user)
+
+
+@router.patch("/admin/users/activate", response_model=BulkStatusResult)
+def bulk_activate_users(
+    selection: UserBulkStatusRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return auth_route.bulk_activate_users(db=db, selection=selection, current_admin=current_user)
+
 
 @router.patch("/{user_id}/deactivate", status_code=status.HTTP_200_OK)
 def deactivate_user(
@@ -50,7 +93,8 @@ def activate_user(
 ):
     return auth_route.activate_user(
         db=db,
-        user_id=user_id
+        user_id=user_id,
+        current_admin=current_user
     )
 
 
@@ -1,24 +1,118 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from uuid import UUID
-from app.schemas.course_schema import CourseCreate, CourseResponse, CourseUpdate
+from app.schemas.course_schema import (
+    CourseCreate, CourseResponse, CourseUpdate, CourseSearchResponse, CourseBulkStatusRequest
+)
+from app.schemas.bulk_schema import BulkStatusResult
 from app.api.deps import get_db,get_current_active_admin
+from app.core.compression import encoded_response
+from app.core.config import settings
+from app.core.etag import if_match_versions, version_etag
 from app.models.user_model import User
 from app.services.course_service import course_service
+from app.services.course_deletion_service import course_deletions
+from app.services.seat_feed_service import seat_feed
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CourseResponse])
-def view_all_courses(db: Session = Depends(get_db)):
-    return course_service.get_all_courses(db)
+def view_all_courses(
+    request: Request,
+    response: Response,
+    after: Optional[UUID] = Query(None, description="Id of the last course of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    if after is None and limit is None:
+        return encoded_response(request, course_service.get_all_courses_payload(db))
+
+    limit = limit or settings.COURSE_PAGE_SIZE
+    page, next_after = course_service.get_courses_page(db, after, limit)
+    if next_after is not None:
+        next_url = request.url.include_query_params(after=str(next_after), limit=limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return page
+
+
+@router.get("/search", response_model=CourseSearchResponse)
+def search_courses(
+    q: str = Query(..., min_length=1, max_length=100),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    return course_service.search_courses(db, q, page=page, size=size)
+
+
+@router.get("/seats/stream", response_class=StreamingResponse)
+async def stream_seat_counts(course_id: List[UUID] = Query(...)):
+    """
+    Server-Sent Events with the remaining seats of the given courses
+    (?course_id=...&course_id=...): current counts first, then every change.
+    """
+    course_ids = set(course_id)
+    if len(course_ids) > settings.SEAT_FEED_MAX_COURSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.SEAT_FEED_MAX_COURSES} courses per stream"
+        )
+
+    # Subscribe before reading so no change between the two is lost
+    subscription = seat_feed.subscribe(course_ids)
+    try:
+        initial = await run_in_threadpool(seat_feed.snapshot, course_ids)
+    except Exception:
+        seat_feed.unsubscribe(subscription)
+        raise
+
+    return StreamingResponse(
+        seat_feed.events(subscription, initial, settings.SEAT_FEED_KEEPALIVE),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.patch("/bulk/deactivate", response_model=BulkStatusResult)
+def bulk_deactivate_courses(
+    selection: CourseBulkStatusRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return course_service.bulk_set_active(db, selection, False, current_admin=current_user)
+
+
+@router.patch("/bulk/activate", response_model=BulkStatusResult)
+def bulk_activate_courses(
+    selection: CourseBulkStatusRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return course_service.bulk_set_active(db, selection, True, current_admin=current_user)
+
+
+@router.get("/delete-jobs/{job_id}")
+def course_deletion_status(job_id: str, current_user: User = Depends(get_current_active_admin)):
+    job = course_deletions.describe(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deletion job not found"
+        )
+    return job
 
 
 @router.get("/{course_id}", response_model=CourseResponse)
-def get_course(course_id: UUID, db: Session = Depends(get_db)):
-    return course_service.get_course_by_id(db, course_id)
+def get_course(course_id: UUID, response: Response, db: Session = Depends(get_db)):
+    course = course_service.get_course_by_id(db, course_id)
+    response.headers["ETag"] = version_etag(course.version)
+    return course
 
 
 
@@ -32,7 +126,7 @@ def create_course(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_admin)
 ):
-    return course_service.create_course(db, course)
+    return course_service.create_course(db, course, current_admin=current_user)
 
 
 @router.patch(
@@ -42,10 +136,18 @@ def create_course(
 def update_course(
     course_id: UUID,
     course: CourseUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_admin)
 ):
-    return course_service.update_course(db, course_id, course)
+    updated = course_service.update_course(
+        db, course_id, course,
+        current_admin=current_user,
+        expected_versions=if_match_versions(if_match)
+    )
+    response.headers["ETag"] = version_etag(updated.version)
+    return updated
 
 
 @router.patch("/{course_id}/deactivate", status_code=status.HTTP_200_OK)
@@ -54,7 +156,7 @@ def deactivate_course(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_admin)
 ):
-    return course_service.deactivate_course(db, course_id)
+    return course_service.deactivate_course(db, course_id, current_admin=current_user)
 
 
 
@@ -64,7 +166,7 @@ def activate_course(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_admin)
 ):
-    return course_service.activate_course(db, course_id)
+    return course_service.activate_course(db, course_id, current_admin=current_user)
 
 
 
@@ -75,4 +177,11 @@ def delete_course(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_admin)
 ):
-    return course_service.delete_course(db, course_id)
\ No newline at end of file
+    result = course_service.delete_course(db, course_id, current_admin=current_user)
+    if "job_id" in result:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(result),
+            headers={"Location": f"/courses/delete-jobs/{result['job_id']}"}
+        )
+    return result
\ No newline at end of file
@@ -1,23 +1,48 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-from app.schemas.enrollment_schema import EnrollmentResponse, EnrollmentCreate
-from app.api.deps import get_db,get_current_active_admin, get_current_active_student
+from app.schemas.enrollment_schema import EnrollmentResponse, EnrollmentCreate, AdmissionTicketResponse
+from app.api.deps import get_db,get_current_active_admin, get_current_active_student, optional_oauth2_scheme
 from app.models.user_model import User
 from app.services.enrollment_service import enrollment_service
+from app.core.admission import AdmissionQueued, AdmissionTicket, TicketStatus, enrollment_admission
+from app.core.security import verify_token
+from app.services.outbox_service import outbox_dispatcher
 
 
 router = APIRouter()
 
 
+def admit_enrollment(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """
+    Hold an enrollment slot around the handler, or queue the student when
+    all are busy. Declared ahead of get_db and the user lookup and keyed on
+    the token subject, so a queued request never reaches the database.
+    Requests without a token are turned away by the auth dependencies.
+    """
+    if token is None:
+        yield None
+        return
+
+    ticket = enrollment_admission.acquire(verify_token(token).email.lower())
+    if ticket.status != TicketStatus.ACTIVE:
+        raise AdmissionQueued(enrollment_admission.describe(ticket))
+    try:
+        yield ticket
+    finally:
+        enrollment_admission.release(ticket)
+
+
 @router.post(
     "/",
     response_model=EnrollmentResponse,
-    status_code=status.HTTP_201_CREATED
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": AdmissionTicketResponse}}
 )
 def enroll_in_course(
     enrollment: EnrollmentCreate,
+    ticket: Optional[AdmissionTicket] = Depends(admit_enrollment, scope="function"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_student)
 ):
@@ -28,6 +53,27 @@ def enroll_in_course(
     )
 
 
+@router.get("/queue/metrics", status_code=status.HTTP_200_OK)
+def enrollment_queue_metrics(current_user: User = Depends(get_current_active_admin)):
+    return enrollment_admission.metrics()
+
+
+@router.get("/outbox/metrics", status_code=status.HTTP_200_OK)
+def enrollment_outbox_metrics(current_user: User = Depends(get_current_active_admin)):
+    return outbox_dispatcher.metrics()
+
+
+@router.get("/queue/{token}", response_model=AdmissionTicketResponse)
+def enrollment_queue_position(token: str):
+    ticket = enrollment_admission.poll(token)
+    if ticket is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Queue ticket not found or expired"
+        )
+    return ticket
+
+
 @router.get("/", response_model=List[EnrollmentResponse])
 def view_all_enrollment(
     db: Session = Depends(get_db),
@@ -72,5 +118,6 @@ def remove_student_from_enrollment(
     return enrollment_service.remove_student(
         db=db,
         student_id=student_id,
-        course_id=course_id
+        course_id=course_id,
+        current_admin=current_user
     )
\ No newline at end of file
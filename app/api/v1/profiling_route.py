@@ -0,0 +1,58 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.api.deps import get_current_active_admin
+from app.models.user_model import User
+from app.core.load_shedding import concurrency_limiter
+from app.core.profiling import profile_store
+from app.db.slow_queries import slow_query_log
+from app.services.course_service import course_reads
+from app.services.seat_feed_service import seat_feed
+
+
+
+router = APIRouter()
+
+
+
+@router.get("/admin/profiles")
+def list_profiles(current_user: User = Depends(get_current_active_admin)):
+    return profile_store.summaries()
+
+
+@router.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str, current_user: User = Depends(get_current_active_admin)):
+    report = profile_store.get(profile_id)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return report
+
+
+@router.get("/admin/slow-queries")
+def list_slow_queries(
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return slow_query_log.entries(limit)
+
+
+@router.delete("/admin/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(current_user: User = Depends(get_current_active_admin)):
+    slow_query_log.clear()
+
+
+@router.get("/admin/load-shedding")
+def load_shedding_metrics(current_user: User = Depends(get_current_active_admin)):
+    return concurrency_limiter.metrics()
+
+
+@router.get("/admin/single-flight")
+def single_flight_metrics(current_user: User = Depends(get_current_active_admin)):
+    return course_reads.metrics()
+
+
+@router.get("/admin/seat-feed")
+def seat_feed_metrics(current_user: User = Depends(get_current_active_admin)):
+    return seat_feed.metrics()
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.schemas.stats_schema import EnrollmentStatistics
+from app.api.deps import get_db, get_current_active_admin
+from app.models.user_model import User
+from app.services.stats_service import enrollment_stats
+
+
+
+router = APIRouter()
+
+
+
+@router.get("/admin/stats", response_model=EnrollmentStatistics)
+def enrollment_statistics(
+    hours: int = Query(24, ge=1, le=24 * 14),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    return enrollment_stats.get_statistics(db, hours=hours)
@@ -0,0 +1,45 @@
+"""
+Move enrollments of completed terms into enrollments_archive.
+
+    python -m app.commands.archive_enrollments
+    python -m app.commands.archive_enrollments --before 2026-01-01 --batch-size 2000
+"""
+import argparse
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.terms import active_since
+from app.db.session import SessionLocal
+from app.services.enrollment_service import enrollment_service
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive enrollments of completed terms")
+    parser.add_argument(
+        "--before",
+        type=datetime.fromisoformat,
+        help="archive enrollments created before this date (default: start of the oldest active term)"
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    before = args.before or active_since(settings.ENROLLMENT_ACTIVE_TERMS)
+    if before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+
+    db = SessionLocal()
+    try:
+        total = enrollment_service.archive_enrollments(
+            db,
+            before=before,
+            batch_size=args.batch_size,
+            on_batch=lambda archived: print(f"archived {archived} enrollments", flush=True)
+        )
+    finally:
+        db.close()
+
+    print(f"done: {total} enrollments created before {before.isoformat()} archived")
+
+
+if __name__ == "__main__":
+    main()
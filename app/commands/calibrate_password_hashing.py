@@ -0,0 +1,82 @@
+"""
+Pick the password hashing cost that fits a target latency on this machine.
+
+    python -m app.commands.calibrate_password_hashing --target-ms 250
+    python -m app.commands.calibrate_password_hashing --scheme argon2 --target-ms 150
+
+Prints the settings to put in .env. Run it on the hardware that serves logins.
+"""
+import argparse
+import time
+from app.core.config import settings
+from app.core.security import build_pwd_context
+
+
+def measure_ms(context, samples: int) -> float:
+    password = "calibration-password"
+    # Warm up so the first measurement doesn't include backend loading
+    context.hash(password)
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(password)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> dict:
+    # Each extra round doubles the cost, so stop at the first one over target
+    chosen = 4
+    for rounds in range(4, 32):
+        elapsed = measure_ms(build_pwd_context(["bcrypt"], bcrypt_rounds=rounds), samples)
+        print(f"bcrypt rounds={rounds:<2} {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return {"PWD_SCHEMES": "bcrypt", "BCRYPT_ROUNDS": chosen}
+
+
+def calibrate_argon2(target_ms: float, samples: int, memory_cost: int, parallelism: int) -> dict:
+    # Memory is fixed up front; time_cost scales roughly linearly
+    chosen = 1
+    for time_cost in range(1, 33):
+        context = build_pwd_context(
+            ["argon2"],
+            argon2_time_cost=time_cost,
+            argon2_memory_cost=memory_cost,
+            argon2_parallelism=parallelism
+        )
+        elapsed = measure_ms(context, samples)
+        print(f"argon2 time_cost={time_cost:<2} memory={memory_cost}KiB {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = time_cost
+    return {
+        "PWD_SCHEMES": "argon2,bcrypt",
+        "ARGON2_TIME_COST": chosen,
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_PARALLELISM": parallelism
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate password hashing cost")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST)
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    args = parser.parse_args(argv)
+
+    if args.scheme == "bcrypt":
+        chosen = calibrate_bcrypt(args.target_ms, args.samples)
+    else:
+        chosen = calibrate_argon2(args.target_ms, args.samples, args.memory_cost, args.parallelism)
+
+    print()
+    for key, value in chosen.items():
+        print(f"{key}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Create users in bulk from a CSV (name,email,password,role) or JSON lines file.
+
+    python -m app.commands.import_users intake.csv
+    python -m app.commands.import_users intake.jsonl --workers 8 --batch-size 2000
+"""
+import argparse
+import json
+from pathlib import Path
+from app.db.session import SessionLocal
+from app.services.user_import_service import user_import_service, parse_user_rows, guess_format, hashing_pool
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import users")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--workers", type=int, help="password hashing processes (default: one per CPU)")
+    parser.add_argument("--report", type=Path, help="write the per-row outcome as JSON lines here")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or guess_format(args.path.name)
+    rows = parse_user_rows(args.path.read_text(encoding="utf-8-sig"), fmt)
+
+    if args.workers:
+        hashing_pool.workers = args.workers
+
+    db = SessionLocal()
+    try:
+        result = user_import_service.import_users(
+            db,
+            rows=rows,
+            batch_size=args.batch_size,
+            workers=args.workers
+        )
+    finally:
+        db.close()
+        hashing_pool.stop()
+
+    if args.report:
+        with args.report.open("w") as report:
+            for row in result["rows"]:
+                report.write(json.dumps(row, default=str) + "\n")
+    else:
+        for row in result["rows"]:
+            if row["status"] != "created":
+                print(f"row {row['row']}: {row['status']} {row.get('email') or ''} {row.get('detail') or ''}")
+
+    print(f"done: {result['created']} created, {result['duplicates']} duplicates, {result['invalid']} invalid, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
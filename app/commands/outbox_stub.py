@@ -0,0 +1,60 @@
+"""
+Local stand-in for a downstream system that receives outbox events over HTTP.
+
+    python -m app.commands.outbox_stub --port 9100
+    OUTBOX_SINKS=http://127.0.0.1:9100/events python -m app.server
+
+Prints every event and answers 204. With --fail-every N every Nth batch gets
+a 503, to watch the dispatcher retry and redeliver.
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+
+def make_handler(fail_every: int):
+    batches = {"count": 0}
+
+    class OutboxStubHandler(BaseHTTPRequestHandler):
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            batches["count"] += 1
+            if fail_every and batches["count"] % fail_every == 0:
+                print(f"batch {batches['count']}: rejected", flush=True)
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            events = json.loads(body)["events"]
+            for event in events:
+                print(f"batch {batches['count']}: #{event['id']} {event['type']} {json.dumps(event['payload'])}", flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+
+        def log_message(self, format, *args):
+            pass
+
+    return OutboxStubHandler
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print outbox events POSTed by the dispatcher")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.fail_every))
+    print(f"listening on http://{args.host}:{args.port}/events", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Delete expired refresh tokens, revoked ones included.
+
+    python -m app.commands.prune_refresh_tokens
+    python -m app.commands.prune_refresh_tokens --batch-size 2000
+
+Signing in already drops the user's own expired tokens; run this daily (cron)
+for the users who never come back.
+"""
+import argparse
+import app.main  # noqa: F401  configure every mapper
+from app.db.session import SessionLocal
+from app.services.auth_service import AuthService
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete expired refresh tokens")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        deleted = AuthService.prune_refresh_tokens(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"done: {deleted} refresh tokens deleted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Recompute the enrollment statistics rollups from the enrollments table.
+
+    python -m app.commands.rebuild_enrollment_stats
+
+Only needed if enrollments were written without going through the services.
+"""
+import app.main  # noqa: F401  configure every mapper
+from app.db.session import SessionLocal
+from app.services.stats_service import enrollment_stats
+
+
+
+def main():
+    db = SessionLocal()
+    try:
+        enrollment_stats.rebuild(db)
+    finally:
+        db.close()
+    print("done: enrollment statistics rebuilt")
+
+
+if __name__ == "__main__":
+    main()
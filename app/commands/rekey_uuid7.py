@@ -0,0 +1,116 @@
+"""
+Give existing users or courses time-ordered (version 7) ids.
+
+    python -m app.commands.rekey_uuid7 courses --dry-run
+    python -m app.commands.rekey_uuid7 courses
+    python -m app.commands.rekey_uuid7 users
+
+New rows already get uuid7 ids, so this is only needed for rows created
+before, and only if id order has to match creation order for them too.
+The ids are public (course links, API clients, the audit trail), which is
+why no migration does this on upgrade: run it when changing them is
+acceptable, with the app stopped.
+
+PostgreSQL only. Runs in one transaction with the table locked: foreign keys
+pointing at the table are dropped, the ids are rewritten in the table, in
+every referencing column, in enrollments_archive and in audit_logs, and the
+foreign keys are added back (which revalidates them). Rows created before
+have no timestamp, so they get ids in the milliseconds just before the run,
+in physical row order, which approximates insertion order. Outbox events
+already delivered keep the old ids in their payload.
+"""
+import argparse
+import time
+import app.main  # noqa: F401  configure every mapper
+from sqlalchemy import text
+from app.core.ids import uuid7_at
+from app.db.session import SessionLocal
+
+
+# Columns that hold these ids without a foreign key
+UNCONSTRAINED_REFERENCES = {
+    "users": [
+        ("enrollments_archive", "user_id", None),
+        ("audit_logs", "actor_id", None),
+        ("audit_logs", "target_id", "user"),
+    ],
+    "courses": [
+        ("enrollments_archive", "course_id", None),
+        ("audit_logs", "target_id", "course"),
+    ],
+}
+
+
+
+def rekey(db, table: str, dry_run: bool = False) -> int:
+    if db.get_bind().dialect.name != "postgresql":
+        raise SystemExit("rekey_uuid7 needs PostgreSQL")
+
+    db.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+    old_ids = db.execute(text(
+        f"SELECT id FROM {table} WHERE substr(id::text, 15, 1) <> '7' ORDER BY ctid"
+    )).scalars().all()
+
+    foreign_keys = db.execute(text(
+        "SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid), a.attname "
+        "FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+        "WHERE c.contype = 'f' AND c.confrelid = CAST(:table AS regclass) AND c.conparentid = 0"
+    ), {"table": table}).all()
+
+    print(f"{table}: {len(old_ids)} rows to rekey")
+    for child, name, _, column in foreign_keys:
+        print(f"  {child}.{column} ({name})")
+    if dry_run or not old_ids:
+        db.rollback()
+        return 0
+
+    start_ms = time.time_ns() // 1_000_000 - len(old_ids)
+    db.execute(text(
+        "CREATE TEMP TABLE rekey_map (old_id uuid PRIMARY KEY, new_id uuid NOT NULL) ON COMMIT DROP"
+    ))
+    db.execute(
+        text("INSERT INTO rekey_map (old_id, new_id) VALUES (:old_id, :new_id)"),
+        [{"old_id": old_id, "new_id": uuid7_at(start_ms + number)} for number, old_id in enumerate(old_ids)]
+    )
+
+    for child, name, _, _ in foreign_keys:
+        db.execute(text(f'ALTER TABLE {child} DROP CONSTRAINT "{name}"'))
+
+    db.execute(text(f"UPDATE {table} t SET id = m.new_id FROM rekey_map m WHERE t.id = m.old_id"))
+    for child, _, _, column in foreign_keys:
+        db.execute(text(f"UPDATE {child} t SET {column} = m.new_id FROM rekey_map m WHERE t.{column} = m.old_id"))
+
+    for child, column, target_type in UNCONSTRAINED_REFERENCES[table]:
+        if target_type is None:
+            db.execute(text(f"UPDATE {child} t SET {column} = m.new_id FROM rekey_map m WHERE t.{column} = m.old_id"))
+        else:
+            db.execute(text(
+                f"UPDATE {child} t SET {column} = m.new_id::text FROM rekey_map m "
+                f"WHERE t.target_type = :target_type AND t.{column} = m.old_id::text"
+            ), {"target_type": target_type})
+
+    for child, name, definition, _ in foreign_keys:
+        db.execute(text(f'ALTER TABLE {child} ADD CONSTRAINT "{name}" {definition}'))
+
+    db.commit()
+    return len(old_ids)
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite existing ids as time-ordered UUIDs")
+    parser.add_argument("table", choices=sorted(UNCONSTRAINED_REFERENCES))
+    parser.add_argument("--dry-run", action="store_true", help="only count rows and list the foreign keys")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rekeyed = rekey(db, args.table, dry_run=args.dry_run)
+    finally:
+        db.close()
+    print(f"done: {rekeyed} {args.table} rekeyed")
+
+
+if __name__ == "__main__":
+    main()
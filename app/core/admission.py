@@ -0,0 +1,229 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Hashable, Optional
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+
+
+
+class TicketStatus(str, Enum):
+    WAITING = "waiting"
+    ADMITTED = "admitted"
+    ACTIVE = "active"
+
+
+
+@dataclass
+class AdmissionTicket:
+    token: str
+    student: Hashable
+    seq: int
+    status: TicketStatus
+    expires_at: float
+
+
+
+class AdmissionQueued(Exception):
+    """
+    Raised before the request touches the database when the caller has to
+    wait; answered with 202 and the ticket description.
+    """
+
+    def __init__(self, queued: dict):
+        super().__init__(queued)
+        self.queued = queued
+
+
+def admission_queued_handler(request: Request, exc: AdmissionQueued) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=exc.queued,
+        headers={"Retry-After": str(exc.queued["retry_after"])}
+    )
+
+
+
+class AdmissionQueue:
+    """
+    Virtual waiting room that caps how many enrollment transactions run at once.
+
+    A request runs straight away while there is a free slot and nobody is
+    waiting. Otherwise the student gets a ticket and its place in a FIFO queue.
+    When a slot frees up the head of the queue is admitted and the slot is held
+    for `admit_window` seconds so the student can resubmit and claim it.
+    Each student, identified by any hashable key (the route uses the access
+    token subject so no database work is needed), holds at most one ticket.
+    """
+
+    def __init__(self, max_active: int, admit_window: float, poll_timeout: float):
+        self.max_active = max_active
+        self.admit_window = admit_window
+        self.poll_timeout = poll_timeout
+
+        self._lock = threading.Lock()
+        self._slots_in_use = 0
+        self._seq = 0
+        self._waiting: "OrderedDict[str, AdmissionTicket]" = OrderedDict()
+        self._admitted: Dict[str, AdmissionTicket] = {}
+        self._tickets: Dict[str, AdmissionTicket] = {}
+        self._by_user: Dict[Hashable, AdmissionTicket] = {}
+
+        self._admitted_total = 0
+        self._queued_total = 0
+        self._expired_total = 0
+
+
+    def _new_ticket(self, student: Hashable, ticket_status: TicketStatus, expires_at: float) -> AdmissionTicket:
+        self._seq += 1
+        ticket = AdmissionTicket(
+            token=secrets.token_urlsafe(16),
+            student=student,
+            seq=self._seq,
+            status=ticket_status,
+            expires_at=expires_at
+        )
+        self._tickets[ticket.token] = ticket
+        self._by_user[student] = ticket
+        return ticket
+
+
+    def _forget(self, ticket: AdmissionTicket) -> None:
+        self._tickets.pop(ticket.token, None)
+        self._waiting.pop(ticket.token, None)
+        self._admitted.pop(ticket.token, None)
+        if self._by_user.get(ticket.student) is ticket:
+            del self._by_user[ticket.student]
+
+
+    def _expire_and_promote(self, now: float) -> None:
+        # Admitted students that never came back give their slot up
+        for ticket in [t for t in self._admitted.values() if t.expires_at <= now]:
+            self._forget(ticket)
+            self._slots_in_use -= 1
+            self._expired_total += 1
+
+        while self._waiting and self._slots_in_use < self.max_active:
+            _, ticket = self._waiting.popitem(last=False)
+
+            # Waiting students that stopped polling are dropped when they reach the head
+            if ticket.expires_at <= now:
+                self._forget(ticket)
+                self._expired_total += 1
+                continue
+
+            ticket.status = TicketStatus.ADMITTED
+            ticket.expires_at = now + self.admit_window
+            self._admitted[ticket.token] = ticket
+            self._slots_in_use += 1
+
+
+    def acquire(self, student: Hashable) -> AdmissionTicket:
+        """
+        Return an ACTIVE ticket when the caller may run now, otherwise their
+        WAITING ticket. ACTIVE tickets must be handed back through release().
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire_and_promote(now)
+            ticket = self._by_user.get(student)
+
+            if ticket is not None:
+                if ticket.status == TicketStatus.ACTIVE:
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="An enrollment request is already in progress"
+                    )
+
+                if ticket.status == TicketStatus.ADMITTED:
+                    # The slot was reserved at promotion time
+                    del self._admitted[ticket.token]
+                    ticket.status = TicketStatus.ACTIVE
+                    self._admitted_total += 1
+                    return ticket
+
+                ticket.expires_at = now + self.poll_timeout
+                return ticket
+
+            if not self._waiting and self._slots_in_use < self.max_active:
+                self._slots_in_use += 1
+                self._admitted_total += 1
+                return self._new_ticket(student, TicketStatus.ACTIVE, now)
+
+            ticket = self._new_ticket(student, TicketStatus.WAITING, now + self.poll_timeout)
+            self._waiting[ticket.token] = ticket
+            self._queued_total += 1
+            return ticket
+
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        with self._lock:
+            if self._tickets.get(ticket.token) is not ticket or ticket.status != TicketStatus.ACTIVE:
+                return
+            self._forget(ticket)
+            self._slots_in_use -= 1
+            self._expire_and_promote(time.monotonic())
+
+
+    def poll(self, token: str) -> Optional[dict]:
+        """
+        Cheap status check for a queued client; no database access.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire_and_promote(now)
+            ticket = self._tickets.get(token)
+            if ticket is None:
+                return None
+
+            if ticket.status == TicketStatus.WAITING:
+                ticket.expires_at = now + self.poll_timeout
+
+            return self._describe(ticket)
+
+
+    def describe(self, ticket: AdmissionTicket) -> dict:
+        with self._lock:
+            return self._describe(ticket)
+
+
+    def _describe(self, ticket: AdmissionTicket) -> dict:
+        position = 0
+        if ticket.status == TicketStatus.WAITING and self._waiting:
+            head = next(iter(self._waiting.values()))
+            position = ticket.seq - head.seq + 1
+
+        return {
+            "token": ticket.token,
+            "status": ticket.status.value,
+            "position": position,
+            "retry_after": 1 if ticket.status == TicketStatus.WAITING else 0
+        }
+
+
+    def metrics(self) -> dict:
+        with self._lock:
+            self._expire_and_promote(time.monotonic())
+            return {
+                "max_active": self.max_active,
+                "slots_in_use": self._slots_in_use,
+                "queue_depth": len(self._waiting),
+                "admitted_waiting_to_claim": len(self._admitted),
+                "admitted_total": self._admitted_total,
+                "queued_total": self._queued_total,
+                "expired_total": self._expired_total
+            }
+
+
+
+enrollment_admission = AdmissionQueue(
+    max_active=settings.ENROLLMENT_MAX_CONCURRENCY,
+    admit_window=settings.ENROLLMENT_ADMIT_WINDOW,
+    poll_timeout=settings.ENROLLMENT_QUEUE_POLL_TIMEOUT
+)
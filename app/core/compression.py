@@ -0,0 +1,84 @@
+import gzip
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from fastapi import Request, Response
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """
+    A response body together with its compressed variants, built once and
+    served to every client that accepts one of them.
+    """
+    identity: bytes
+    encodings: Mapping[str, bytes]
+
+
+
+def encode_payload(body: bytes) -> EncodedPayload:
+    encodings = {}
+
+    # Small bodies are not worth the CPU or the header overhead
+    if len(body) >= settings.GZIP_MIN_SIZE:
+        if brotli is not None:
+            encodings["br"] = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+        encodings["gzip"] = gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+    return EncodedPayload(identity=body, encodings=MappingProxyType(encodings))
+
+
+def accepted_encodings(accept_encoding: str) -> Mapping[str, float]:
+    """
+    Parse an Accept-Encoding header into {coding: q}.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(accept_encoding: str, payload: EncodedPayload) -> Tuple[bytes, Optional[str]]:
+    """
+    Pick the best variant the client accepts; brotli wins over gzip on ties.
+    """
+    accepted = accepted_encodings(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in ("br", "gzip"):
+        if coding not in payload.encodings:
+            continue
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+
+    if best is None:
+        return payload.identity, None
+    return payload.encodings[best], best
+
+
+def encoded_response(request: Request, payload: EncodedPayload, media_type: str = "application/json") -> Response:
+    body, coding = negotiate(request.headers.get("accept-encoding", ""), payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if coding:
+        # GZipMiddleware leaves responses that already carry an encoding alone
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type=media_type, headers=headers)
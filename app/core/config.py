@@ -7,11 +7,132 @@ class Settings(BaseSettings):
   
     # DB
     DATABASE_URL: str
+    # psycopg 3 only: executions before a statement is prepared server-side, -1 disables
+    DB_PREPARE_THRESHOLD: int = 5
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    # Connections the database grants this app across all workers, see app/server.py
+    DB_MAX_CONNECTIONS: int = 100
+
+    # Production server (python -m app.server). 0 workers sizes from CPUs and DB budget;
+    # keep 1 while queue tickets, deletion jobs and seat streams live in process memory
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 1
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
 
     # Security
     TOKEN_EXPIRES: int = 30
     ALGORITHM: str = ""
     SECRET_KEY: str = ""
+    # PEM text or file path, used by asymmetric algorithms such as ES256 or EdDSA
+    PRIVATE_KEY: str = ""
+    PUBLIC_KEY: str = ""
+    TOKEN_CACHE_SIZE: int = 4096
+    REFRESH_TOKEN_EXPIRES_DAYS: int = 14
+
+    # Password hashing. The first scheme hashes new passwords, the others are
+    # only verified and get rehashed on the next login. See calibrate_password_hashing
+    PWD_SCHEMES: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # Bulk user import. 0 workers means one hashing process per CPU
+    USER_IMPORT_BATCH_SIZE: int = 1000
+    USER_IMPORT_HASH_WORKERS: int = 0
+    # Largest import file accepted, in bytes
+    USER_IMPORT_MAX_BYTES: int = 10 * 1024 * 1024
+
+    # Course catalog snapshot, 0 disables it
+    CATALOG_CACHE_TTL: int = 30
+    # GET /courses/?after=... page size when no limit is given
+    COURSE_PAGE_SIZE: int = 50
+
+    # Concurrent identical course reads share one query. Past these bounds, or
+    # after waiting SINGLE_FLIGHT_TIMEOUT seconds, callers run their own
+    SINGLE_FLIGHT_MAX_WAITERS: int = 1000
+    SINGLE_FLIGHT_MAX_KEYS: int = 10000
+    SINGLE_FLIGHT_TIMEOUT: float = 10
+
+    # Response compression, bodies smaller than GZIP_MIN_SIZE bytes are sent as is.
+    # Brotli is only used when the brotli package is installed
+    GZIP_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+
+    # Adaptive concurrency limit per worker. Under overload catalog reads are shed
+    # first, enrollment writes last, see app/core/load_shedding.py
+    LOAD_SHEDDING_ENABLED: bool = True
+    CONCURRENCY_LIMIT_INITIAL: int = 20
+    CONCURRENCY_LIMIT_MIN: int = 4
+    CONCURRENCY_LIMIT_MAX: int = 200
+    # Back off once requests take this many times their best recent latency
+    CONCURRENCY_LATENCY_TOLERANCE: float = 2.0
+    # Latencies below this never count as overload
+    CONCURRENCY_LATENCY_FLOOR_MS: float = 25
+    LOAD_SHED_RETRY_AFTER: int = 1
+
+    # Enrollment admission queue
+    ENROLLMENT_MAX_CONCURRENCY: int = 8
+    ENROLLMENT_ADMIT_WINDOW: int = 30
+    ENROLLMENT_QUEUE_POLL_TIMEOUT: int = 60
+
+    # Live seat counts (GET /courses/seats/stream): updates are batched every
+    # SEAT_FEED_INTERVAL seconds, idle streams get a keepalive comment. Writes
+    # made by other workers show up within SEAT_FEED_RESYNC_INTERVAL, 0 disables
+    SEAT_FEED_INTERVAL: float = 0.5
+    SEAT_FEED_RESYNC_INTERVAL: float = 5
+    SEAT_FEED_KEEPALIVE: float = 15
+    SEAT_FEED_MAX_COURSES: int = 50
+
+    # Enrollment queries only look at this many terms, current one included. 0 disables pruning
+    ENROLLMENT_ACTIVE_TERMS: int = 2
+
+    # Courses with this many live enrollments or more are deleted by a background job,
+    # whose status stays available for COURSE_DELETE_JOB_RETENTION seconds after it ends
+    COURSE_DELETE_SYNC_LIMIT: int = 300
+    COURSE_DELETE_BATCH_SIZE: int = 1000
+    COURSE_DELETE_JOB_RETENTION: float = 3600
+
+    # Admin request profiling: send this header to profile one request
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_SAMPLE_INTERVAL: float = 0.001
+    PROFILE_KEEP: int = 50
+
+    # Statements slower than this are logged with their plan, negative disables
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_KEEP: int = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+    # Seconds before the same statement is explained again
+    SLOW_QUERY_EXPLAIN_INTERVAL: int = 300
+
+    # Seconds between hourly enrollment statistics rollups, 0 disables the worker
+    ENROLLMENT_STATS_ROLLUP_INTERVAL: float = 60
+
+    # Enrollment event outbox. Sinks are a comma separated list of file paths
+    # and http(s) URLs; without any, events stay in the table undelivered until
+    # OUTBOX_RETENTION_HOURS pass (the hourly statistics are counted from them)
+    OUTBOX_SINKS: str = ""
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_BACKOFF: float = 60
+    OUTBOX_HTTP_TIMEOUT: float = 5
+    # Seconds a batch stays claimed by one dispatcher; keep it above the time
+    # sending takes (OUTBOX_HTTP_TIMEOUT per HTTP sink)
+    OUTBOX_CLAIM_TIMEOUT: float = 60
+    OUTBOX_RETENTION_HOURS: int = 24
+
+    # Audit log writer
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_MAX_QUEUE: int = 10000
+    AUDIT_ENQUEUE_TIMEOUT: float = 0.05
 
    
     class Config:
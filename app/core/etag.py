@@ -0,0 +1,26 @@
+from typing import Optional, Set
+
+
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def if_match_versions(header: Optional[str]) -> Optional[Set[int]]:
+    """
+    Versions accepted by an If-Match header. None means any version will do
+    (no header, or "*"); an empty set means nothing can match.
+    """
+    if header is None or header.strip() == "*":
+        return None
+
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        # Weak tags never match in If-Match (RFC 9110 strong comparison)
+        if tag.startswith("W/"):
+            continue
+        tag = tag.strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
@@ -0,0 +1,200 @@
+import json
+import statistics
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Dict, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+
+
+class Priority(IntEnum):
+    LOW = 0        # anonymous catalog reads
+    NORMAL = 1
+    HIGH = 2       # auth and admin operations
+    CRITICAL = 3   # enrollment writes
+
+
+# Share of the concurrency limit each class may fill. Lower classes hit
+# their ceiling first, so they are shed while higher ones still get in.
+PRIORITY_SHARES: Dict[Priority, float] = {
+    Priority.LOW: 0.5,
+    Priority.NORMAL: 0.7,
+    Priority.HIGH: 0.85,
+    Priority.CRITICAL: 1.0
+}
+
+_READS = ("GET", "HEAD", "OPTIONS")
+
+# Long-lived streams would hold a slot for their whole life
+EXEMPT_PATHS = ("/courses/seats/stream", "/docs", "/redoc", "/openapi.json")
+
+
+
+def request_priority(method: str, path: str) -> Priority:
+    """
+    Priority class of a request, decided by router and method.
+    """
+    if path.startswith("/enrollments"):
+        return Priority.NORMAL if method in _READS else Priority.CRITICAL
+    if path.startswith(settings.API_V1_STR):
+        return Priority.HIGH
+    if path.startswith("/courses"):
+        return Priority.LOW if method in _READS else Priority.HIGH
+    return Priority.LOW if method in _READS else Priority.NORMAL
+
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that follows latency, AIMD style.
+
+    Every completed request reports its latency relative to the best recent
+    latency of its priority class, so slow endpoints (login hashes a password)
+    and fast ones (catalog reads) are judged on the same scale. Each `window`
+    samples the median ratio decides: above `tolerance` the limit is
+    multiplied by `backoff`, otherwise it grows by one if requests actually
+    used most of it. Baselines never go below `latency_floor` seconds, so a
+    few milliseconds of queueing on fast endpoints is not taken for overload,
+    and they drift up by `drift` per window so they follow lasting changes
+    instead of sticking to a lucky minimum.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = 2.0,
+        latency_floor: float = 0.025,
+        backoff: float = 0.9,
+        window: int = 50,
+        drift: float = 0.01
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.latency_floor = latency_floor
+        self.backoff = backoff
+        self.window = window
+        self.drift = drift
+
+        self.in_flight = 0
+        self._peak_in_flight = 0
+        self._baselines: Dict[Priority, float] = {}
+        self._ratios: deque = deque(maxlen=window)
+
+        self.admitted_total: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.shed_total: Dict[Priority, int] = {priority: 0 for priority in Priority}
+
+
+    def try_acquire(self, priority: Priority) -> bool:
+        if self.in_flight >= max(1, int(self.limit * PRIORITY_SHARES[priority])):
+            self.shed_total[priority] += 1
+            return False
+        self.in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+        self.admitted_total[priority] += 1
+        return True
+
+
+    def release(self, priority: Priority, latency: float) -> None:
+        self.in_flight -= 1
+
+        baseline = self._baselines.get(priority)
+        if baseline is None or latency < baseline:
+            baseline = self._baselines[priority] = max(latency, self.latency_floor)
+        self._ratios.append(latency / baseline)
+        if len(self._ratios) >= self.window:
+            self._adjust()
+
+
+    def _adjust(self) -> None:
+        ratio = statistics.median(self._ratios)
+        self._ratios.clear()
+
+        if ratio > self.tolerance:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif self._peak_in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+        self._peak_in_flight = self.in_flight
+
+        for priority, baseline in self._baselines.items():
+            self._baselines[priority] = baseline * (1 + self.drift)
+
+
+    def metrics(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "class_limits": {
+                priority.name.lower(): max(1, int(self.limit * share))
+                for priority, share in PRIORITY_SHARES.items()
+            },
+            "baseline_ms": {
+                priority.name.lower(): round(baseline * 1000, 3)
+                for priority, baseline in self._baselines.items()
+            },
+            "admitted_total": {priority.name.lower(): count for priority, count in self.admitted_total.items()},
+            "shed_total": {priority.name.lower(): count for priority, count in self.shed_total.items()}
+        }
+
+
+
+class LoadSheddingMiddleware:
+    """
+    Admits requests under the adaptive limit and answers the rest with a
+    fast 503 and Retry-After, lowest priority first.
+
+    Everything runs on the event loop, so the counters need no lock. Only
+    counts this worker's requests.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Optional[AdaptiveLimiter] = None, retry_after: int = 1):
+        self.app = app
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self.limiter or concurrency_limiter
+        if scope["type"] != "http" or not settings.LOAD_SHEDDING_ENABLED or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope["method"], scope["path"])
+        if not limiter.try_acquire(priority):
+            await self._reject(send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(priority, time.perf_counter() - start)
+
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps({"detail": "Server is busy, retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+
+concurrency_limiter = AdaptiveLimiter(
+    initial=settings.CONCURRENCY_LIMIT_INITIAL,
+    min_limit=settings.CONCURRENCY_LIMIT_MIN,
+    max_limit=settings.CONCURRENCY_LIMIT_MAX,
+    tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+    latency_floor=settings.CONCURRENCY_LATENCY_FLOOR_MS / 1000
+)
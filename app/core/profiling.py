@@ -0,0 +1,325 @@
+import contextvars
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+
+
+class RequestProfile:
+    """
+    Samples and SQL timings collected for one request.
+    """
+
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = secrets.token_urlsafe(9)
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+
+        self.samples = 0
+        self._tree: Dict = {}
+        self._sql: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+
+    def add_stack(self, stack: List[str]) -> None:
+        with self._lock:
+            self.samples += 1
+            node = self._tree
+            for frame in stack:
+                entry = node.setdefault(frame, [0, {}])
+                entry[0] += 1
+                node = entry[1]
+
+
+    def add_sql(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._sql.setdefault(statement, []).append(elapsed_ms)
+
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+
+    def report(self, min_share: float = 0.01) -> dict:
+        with self._lock:
+            statements = sorted(
+                (
+                    {
+                        "statement": statement,
+                        "count": len(timings),
+                        "total_ms": round(sum(timings), 3),
+                        "max_ms": round(max(timings), 3)
+                    }
+                    for statement, timings in self._sql.items()
+                ),
+                key=lambda row: row["total_ms"],
+                reverse=True
+            )
+            tree = self._render(self._tree, max(1, int(self.samples * min_share)))
+
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "sample_interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "call_tree": tree,
+            "sql": {
+                "count": sum(row["count"] for row in statements),
+                "total_ms": round(sum(row["total_ms"] for row in statements), 3),
+                "statements": statements
+            }
+        }
+
+
+    def _render(self, node: Dict, min_samples: int) -> List[dict]:
+        children = sorted(node.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            {
+                "frame": frame,
+                "samples": count,
+                "share": round(count / self.samples, 4),
+                "children": self._render(grandchildren, min_samples)
+            }
+            for frame, (count, grandchildren) in children
+            if count >= min_samples
+        ]
+
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    marker = filename.rfind("/app/")
+    short = filename[marker + 1:] if marker >= 0 else filename.rsplit("/", 1)[-1]
+    return f"{code.co_name} ({short}:{frame.f_lineno})"
+
+
+def _request_stack(frame, profile: RequestProfile) -> Optional[List[str]]:
+    """
+    Root-to-leaf stack of a thread if it is running code for `profile`.
+
+    Sync endpoints and dependencies run in worker threads through
+    Context.run(); the worker keeps that Context in a local named `context`,
+    and it carries the profile context variable set by the middleware.
+    """
+    stack = []
+    while frame is not None:
+        if frame.f_code.co_name == "run":
+            context = frame.f_locals.get("context")
+            if isinstance(context, contextvars.Context):
+                if context.get(_active_profile) is profile:
+                    stack.reverse()
+                    return stack
+                return None
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    return None
+
+
+
+class _Sampler(threading.Thread):
+
+    def __init__(self, profile: RequestProfile):
+        super().__init__(name=f"profile-{profile.id}", daemon=True)
+        self.profile = profile
+        self._stopping = threading.Event()
+
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopping.wait(self.profile.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _request_stack(frame, self.profile)
+                if stack:
+                    self.profile.add_stack(stack)
+
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self.join()
+
+
+
+class _SqlTimer:
+    """
+    Engine-wide cursor listeners, attached only while a profile is running so
+    unprofiled requests pay nothing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _active_profile.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+    @staticmethod
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _active_profile.get()
+        started = conn.info.get("profile_started")
+        if profile is not None and started:
+            profile.add_sql(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._users == 0:
+                event.listen(Engine, "before_cursor_execute", self._before)
+                event.listen(Engine, "after_cursor_execute", self._after)
+            self._users += 1
+
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._users == 0:
+                event.remove(Engine, "before_cursor_execute", self._before)
+                event.remove(Engine, "after_cursor_execute", self._after)
+
+
+_sql_timer = _SqlTimer()
+
+
+
+class ProfileStore:
+    """
+    Most recent request profiles, kept in memory for admins to fetch.
+    """
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def add(self, report: dict) -> None:
+        with self._lock:
+            self._profiles[report["id"]] = report
+            while len(self._profiles) > self.maxlen:
+                self._profiles.popitem(last=False)
+
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+
+    def summaries(self) -> List[dict]:
+        with self._lock:
+            return [
+                {key: report[key] for key in ("id", "method", "path", "status", "started_at", "duration_ms", "samples")}
+                for report in reversed(self._profiles.values())
+            ]
+
+
+
+profile_store = ProfileStore(maxlen=settings.PROFILE_KEEP)
+
+
+
+def bearer_is_admin(headers: Headers) -> bool:
+    """
+    Whether the request's bearer token belongs to an active admin, checked
+    the way the get_current_active_admin dependency checks it.
+    """
+    from app.api.deps import get_current_active_admin, get_current_user
+    from app.db.session import SessionLocal
+
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    db = SessionLocal()
+    try:
+        get_current_active_admin(get_current_user(token=token, db=db))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when an admin sends the PROFILE_HEADER header.
+
+    The report (call tree of sampled worker-thread stacks plus SQL timings)
+    is kept in profile_store and its id returned in the X-Profile-Id response
+    header. Other requests only pay for one header lookup. `admin_check`
+    decides from the request headers who may profile; it runs in a worker
+    thread and may use the database.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        header: str = "x-profile",
+        interval: float = 0.001,
+        admin_check: Callable[[Headers], bool] = bearer_is_admin
+    ):
+        self.app = app
+        self.header = header.lower()
+        self.interval = interval
+        self.admin_check = admin_check
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if self.header not in headers or not await run_in_threadpool(self.admin_check, headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], self.interval)
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile.id
+            await send(message)
+
+        token = _active_profile.set(profile)
+        sampler = _Sampler(profile)
+        _sql_timer.acquire()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            _sql_timer.release()
+            _active_profile.reset(token)
+            profile.finish()
+            profile_store.add(profile.report())
@@ -1,6 +1,14 @@
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, List, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import hmac
+import secrets
+import threading
+import time
 from pydantic import EmailStr
 import jwt
 from passlib.context import CryptContext
@@ -10,7 +18,37 @@ from app.core.config import settings
 
 
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
+def build_pwd_context(
+    schemes: Optional[List[str]] = None,
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: Optional[int] = None,
+    argon2_memory_cost: Optional[int] = None,
+    argon2_parallelism: Optional[int] = None
+) -> CryptContext:
+    """
+    Build the password context from settings; arguments override single values.
+
+    Cost limits are pinned to the configured cost so hashes made with any other
+    cost report needs_update() and get rehashed on the next login.
+    """
+    schemes = schemes or [s.strip() for s in settings.PWD_SCHEMES.split(",") if s.strip()]
+    options = {}
+
+    if "bcrypt" in schemes:
+        rounds = bcrypt_rounds or settings.BCRYPT_ROUNDS
+        options.update(bcrypt__rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+
+    if "argon2" in schemes:
+        options.update(
+            argon2__time_cost=argon2_time_cost or settings.ARGON2_TIME_COST,
+            argon2__memory_cost=argon2_memory_cost or settings.ARGON2_MEMORY_COST,
+            argon2__parallelism=argon2_parallelism or settings.ARGON2_PARALLELISM
+        )
+
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_pwd_context()
 
 def get_pwd_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -20,21 +58,148 @@ def verify_pwd(plain_pwd: str, hashed_pwd: str) -> bool:
     return pwd_context.verify(plain_pwd, hashed_pwd)
 
 
+def verify_and_update_pwd(plain_pwd: str, hashed_pwd: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when the stored hash uses an outdated scheme or
+    cost, also return a replacement hash.
+    """
+    return pwd_context.verify_and_update(plain_pwd, hashed_pwd)
+
+
+
+def _read_key(value: str) -> str:
+    # Keys can be given inline as PEM text or as a path to a PEM file
+    if value.lstrip().startswith("-----BEGIN"):
+        return value
+    return Path(value).read_text()
+
+
+@lru_cache(maxsize=1)
+def get_signing_keys() -> Tuple[Any, Any]:
+    """
+    Resolve the signing and verification keys once per process.
+
+    HS* algorithms use SECRET_KEY for both. Asymmetric algorithms (ES256, EdDSA,
+    RS256, ...) sign with PRIVATE_KEY and verify with PUBLIC_KEY, so services
+    that only verify tokens need nothing but the public key.
+    """
+    try:
+        algorithm = jwt.get_algorithm_by_name(settings.ALGORITHM)
+    except NotImplementedError as exc:
+        raise RuntimeError(
+            f"JWT algorithm {settings.ALGORITHM!r} is unavailable; "
+            "asymmetric algorithms need the 'cryptography' package"
+        ) from exc
+
+    if settings.ALGORITHM.startswith("HS"):
+        key = algorithm.prepare_key(settings.SECRET_KEY)
+        return key, key
+
+    private_key = algorithm.prepare_key(_read_key(settings.PRIVATE_KEY)) if settings.PRIVATE_KEY else None
+    if settings.PUBLIC_KEY:
+        public_key = algorithm.prepare_key(_read_key(settings.PUBLIC_KEY))
+    elif private_key is not None:
+        public_key = private_key.public_key()
+    else:
+        raise RuntimeError(f"PRIVATE_KEY or PUBLIC_KEY must be set for {settings.ALGORITHM}")
+
+    return private_key, public_key
+
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens that already passed signature and claim checks,
+    keyed by a SHA-256 digest of the token and kept only until the token's exp.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[TokenData, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+
+    def get(self, token: str) -> Optional[TokenData]:
+        if self.maxsize <= 0:
+            return None
+
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+
+            token_data, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[digest]
+                return None
+
+            self._entries.move_to_end(digest)
+            return token_data
+
+
+    def put(self, token: str, token_data: TokenData, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (token_data, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+
+token_cache = VerifiedTokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    
+
     to_encode.update({'exp': expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm= settings.ALGORITHM)
+    signing_key, _ = get_signing_keys()
+    if signing_key is None:
+        raise RuntimeError("This service has no PRIVATE_KEY and cannot issue tokens")
+    encoded_jwt = jwt.encode(to_encode, signing_key, algorithm= settings.ALGORITHM)
     return encoded_jwt
 
 
+def create_refresh_token() -> Tuple[str, str]:
+    """
+    Return a new opaque refresh token and the hash to store for it.
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
 def verify_token(token: str) -> TokenData:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM)
+        _, verify_key = get_signing_keys()
+        payload = jwt.decode(token, verify_key, algorithms=[settings.ALGORITHM])
         email: EmailStr = payload.get('sub')
         if email is None:
             raise HTTPException(
@@ -42,12 +207,15 @@ def verify_token(token: str) -> TokenData:
                 detail="couldn't verify credentials",
                 headers={"WWW-Authenticate": "Bearer"}
                 )
-        return TokenData(email = email)
+        token_data = TokenData(email = email)
+        if 'exp' in payload:
+            token_cache.put(token, token_data, float(payload['exp']))
+        return token_data
     except PyJWTError:
          raise HTTPException(
                 status.HTTP_401_UNAUTHORIZED,
                 detail="couldn't verify credentials",
                 headers={"WWW-Authenticate": "Bearer"}
-                )                    
+                )
+
 
- 
\ No newline at end of file
@@ -0,0 +1,105 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers that arrive while
+    it runs wait for it and get the same result or exception. Nothing is
+    cached: once the call returns, the next caller starts a new one.
+
+    Bounds: at most `max_waiters` callers join one call and at most
+    `max_keys` calls are tracked at once; past either limit callers simply run
+    the function themselves. A waiter gives up after `timeout` seconds and
+    runs it too, so a stuck leader does not stall everyone behind it.
+    Results are shared between threads, so return immutable values.
+    """
+
+    def __init__(self, max_waiters: int = 1000, max_keys: int = 10000, timeout: Optional[float] = None):
+        self.max_waiters = max_waiters
+        self.max_keys = max_keys
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+        self._executed_total = 0
+        self._coalesced_total = 0
+        self._bypassed_total = 0
+        self._timeouts_total = 0
+
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        leader = False
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None and len(self._calls) < self.max_keys:
+                call = self._calls[key] = _Call()
+                leader = True
+                self._executed_total += 1
+            elif call is not None and call.waiters < self.max_waiters:
+                call.waiters += 1
+                self._coalesced_total += 1
+            else:
+                call = None
+                self._bypassed_total += 1
+                self._executed_total += 1
+
+        if call is None:
+            return fn()
+        if leader:
+            return self._lead(key, call, fn)
+
+        if not call.done.wait(self.timeout):
+            with self._lock:
+                self._timeouts_total += 1
+                self._executed_total += 1
+            return fn()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], T]) -> T:
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+
+    def metrics(self) -> dict:
+        with self._lock:
+            calls = self._executed_total + self._coalesced_total
+            return {
+                "in_flight": len(self._calls),
+                "executed_total": self._executed_total,
+                "coalesced_total": self._coalesced_total,
+                "bypassed_total": self._bypassed_total,
+                "timeouts_total": self._timeouts_total,
+                "coalesced_ratio": round(self._coalesced_total / calls, 4) if calls else 0.0
+            }
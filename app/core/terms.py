@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+
+# Academic terms are half years: January-June and July-December.
+# Enrollment partitions on PostgreSQL follow the same boundaries.
+TERM_START_MONTHS = (1, 7)
+
+
+
+def term_start(moment: datetime) -> datetime:
+    """
+    Start of the term that contains `moment`, in UTC.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    month = max(m for m in TERM_START_MONTHS if m <= moment.month)
+    return datetime(moment.year, month, 1, tzinfo=timezone.utc)
+
+
+def previous_term_start(start: datetime) -> datetime:
+    index = TERM_START_MONTHS.index(start.month)
+    if index == 0:
+        return start.replace(year=start.year - 1, month=TERM_START_MONTHS[-1])
+    return start.replace(month=TERM_START_MONTHS[index - 1])
+
+
+def active_since(terms: int, now: datetime = None) -> datetime:
+    """
+    Start of the oldest term that still counts as active, `terms` including
+    the current one.
+    """
+    start = term_start(now or datetime.now(timezone.utc))
+    for _ in range(max(terms, 1) - 1):
+        start = previous_term_start(start)
+    return start
@@ -0,0 +1,77 @@
+from typing import List, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import and_, any_, func, literal, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+
+
+def in_values(db: Session, column, values: Sequence):
+    """
+    `column IN (values)` that keeps the same SQL text for any number of values.
+
+    An expanded IN list is a different statement for every list length, so the
+    server can never reuse a prepared plan for it. On PostgreSQL the values are
+    sent as one array parameter instead: `column = ANY(%(param)s)`.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return column == any_(literal(list(values), ARRAY(column.type)))
+    return column.in_(values)
+
+
+
+def set_active_flag(
+    db: Session,
+    model,
+    is_active: bool,
+    criteria: Sequence,
+    ids: Optional[List[UUID]] = None
+) -> dict:
+    """
+    Set `is_active` on every row matching `criteria` with one
+    UPDATE ... RETURNING id, touching only rows not yet in that state,
+    then one read to count the rest: two round trips in all.
+
+    Does not commit. Returns the changed ids plus counts of rows already in
+    the requested state and, when `ids` is given, of ids that do not exist
+    and the ids that exist but were left out by `criteria` (`skipped`).
+    """
+    criteria = list(criteria)
+    selected = []
+    if ids is not None:
+        ids = list(dict.fromkeys(ids))
+        selected.append(in_values(db, model.id, ids))
+
+    values = {"is_active": is_active}
+    if hasattr(model, "version"):
+        # Keep optimistic concurrency checks working for ORM writers
+        values["version"] = model.version + 1
+
+    changed_ids = db.execute(
+        update(model)
+        .where(*criteria, *selected, model.is_active.is_not(is_active))
+        .values(**values)
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    # Every matching row is in the requested state now
+    if ids is None:
+        matched = db.query(func.count(model.id)).filter(*criteria).scalar()
+        skipped, not_found = [], 0
+    else:
+        # One read of the requested ids tells which exist and which `criteria` keeps
+        kept = dict(db.execute(
+            select(model.id, and_(true(), *criteria)).where(*selected)
+        ).all())
+        matched = sum(1 for keep in kept.values() if keep)
+        skipped = [id_ for id_ in ids if id_ in kept and not kept[id_]]
+        not_found = len(ids) - len(kept)
+
+    return {
+        "changed": len(changed_ids),
+        "unchanged": matched - len(changed_ids),
+        "not_found": not_found,
+        "skipped": skipped,
+        "changed_ids": changed_ids
+    }
@@ -1,11 +1,70 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.slow_queries import slow_query_log
 
 
 
-engine = create_engine(
-    settings.DATABASE_URL,
-)
+def enable_sqlite_foreign_keys(engine: Engine) -> None:
+    """
+    SQLite ignores foreign keys, ON DELETE CASCADE included, unless every
+    connection turns them on. Other dialects are left alone.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+
+def build_engine(url: str) -> Engine:
+    """
+    Create the engine for DATABASE_URL; the URL scheme picks the driver.
+
+    postgresql://            psycopg2, every statement is parsed and planned per call
+    postgresql+psycopg://    psycopg 3 (pip install "psycopg[binary]"), statements run
+                             DB_PREPARE_THRESHOLD times on a connection are prepared
+                             server-side and reused after that
+    """
+    url = make_url(url)
+    connect_args = {}
+
+    if url.drivername == "postgresql+asyncpg":
+        raise RuntimeError(
+            "asyncpg needs an async engine and the app uses sync sessions; "
+            "use postgresql+psycopg:// for prepared statement caching"
+        )
+
+    if url.drivername == "postgresql+psycopg":
+        # None turns preparing off, needed behind PgBouncer in transaction mode
+        connect_args["prepare_threshold"] = (
+            settings.DB_PREPARE_THRESHOLD if settings.DB_PREPARE_THRESHOLD >= 0 else None
+        )
+
+    if url.get_backend_name() == "sqlite":
+        engine = create_engine(url, connect_args=connect_args)
+    else:
+        # Prepared statements live per connection, so keep connections around
+        engine = create_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True
+        )
+
+    enable_sqlite_foreign_keys(engine)
+    slow_query_log.install(engine)
+    return engine
+
+
+
+engine = build_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
@@ -0,0 +1,209 @@
+import logging
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Statement with literals replaced by ? and expanded IN lists collapsed,
+    so every call of the same query gets the same text.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """
+    Type names of the bound parameters, never their values.
+    Runs of one type are folded, e.g. ["UUID*500"] for a long IN list.
+    """
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+
+    shape: List[str] = []
+    previous, run = None, 0
+    for value in parameters or ():
+        name = type(value).__name__
+        if name == previous:
+            run += 1
+            continue
+        if previous is not None:
+            shape.append(previous if run == 1 else f"{previous}*{run}")
+        previous, run = name, 1
+    if previous is not None:
+        shape.append(previous if run == 1 else f"{previous}*{run}")
+    return shape
+
+
+def calling_service() -> Optional[str]:
+    """
+    Innermost app/services frame on the current stack, as
+    "CourseService.get_course (app/services/course_service.py:42)".
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        marker = filename.rfind("/app/services/")
+        if marker >= 0:
+            return f"{frame.f_code.co_qualname} ({filename[marker + 1:]}:{frame.f_lineno})"
+        frame = frame.f_back
+    return None
+
+
+
+class SlowQueryLog:
+    """
+    Statements slower than `threshold_ms`, newest last, at most `keep` of them.
+
+    Each entry carries the normalized SQL, the parameter types, the service
+    method that issued it and the query plan. Plans come from EXPLAIN without
+    ANALYZE on the connection that ran the statement, so nothing is executed
+    twice; a statement is explained at most once per `explain_interval`
+    seconds and later entries reuse that plan.
+    """
+
+    def __init__(self, threshold_ms: float, keep: int, explain: bool = True, explain_interval: float = 300.0):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+
+        self._entries: deque = deque(maxlen=keep)
+        self._plans: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+        if self.threshold_ms < 0 or elapsed_ms < self.threshold_ms:
+            return
+
+        normalized = normalize_sql(statement)
+        origin = calling_service()
+        logger.warning("Slow query (%.1f ms) from %s: %s", elapsed_ms, origin or "unknown", normalized)
+
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(elapsed_ms, 3),
+            "statement": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "origin": origin,
+            "plan": None
+        }
+        if self.explain and not executemany:
+            entry["plan"] = self._plan(conn, statement, parameters, normalized)
+
+        with self._lock:
+            self._entries.append(entry)
+
+
+    def _plan(self, conn, statement: str, parameters, normalized: str) -> Optional[str]:
+        if not normalized.upper().startswith(_EXPLAINABLE):
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(normalized)
+            if cached is not None and now - cached[0] < self.explain_interval:
+                return cached[1]
+
+        try:
+            plan = self._explain(conn, statement, parameters)
+        except Exception as exc:
+            plan = f"EXPLAIN failed: {exc}"
+
+        with self._lock:
+            self._plans[normalized] = (now, plan)
+            self._plans.move_to_end(normalized)
+            while len(self._plans) > self._entries.maxlen:
+                self._plans.popitem(last=False)
+        return plan
+
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters) -> str:
+        """
+        Run EXPLAIN on the raw DBAPI connection so it bypasses the engine
+        events, inside the caller's transaction.
+        """
+        dialect = conn.dialect.name
+        cursor = conn.connection.cursor()
+        try:
+            if dialect == "postgresql":
+                # A failing EXPLAIN must not abort the caller's transaction
+                cursor.execute("SAVEPOINT slow_query_explain")
+                try:
+                    cursor.execute(f"EXPLAIN (ANALYZE off) {statement}", parameters)
+                    rows = cursor.fetchall()
+                except Exception:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                    raise
+                finally:
+                    cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+                return "\n".join(row[0] for row in rows)
+
+            if dialect == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return "\n".join(row[-1] for row in cursor.fetchall())
+
+            return f"EXPLAIN not supported on {dialect}"
+        finally:
+            cursor.close()
+
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            newest_first = list(reversed(self._entries))
+        return newest_first[:limit] if limit else newest_first
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    keep=settings.SLOW_QUERY_KEEP,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL
+)
@@ -1,16 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from app.api.v1 import auth_route
 from app.api.v1 import course_route
 from app.api.v1 import enrollment_route
+from app.api.v1 import audit_route
+from app.api.v1 import stats_route
+from app.api.v1 import profiling_route
+from app.core.admission import AdmissionQueued, admission_queued_handler
 from app.core.config import settings
+from app.core.load_shedding import LoadSheddingMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.services.audit_service import audit_logger
+from app.services.seat_feed_service import seat_feed
+from app.services.outbox_service import outbox_dispatcher
+from app.services.stats_service import hourly_stats_rollup
+from app.services.user_import_service import hashing_pool
 
 
-app = FastAPI(title="Course Enrolloment Application")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_logger.start()
+    seat_feed.start()
+    outbox_dispatcher.start()
+    hourly_stats_rollup.start()
+    hashing_pool.start()
+    yield
+    hashing_pool.stop()
+    hourly_stats_rollup.stop()
+    outbox_dispatcher.stop()
+    seat_feed.stop()
+    audit_logger.stop()
+
+
+app = FastAPI(title="Course Enrolloment Application", lifespan=lifespan)
+app.add_exception_handler(AdmissionQueued, admission_queued_handler)
+
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE, compresslevel=settings.GZIP_LEVEL)
+app.add_middleware(ProfilingMiddleware, header=settings.PROFILE_HEADER, interval=settings.PROFILE_SAMPLE_INTERVAL)
+# Outermost, so shed requests skip everything else
+app.add_middleware(LoadSheddingMiddleware, retry_after=settings.LOAD_SHED_RETRY_AFTER)
 
 
 app.include_router(auth_route.router, prefix=settings.API_V1_STR, tags=["auth"])
 app.include_router(course_route.router, prefix="/courses", tags=["Courses"])
 app.include_router(enrollment_route.router, prefix="/enrollments", tags=["Enrolloments"])
+app.include_router(audit_route.router, prefix=settings.API_V1_STR, tags=["Audit"])
+app.include_router(stats_route.router, prefix=settings.API_V1_STR, tags=["Stats"])
+app.include_router(profiling_route.router, prefix=settings.API_V1_STR, tags=["Profiling"])
 
 
 @app.get("/")
@@ -0,0 +1,24 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+
+class AuditLog(Base):
+    """
+    Append-only trail of admin actions, written in batches by the audit worker.
+    """
+    __tablename__ = "audit_logs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    actor_id = Column(UUID(as_uuid=True), nullable=True)
+    action = Column(String, nullable=False)
+    target_type = Column(String, nullable=False)
+    target_id = Column(String, nullable=True)
+    details = Column(JSON, nullable=True)
+
+
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+    )
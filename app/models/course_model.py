@@ -1,6 +1,6 @@
-import uuid
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Index, Integer, String, DDL, event, text
 from sqlalchemy.dialects.postgresql import UUID
+from app.core.ids import uuid7
 from app.db.base import Base
 from sqlalchemy.orm import relationship
 
@@ -9,12 +9,55 @@ from sqlalchemy.orm import relationship
 class Course(Base):
     __tablename__ = "courses"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     title = Column(String, nullable=False, index=True)
     code = Column(String, unique=True, nullable=False, index= True)
     capacity = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Bumped by every ORM update, which then also requires the old value to match
+    version = Column(Integer, nullable=False, server_default="1")
 
 
-    enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan")
-    students = relationship("User", secondary="enrollments", back_populates="courses")
+    # Enrollment rows go away through ON DELETE CASCADE, not by loading them
+    enrollments = relationship(
+        "Enrollment", back_populates="course", cascade="all, delete-orphan", passive_deletes=True
+    )
+    students = relationship("User", secondary="enrollments", back_populates="courses", passive_deletes=True)
+
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Active course listings read only these columns in code order; on
+        # PostgreSQL the INCLUDE list lets them run as index-only scans
+        Index(
+            "ix_courses_active_code", "code",
+            postgresql_include=["id", "title", "capacity", "is_active", "version"],
+            postgresql_where=text("is_active IS TRUE"),
+            sqlite_where=text("is_active IS 1")
+        ),
+    )
+
+
+
+# SQLite has no trigram index, so course search there is backed by an FTS5 table
+# kept in sync with triggers. On PostgreSQL the trigram indexes come from alembic.
+_sqlite_course_search_ddl = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5("
+    "title, code, content='courses', content_rowid='rowid', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN "
+    "INSERT INTO courses_fts(rowid, title, code) VALUES (new.rowid, new.title, new.code); END",
+    "CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN "
+    "INSERT INTO courses_fts(courses_fts, rowid, title, code) VALUES ('delete', old.rowid, old.title, old.code); END",
+    "CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE ON courses BEGIN "
+    "INSERT INTO courses_fts(courses_fts, rowid, title, code) VALUES ('delete', old.rowid, old.title, old.code); "
+    "INSERT INTO courses_fts(rowid, title, code) VALUES (new.rowid, new.title, new.code); END",
+]
+
+for _statement in _sqlite_course_search_ddl:
+    event.listen(Course.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Course.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS courses_fts").execute_if(dialect="sqlite")
+)
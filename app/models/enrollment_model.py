@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -7,13 +7,35 @@ from sqlalchemy.orm import relationship
 
 
 class Enrollment(Base):
+    # On PostgreSQL this table is range-partitioned by created_at, one partition
+    # per term, with a (id, created_at) primary key. See the partitioning migration.
     __tablename__ = "enrollments"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
     user = relationship("User", back_populates="enrollments")
-    course = relationship("Course", back_populates="enrollments")
\ No newline at end of file
+    course = relationship("Course", back_populates="enrollments")
+
+
+    __table_args__ = (
+        Index("ix_enrollments_course_id_created_at", "course_id", "created_at"),
+        Index("ix_enrollments_user_id", "user_id"),
+    )
+
+
+
+class EnrollmentArchive(Base):
+    """
+    Enrollments from completed terms, moved out of the live table in batches.
+    """
+    __tablename__ = "enrollments_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    course_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
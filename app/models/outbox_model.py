@@ -0,0 +1,41 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String, Text, text
+from app.db.base import Base
+
+
+
+class OutboxEvent(Base):
+    """
+    Event for downstream systems, written in the same transaction as the change
+    it describes and delivered later by the outbox dispatcher.
+
+    On PostgreSQL `txid` is the writing transaction's id. Ids come from a
+    sequence at INSERT but rows only show up at COMMIT, so id order alone
+    can skip a row that is still being committed; see OutboxDispatcher.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    event_type = Column(String, nullable=False)
+    aggregate_id = Column(String, nullable=True)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    # 0 on SQLite and for rows written before the column existed
+    txid = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Set while a dispatcher is sending the row; expires if it dies meanwhile
+    claimed_until = Column(DateTime(timezone=True), nullable=True)
+
+
+    __table_args__ = (
+        # The dispatcher only ever reads undelivered rows, in delivery order
+        Index(
+            "ix_outbox_events_pending", "txid", "id",
+            postgresql_where=text("dispatched_at IS NULL"),
+            sqlite_where=text("dispatched_at IS NULL")
+        ),
+        Index("ix_outbox_events_dispatched_at", "dispatched_at"),
+        # The hourly enrollment statistics are rolled up from recent events
+        Index("ix_outbox_events_created_at", "created_at"),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+
+class RefreshToken(Base):
+    """
+    Only an HMAC of the refresh token is stored; the token itself goes to the client.
+    Rows are deleted once expired, revoked ones included.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked = Column(Boolean, default=False, nullable=False)
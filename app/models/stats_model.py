@@ -0,0 +1,38 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+
+class CourseEnrollmentStats(Base):
+    """
+    Live enrollment count per course, kept up to date by EnrollmentStatsService
+    in the same transaction as the enrollment change.
+    """
+    __tablename__ = "course_enrollment_stats"
+
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    enrolled = Column(Integer, nullable=False, default=0)
+
+
+
+class StudentEnrollmentStats(Base):
+    """
+    Live enrollment count per student; a row exists only while it is above zero.
+    """
+    __tablename__ = "student_enrollment_stats"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    enrolled = Column(Integer, nullable=False, default=0)
+
+
+
+class EnrollmentHourlyStats(Base):
+    """
+    Enrollments and withdrawals per hour (UTC), for the registration rush chart.
+    """
+    __tablename__ = "enrollment_hourly_stats"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    enrolled = Column(Integer, nullable=False, default=0)
+    dropped = Column(Integer, nullable=False, default=0)
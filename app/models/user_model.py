@@ -1,6 +1,6 @@
-import uuid
-from sqlalchemy import Boolean, Column, String
+from sqlalchemy import Boolean, Column, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
+from app.core.ids import uuid7
 from app.db.base import Base
 from sqlalchemy.orm import relationship
 
@@ -14,16 +14,26 @@ class UserRole(str,Enum):
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name = Column(String, index = True, nullable= False)
-    email = Column(String, unique = True, index = True, nullable = False)
+    email = Column(String, nullable = False)
     hashed_pwd = Column(String, nullable = False)
     role = Column(String, default=UserRole.USER.value, nullable= False)
     is_active = Column(Boolean, default=True)
+    version = Column(Integer, nullable=False, server_default="1")
 
 
-    enrollments = relationship("Enrollment", back_populates="user", cascade="all, delete-orphan")
-    courses = relationship("Course", secondary="enrollments", back_populates="students")
+    enrollments = relationship(
+        "Enrollment", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
+    courses = relationship("Course", secondary="enrollments", back_populates="students", passive_deletes=True)
+
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Emails are matched case-insensitively; look them up with lower(email)
+        Index("ux_users_email_lower", func.lower(email), unique=True),
+    )
 
 
    
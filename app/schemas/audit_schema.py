@@ -0,0 +1,24 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from uuid import UUID
+
+
+
+class AuditLogResponse(BaseModel):
+    id: int
+    created_at: datetime
+    actor_id: Optional[UUID] = None
+    action: str
+    target_type: str
+    target_id: Optional[str] = None
+    details: Optional[Any] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogResponse]
+    next_before: Optional[datetime] = None
+    next_before_id: Optional[int] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from uuid import UUID
+from typing import List
+
+
+class BulkStatusResult(BaseModel):
+    changed: int
+    unchanged: int
+    not_found: int
+    # Existing ids left alone by the selection's filter (e.g. another role)
+    skipped: List[UUID] = []
+    changed_ids: List[UUID]
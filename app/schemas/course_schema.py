@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 
 class Course(BaseModel):
@@ -22,13 +22,26 @@ class CourseUpdate(BaseModel):
     code: Optional[str] = None
     capacity: Optional[int] = Field(None, gt=0, le=300)
 
+class CourseBulkStatusRequest(BaseModel):
+    # Either a list of ids, a code prefix, or both
+    ids: Optional[List[UUID]] = Field(None, max_length=20000)
+    code_prefix: Optional[str] = Field(None, min_length=1)
+
+
 class CourseResponse(BaseModel):
     id: UUID
     title: str
     code: str
     capacity: int
     is_active: bool = True
+    version: int = 1
 
     class Config:
         from_attributes = True
 
+
+class CourseSearchResponse(BaseModel):
+    items: List[CourseResponse]
+    page: int
+    size: int
+    has_more: bool
@@ -25,4 +25,12 @@ class EnrollmentResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+
+class AdmissionTicketResponse(BaseModel):
+    token: str
+    status: str
+    position: int
+    retry_after: int
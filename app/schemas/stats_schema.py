@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import List
+
+
+class CourseFillRate(BaseModel):
+    course_id: UUID
+    code: str
+    title: str
+    capacity: int
+    enrolled: int
+    fill_rate: float
+
+
+class HourlyEnrollments(BaseModel):
+    hour: datetime
+    enrolled: int
+    dropped: int
+
+
+class EnrollmentStatistics(BaseModel):
+    total_enrollments: int
+    total_enrolled_students: int
+    courses: List[CourseFillRate]
+    hourly: List[HourlyEnrollments]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Literal
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional, Literal
 from uuid import UUID
 
 class User(BaseModel):
@@ -22,6 +22,12 @@ class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     
 
+class UserBulkStatusRequest(BaseModel):
+    # Either a list of ids, a filter, or both
+    ids: Optional[List[UUID]] = Field(None, max_length=20000)
+    role: Optional[Literal["student", "admin"]] = None
+
+
 class UserResponse(BaseModel):
     id: UUID
     name: str
@@ -30,4 +36,20 @@ class UserResponse(BaseModel):
     is_active: bool
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserImportRow(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: Literal["created", "duplicate", "invalid", "failed"]
+    detail: Optional[str] = None
+    user_id: Optional[UUID] = None
+
+
+class UserImportResult(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    failed: int = 0
+    rows: List[UserImportRow]
@@ -0,0 +1,116 @@
+"""
+Production launcher.
+
+    python -m app.server
+    python -m app.server --workers 4 --port 8080
+
+Runs uvicorn on uvloop + httptools when they are installed. One worker by
+default: enrollment queue tickets, course deletion job status and the live
+seat streams are kept in process memory, so with several workers a follow-up
+request that lands on another worker does not find them. `--workers 0` sizes
+from the CPUs instead, capped so that every worker's full connection pool
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) fits into DB_MAX_CONNECTIONS. On SIGTERM each
+worker stops accepting connections, finishes in-flight requests for up to
+SERVER_GRACEFUL_TIMEOUT seconds and runs the lifespan shutdown (audit flush).
+"""
+import argparse
+import importlib.util
+import logging
+import os
+from typing import Optional
+import uvicorn
+from app.core.config import settings
+
+
+logger = logging.getLogger("app.server")
+
+# Request state that lives in one worker's memory only
+PER_PROCESS_STATE = ("enrollment queue tickets", "course deletion job status", "live seat streams")
+
+
+
+def worker_count(
+    cpus: Optional[int] = None,
+    db_max_connections: Optional[int] = None,
+    connections_per_worker: Optional[int] = None,
+    requested: int = 0
+) -> int:
+    """
+    Workers to run: `requested` if set, else one per CPU, never more than the
+    database connection budget allows.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    db_max_connections = db_max_connections or settings.DB_MAX_CONNECTIONS
+    connections_per_worker = connections_per_worker or (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+    budget = max(1, db_max_connections // max(1, connections_per_worker))
+    workers = requested or cpus
+    if workers > budget:
+        logger.warning(
+            "Capping workers at %d: %d workers x %d connections exceed DB_MAX_CONNECTIONS=%d",
+            budget, workers, connections_per_worker, db_max_connections
+        )
+    return max(1, min(workers, budget))
+
+
+def event_loop() -> str:
+    # uvloop has no Windows build
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def preload() -> None:
+    """
+    Import the app once in the supervisor so a bad configuration fails here,
+    not in every worker. Workers are spawned, not forked, so they import it
+    again; nothing opened here is shared, and the engine is disposed anyway.
+    """
+    from app.main import app  # noqa: F401
+    from app.db.session import engine
+
+    engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API in production")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.WEB_CONCURRENCY,
+        help="0 sizes from CPUs and the DB budget (default 1, see the module docstring)"
+    )
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    preload()
+    workers = worker_count(requested=args.workers)
+    if workers > 1:
+        logger.warning(
+            "Running %d workers: %s are per worker and follow-up requests may miss them",
+            workers, ", ".join(PER_PROCESS_STATE)
+        )
+    loop, http = event_loop(), http_protocol()
+    logger.info("Starting %d worker(s) on %s:%d with %s/%s", workers, args.host, args.port, loop, http)
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        access_log=not args.no_access_log
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,216 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit_model import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+
+
+class AuditLogger:
+    """
+    Collects audit events in memory and writes them in batches on a worker thread.
+
+    record() only puts a dict on a bounded queue, so the request path never waits
+    on the database. A batch is written when it reaches `batch_size` events or
+    `flush_interval` seconds after its first event. When the queue is full,
+    record() blocks for up to `enqueue_timeout` seconds and then drops the event.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+        enqueue_timeout: float
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+        self._written_total = 0
+        self._batches_total = 0
+        self._dropped_total = 0
+        self._failed_total = 0
+
+
+    def record(
+        self,
+        action: str,
+        target_type: str,
+        target_id: Any = None,
+        actor_id: Optional[UUID] = None,
+        details: Optional[dict] = None
+    ) -> bool:
+        event = {
+            "created_at": datetime.now(timezone.utc),
+            "actor_id": actor_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": str(target_id) if target_id is not None else None,
+            "details": details
+        }
+
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            self._dropped_total += 1
+            logger.warning("Audit queue full, dropped %s event", action)
+            return False
+
+
+    def start(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._worker.start()
+
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        # Write whatever arrived after the worker's last batch
+        self.flush()
+
+
+    def flush(self) -> int:
+        """
+        Synchronously write every queued event. Returns the number written.
+        """
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+
+
+    def _write(self, batch: List[Dict[str, Any]]) -> int:
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                db.execute(insert(AuditLog), batch)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._failed_total += len(batch)
+                logger.exception("Failed to write %d audit events", len(batch))
+                return 0
+            finally:
+                db.close()
+
+            self._written_total += len(batch)
+            self._batches_total += 1
+            return len(batch)
+
+
+    def metrics(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written_total": self._written_total,
+            "batches_total": self._batches_total,
+            "dropped_total": self._dropped_total,
+            "failed_total": self._failed_total
+        }
+
+
+
+class AuditService:
+
+    @staticmethod
+    def get_audit_logs(
+        db: Session,
+        before: Optional[datetime] = None,
+        before_id: Optional[int] = None,
+        limit: int = 50,
+        action: Optional[str] = None
+    ) -> dict:
+        """
+        Newest-first page of audit events, keyed on (created_at, id).
+        """
+        query = db.query(AuditLog)
+
+        if action:
+            query = query.filter(AuditLog.action == action)
+
+        if before is not None:
+            if before_id is not None:
+                query = query.filter(
+                    or_(
+                        AuditLog.created_at < before,
+                        and_(AuditLog.created_at == before, AuditLog.id < before_id)
+                    )
+                )
+            else:
+                query = query.filter(AuditLog.created_at < before)
+
+        items = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit).all()
+
+        last = items[-1] if len(items) == limit else None
+        return {
+            "items": items,
+            "next_before": last.created_at if last else None,
+            "next_before_id": last.id if last else None
+        }
+
+
+
+audit_logger = AuditLogger(
+    session_factory=SessionLocal,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    max_queue=settings.AUDIT_MAX_QUEUE,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT
+)
+
+audit_service = AuditService()
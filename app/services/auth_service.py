@@ -1,12 +1,20 @@
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
 from uuid import UUID
 from fastapi import HTTPException, status
 from app.models.user_model import User
-from app.schemas.user_schema import UserCreate
-from app.core.security import get_pwd_hash, verify_pwd, create_access_token
+from app.models.refresh_token_model import RefreshToken
+from app.schemas.user_schema import UserCreate, UserBulkStatusRequest
+from app.db.bulk import in_values, set_active_flag
+from app.core.security import (
+    get_pwd_hash, verify_and_update_pwd, create_access_token,
+    create_refresh_token, hash_refresh_token
+)
 from fastapi.security import  OAuth2PasswordRequestForm
 from app.core.config import settings
-from datetime import timedelta
+from app.services.audit_service import audit_logger
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 
 
@@ -19,7 +27,7 @@ class AuthService:
         """
 
         # Firstly check if email already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = db.query(User).filter(func.lower(User.email) == user_data.email.lower()).first()
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -52,10 +60,17 @@ class AuthService:
         """
 
         # Find user by email (username field contains email)
-        user = db.query(User).filter(User.email == form_data.username).first()
+        user = db.query(User).filter(func.lower(User.email) == form_data.username.lower()).first()
 
         #  Validate credentials
-        if not user or not verify_pwd(form_data.password, user.hashed_pwd):
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid credential"
+            )
+
+        valid, new_hash = verify_and_update_pwd(form_data.password, user.hashed_pwd)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credential"
@@ -68,7 +83,19 @@ class AuthService:
                 detail="Inactive user"
             )
 
-        # Create access token
+        # Hash made with an old scheme or cost, store the upgraded one.
+        # It is committed together with the new refresh token
+        if new_hash:
+            user.hashed_pwd = new_hash
+
+        return AuthService._issue_tokens(db, user)
+
+
+    @staticmethod
+    def _issue_tokens(db: Session, user: User) -> dict:
+        """
+        Create an access token and store a new refresh token for the user.
+        """
         access_token_expires = timedelta(minutes=settings.TOKEN_EXPIRES)
 
         access_token = create_access_token(
@@ -79,10 +106,123 @@ class AuthService:
             expires_delta=access_token_expires
         )
 
+        # Drop the user's expired tokens while we are at it; revoked ones are
+        # kept until they expire so a replayed one is still recognised
+        db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.user_id == user.id, RefreshToken.expires_at < datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+
+        refresh_token, token_hash = create_refresh_token()
+        db.add(RefreshToken(
+            user_id=user.id,
+            token_hash=token_hash,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRES_DAYS),
+            revoked=False
+        ))
+        db.commit()
+
         return {
             "access_token": access_token,
-            "token_type": "Bearer"
+            "token_type": "Bearer",
+            "refresh_token": refresh_token
         }
+
+
+    @staticmethod
+    def refresh_access_token(db: Session, refresh_token: str) -> dict:
+        """
+        Exchange a refresh token for a new token pair, without a password check.
+        The presented refresh token is revoked (rotation).
+        """
+        invalid = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+
+        row = db.query(RefreshToken, User).join(User, RefreshToken.user_id == User.id).filter(
+            RefreshToken.token_hash == hash_refresh_token(refresh_token)
+        ).first()
+        if not row:
+            raise invalid
+
+        stored, user = row
+
+        # A revoked token coming back means it leaked; end every session of the user
+        if stored.revoked:
+            db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.user_id == user.id, RefreshToken.revoked.is_(False))
+                .values(revoked=True)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            raise invalid
+
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Inactive user"
+            )
+
+        # Conditional revoke so two concurrent refreshes cannot both succeed
+        rotated = db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.id == stored.id,
+                RefreshToken.revoked.is_(False),
+                RefreshToken.expires_at > datetime.now(timezone.utc)
+            )
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+        if rotated.rowcount != 1:
+            db.rollback()
+            raise invalid
+
+        return AuthService._issue_tokens(db, user)
+
+
+    @staticmethod
+    def revoke_refresh_token(db: Session, refresh_token: str) -> dict:
+        """
+        Revoke a refresh token (logout).
+        """
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        return {"message": "Refresh token revoked"}
+
+
+    @staticmethod
+    def prune_refresh_tokens(db: Session, batch_size: int = 5000) -> int:
+        """
+        Delete expired refresh tokens of every user, `batch_size` per commit.
+        Covers users who never sign in again. Returns the number deleted.
+        """
+        deleted = 0
+        while True:
+            ids = db.execute(
+                select(RefreshToken.id)
+                .where(RefreshToken.expires_at < datetime.now(timezone.utc))
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return deleted
+
+            db.execute(
+                delete(RefreshToken)
+                .where(in_values(db, RefreshToken.id, ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += len(ids)
     
     
 
@@ -122,6 +262,7 @@ class AuthService:
         # Deactivate user
         user.is_active = False
         db.commit()
+        audit_logger.record("user.deactivated", "user", user.id, actor_id=current_admin.id)
 
         return {
             "message": "User deactivated successfully",
@@ -132,7 +273,7 @@ class AuthService:
 
 
     @staticmethod
-    def activate_user(db: Session, user_id: UUID) -> dict:
+    def activate_user(db: Session, user_id: UUID, current_admin: Optional[User] = None) -> dict:
         """
         Activate a user account (Admin only).
         """
@@ -156,11 +297,70 @@ class AuthService:
         # Activate user
         user.is_active = True
         db.commit()
+        audit_logger.record(
+            "user.activated", "user", user.id,
+            actor_id=current_admin.id if current_admin else None
+        )
 
         return {
             "message": "User activated successfully",
             "user_id": user.id
         }
+
+
+    @staticmethod
+    def bulk_deactivate_users(db: Session, selection: UserBulkStatusRequest, current_admin: User) -> dict:
+        """
+        Deactivate every selected user in one statement (Admin only).
+        An admin's own id is rejected; a role filter simply skips them.
+        """
+        if selection.ids and current_admin.id in selection.ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admins cannot deactivate themselves"
+            )
+
+        return AuthService._bulk_set_active(
+            db, selection, False, current_admin, extra_criteria=[User.id != current_admin.id]
+        )
+
+
+    @staticmethod
+    def bulk_activate_users(db: Session, selection: UserBulkStatusRequest, current_admin: Optional[User] = None) -> dict:
+        """
+        Activate every selected user in one statement (Admin only).
+        """
+        return AuthService._bulk_set_active(db, selection, True, current_admin)
+
+
+    @staticmethod
+    def _bulk_set_active(
+        db: Session,
+        selection: UserBulkStatusRequest,
+        is_active: bool,
+        current_admin: Optional[User],
+        extra_criteria: Optional[list] = None
+    ) -> dict:
+        if selection.ids is None and selection.role is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Select users by ids or role"
+            )
+
+        criteria = list(extra_criteria or [])
+        if selection.role is not None:
+            criteria.append(User.role == selection.role)
+
+        result = set_active_flag(db, User, is_active, criteria, ids=selection.ids)
+        db.commit()
+
+        audit_logger.record(
+            "user.activated_bulk" if is_active else "user.deactivated_bulk", "user",
+            actor_id=current_admin.id if current_admin else None,
+            details={"changed": result["changed"], "role": selection.role}
+        )
+
+        return result
     
 
 auth_route = AuthService()  
\ No newline at end of file
@@ -0,0 +1,186 @@
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.course_model import Course
+
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    id: UUID
+    title: str
+    code: str
+    capacity: int
+    is_active: bool
+    version: int
+
+    @classmethod
+    def from_course(cls, course: Course) -> "CatalogEntry":
+        return cls(
+            id=course.id,
+            title=course.title,
+            code=course.code,
+            capacity=course.capacity,
+            is_active=bool(course.is_active),
+            version=course.version
+        )
+
+
+
+# Plain column tuples: no ORM objects, so nothing lands in the session's identity map
+_ENTRY_COLUMNS = (Course.id, Course.title, Course.code, Course.capacity, Course.is_active, Course.version)
+
+
+
+def active_course_rows(db: Session) -> list:
+    """
+    Active courses in code order, reading only the columns covered by
+    ix_courses_active_code so PostgreSQL can answer from the index alone.
+    """
+    return (
+        db.query(*_ENTRY_COLUMNS)
+        .filter(Course.is_active.is_(True))
+        .order_by(Course.code)
+        .all()
+    )
+
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    loaded_at: float
+    by_id: Mapping[UUID, CatalogEntry]
+    by_code: Mapping[str, CatalogEntry]
+    active: Tuple[CatalogEntry, ...]
+
+
+
+class CourseCatalog:
+    """
+    In-process, read-only view of the active courses.
+
+    Readers grab the current snapshot without locking; a refresh builds a new
+    snapshot and swaps the reference. Every course mutation bumps the catalog
+    version, which makes the next reader reload. The TTL bounds staleness for
+    changes made by other processes.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._derived: Dict[str, Tuple[CatalogSnapshot, Any]] = {}
+
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+
+    def bump_version(self) -> int:
+        """
+        Mark the current snapshot as outdated. Call after the mutation commits.
+        """
+        with self._version_lock:
+            self._version += 1
+            return self._version
+
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self._version
+            and time.monotonic() - snapshot.loaded_at < self.ttl_seconds
+        )
+
+
+    def _load(self, db: Session, version: int) -> CatalogSnapshot:
+        # Active courses only, through the covering index; get() finds the
+        # inactive ones in the database
+        entries = tuple(self._load_entry(row) for row in active_course_rows(db))
+
+        return CatalogSnapshot(
+            version=version,
+            loaded_at=time.monotonic(),
+            by_id=MappingProxyType({entry.id: entry for entry in entries}),
+            by_code=MappingProxyType({entry.code: entry for entry in entries}),
+            active=entries
+        )
+
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            # Read the version before loading so a mutation committed during
+            # the load leaves this snapshot outdated instead of hiding it
+            snapshot = self._load(db, self._version)
+            self._snapshot = snapshot
+            return snapshot
+
+
+    def get(self, db: Session, course_id: UUID) -> Optional[CatalogEntry]:
+        """
+        Look up a course by id, falling back to the database on a miss so rows
+        written outside CourseService are still found. A miss leaves the
+        snapshot alone; the TTL brings such rows in.
+        """
+        if self.ttl_seconds > 0:
+            entry = self.snapshot(db).by_id.get(course_id)
+            if entry is not None:
+                return entry
+
+        row = db.query(*_ENTRY_COLUMNS).filter(Course.id == course_id).first()
+        return self._load_entry(row) if row else None
+
+
+    def active_courses(self, db: Session) -> Tuple[CatalogEntry, ...]:
+        if self.ttl_seconds > 0:
+            return self.snapshot(db).active
+
+        return tuple(self._load_entry(row) for row in active_course_rows(db))
+
+
+    def derived(self, db: Session, key: str, build: Callable[[CatalogSnapshot], T]) -> T:
+        """
+        Value computed from the current snapshot, e.g. a serialized response,
+        built once per snapshot and reused until the next refresh. With the
+        catalog disabled it is built from a fresh snapshot every time.
+        """
+        if self.ttl_seconds <= 0:
+            return build(self._load(db, self._version))
+
+        snapshot = self.snapshot(db)
+        cached = self._derived.get(key)
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+
+        value = build(snapshot)
+        self._derived[key] = (snapshot, value)
+        return value
+
+
+    @staticmethod
+    def _load_entry(row) -> CatalogEntry:
+        return CatalogEntry.from_course(row)
+
+
+
+course_catalog = CourseCatalog(ttl_seconds=settings.CATALOG_CACHE_TTL)
@@ -0,0 +1,190 @@
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Optional
+from uuid import UUID
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.bulk import in_values
+from app.db.session import SessionLocal
+from app.models.course_model import Course
+from app.models.enrollment_model import Enrollment
+from app.services.catalog_service import course_catalog
+from app.services.outbox_service import record_enrollments_removed
+from app.services.seat_feed_service import seat_feed
+from app.services.audit_service import audit_logger
+from app.services.stats_service import enrollment_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+
+class JobStatus(str, Enum):
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+
+@dataclass
+class CourseDeletionJob:
+    id: str
+    course_id: UUID
+    code: str
+    total: int
+    actor_id: Optional[UUID]
+    status: JobStatus = JobStatus.RUNNING
+    deleted: int = 0
+    error: Optional[str] = None
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+
+
+
+class CourseDeletionJobs:
+    """
+    Deletes large courses on a worker thread.
+
+    The course is deactivated first so nobody can enroll while its enrollments
+    are removed `batch_size` rows per transaction; the course row itself goes
+    last. Job state lives in memory and can be polled through describe()
+    until `retention` seconds after the job finished.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int, retention: float):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.retention = retention
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, CourseDeletionJob] = {}
+        self._by_course: Dict[UUID, CourseDeletionJob] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+
+
+    def submit(self, course_id: UUID, code: str, total: int, actor_id: Optional[UUID] = None) -> CourseDeletionJob:
+        """
+        Start deleting a course in the background, or return the job that
+        is already doing so.
+        """
+        with self._lock:
+            self._prune()
+            running = self._by_course.get(course_id)
+            if running is not None and running.status == JobStatus.RUNNING:
+                return running
+
+            job = CourseDeletionJob(
+                id=secrets.token_urlsafe(12),
+                course_id=course_id,
+                code=code,
+                total=total,
+                actor_id=actor_id,
+                started_at=time.time()
+            )
+            self._jobs[job.id] = job
+            self._by_course[course_id] = job
+
+            thread = threading.Thread(target=self.run, args=(job,), name=f"course-delete-{job.id}", daemon=True)
+            self._threads[job.id] = thread
+
+        thread.start()
+        return job
+
+
+    def run(self, job: CourseDeletionJob) -> None:
+        db = self.session_factory()
+        try:
+            while True:
+                ids = db.execute(
+                    select(Enrollment.id).where(Enrollment.course_id == job.course_id).limit(self.batch_size)
+                ).scalars().all()
+                if not ids:
+                    break
+
+                batch = (in_values(db, Enrollment.id, ids), Enrollment.course_id == job.course_id)
+                enrollment_stats.record_removed(db, *batch)
+                record_enrollments_removed(db, *batch, reason="course.deleted", removed_by=job.actor_id)
+                result = db.execute(delete(Enrollment).where(*batch).execution_options(synchronize_session=False))
+                db.commit()
+                job.deleted += result.rowcount
+                if len(ids) < self.batch_size:
+                    break
+
+            # Anything left, e.g. rows added concurrently, goes with the FK cascade
+            enrollment_stats.record_removed(db, Enrollment.course_id == job.course_id)
+            record_enrollments_removed(
+                db, Enrollment.course_id == job.course_id, reason="course.deleted", removed_by=job.actor_id
+            )
+            db.execute(
+                delete(Course)
+                .where(Course.id == job.course_id)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = str(exc)
+            logger.exception("Deleting course %s failed", job.course_id)
+        else:
+            job.status = JobStatus.DONE
+            course_catalog.bump_version()
+            seat_feed.publish(job.course_id)
+            audit_logger.record(
+                "course.deleted", "course", job.course_id,
+                actor_id=job.actor_id,
+                details={"code": job.code, "enrollments": job.deleted}
+            )
+        finally:
+            job.finished_at = time.time()
+            db.close()
+
+
+    def _prune(self) -> None:
+        """
+        Forget jobs that finished more than `retention` seconds ago. Call with the lock held.
+        """
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is None or job.finished_at > cutoff:
+                continue
+            del self._jobs[job_id]
+            self._threads.pop(job_id, None)
+            if self._by_course.get(job.course_id) is job:
+                del self._by_course[job.course_id]
+
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> None:
+        thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+
+
+    def describe(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        return {
+            "job_id": job.id,
+            "course_id": job.course_id,
+            "status": job.status.value,
+            "deleted_enrollments": job.deleted,
+            "total_enrollments": job.total,
+            "error": job.error
+        }
+
+
+
+course_deletions = CourseDeletionJobs(
+    session_factory=SessionLocal,
+    batch_size=settings.COURSE_DELETE_BATCH_SIZE,
+    retention=settings.COURSE_DELETE_JOB_RETENTION
+)
@@ -1,16 +1,49 @@
+import re
+from bisect import bisect_right
+from operator import attrgetter
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from uuid import UUID
 from fastapi import HTTPException, status
-from typing import List
+from pydantic import TypeAdapter
+from typing import List, Optional, Set, Tuple
+from app.core.config import settings
 from app.models.course_model import Course 
-from app.schemas.course_schema import CourseCreate, CourseUpdate
+from app.models.enrollment_model import Enrollment
+from app.models.user_model import User
+from app.schemas.course_schema import CourseCreate, CourseUpdate, CourseBulkStatusRequest, CourseResponse
+from app.core.compression import EncodedPayload, encode_payload
+from app.core.etag import version_etag
+from app.core.single_flight import SingleFlight
+from app.db.bulk import set_active_flag
+from app.services.catalog_service import CatalogEntry, course_catalog
+from app.services.audit_service import audit_logger
+from app.services.course_deletion_service import course_deletions
+from app.services.outbox_service import record_enrollments_removed
+from app.services.stats_service import enrollment_stats
+from app.services.seat_feed_service import seat_feed
+
+
+_course_list = TypeAdapter(List[CourseResponse])
+
+# Keys carry the catalog version, so a read that starts after a committed
+# change never joins a call that began before it
+course_reads = SingleFlight(
+    max_waiters=settings.SINGLE_FLIGHT_MAX_WAITERS,
+    max_keys=settings.SINGLE_FLIGHT_MAX_KEYS,
+    timeout=settings.SINGLE_FLIGHT_TIMEOUT
+)
 
 
 class CourseService:
 
     @staticmethod
-    def get_course_by_id(db: Session, course_id: UUID):
-        course = db.query(Course).filter(Course.id == course_id).first()
+    def get_course_by_id(db: Session, course_id: UUID) -> CatalogEntry:
+        course = course_reads.do(
+            ("course", course_id, course_catalog.version),
+            lambda: course_catalog.get(db, course_id)
+        )
 
         if not course:
             raise HTTPException(
@@ -22,13 +55,139 @@ class CourseService:
     
 
     @staticmethod
-    def get_all_courses(db: Session) -> List[Course]:
-        return db.query(Course).filter(Course.is_active.is_(True)).all()
+    def get_all_courses(db: Session) -> List[CatalogEntry]:
+        return list(course_reads.do(
+            ("active", course_catalog.version),
+            lambda: course_catalog.active_courses(db)
+        ))
+
+
+    @staticmethod
+    def get_all_courses_payload(db: Session) -> EncodedPayload:
+        """
+        The active course list as JSON, already compressed. Serialized and
+        compressed once per catalog snapshot rather than once per request.
+        """
+        return course_reads.do(
+            ("active_payload", course_catalog.version),
+            lambda: course_catalog.derived(
+                db,
+                "active_courses_payload",
+                lambda snapshot: encode_payload(
+                    _course_list.dump_json(_course_list.validate_python(snapshot.active, from_attributes=True))
+                )
+            )
+        )
+    
+
+    @staticmethod
+    def get_courses_page(db: Session, after: Optional[UUID], limit: int) -> Tuple[List[CatalogEntry], Optional[UUID]]:
+        """
+        Active courses in id order, which is creation order for uuid7 ids,
+        starting after the course `after`. Returns the page and the cursor of
+        the next one, None on the last page.
+        """
+        if course_catalog.ttl_seconds > 0:
+            by_id = course_reads.do(
+                ("active_by_id", course_catalog.version),
+                lambda: course_catalog.derived(
+                    db, "active_by_id", lambda snapshot: sorted(snapshot.active, key=attrgetter("id"))
+                )
+            )
+            start = bisect_right(by_id, after, key=attrgetter("id")) if after else 0
+            rows = by_id[start:start + limit + 1]
+        else:
+            query = db.query(Course).filter(Course.is_active.is_(True))
+            if after:
+                query = query.filter(Course.id > after)
+            rows = [
+                CatalogEntry.from_course(course)
+                for course in query.order_by(Course.id).limit(limit + 1)
+            ]
+
+        page = rows[:limit]
+        return page, page[-1].id if len(rows) > limit else None
+
+
+    @staticmethod
+    def search_courses(db: Session, query: str, page: int = 1, size: int = 20) -> dict:
+        """
+        Ranked search over active course titles and codes.
+        Uses the trigram indexes on PostgreSQL and the FTS5 table on SQLite.
+        Identical concurrent searches run once. A blank query is rejected,
+        it would match every course.
+        """
+        term = query.strip()
+        if not term:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Search query must not be blank"
+            )
+
+        result = course_reads.do(
+            ("search", term, page, size, course_catalog.version),
+            lambda: CourseService._search(db, term, page, size)
+        )
+        return dict(result)
+
+
+    @staticmethod
+    def _search(db: Session, term: str, page: int, size: int) -> dict:
+        courses_query = db.query(Course).filter(Course.is_active.is_(True))
+        dialect = db.get_bind().dialect.name
+
+        if dialect == "postgresql":
+            pattern = "%" + re.sub(r"([!%_])", r"!\1", term) + "%"
+            rank = func.greatest(
+                func.similarity(Course.title, term),
+                func.similarity(Course.code, term)
+            )
+            courses_query = courses_query.filter(
+                or_(
+                    Course.title.ilike(pattern, escape="!"),
+                    Course.code.ilike(pattern, escape="!"),
+                    Course.title.op("%")(term),
+                    Course.code.op("%")(term)
+                )
+            ).order_by(rank.desc(), Course.code)
+
+        elif dialect == "sqlite":
+            # Every word must match as a prefix, code matches weigh double
+            tokens = re.findall(r"\w+", term)
+            if not tokens:
+                return {"items": [], "page": page, "size": size, "has_more": False}
+
+            match = " ".join(f'"{token}"*' for token in tokens)
+            ranked = text(
+                "SELECT rowid AS course_rowid, bm25(courses_fts, 1.0, 2.0) AS rank "
+                "FROM courses_fts WHERE courses_fts MATCH :match"
+            ).bindparams(match=match).columns(course_rowid=Integer, rank=Float).subquery()
+
+            courses_query = courses_query.join(
+                ranked, ranked.c.course_rowid == literal_column("courses.rowid")
+            ).order_by(ranked.c.rank, Course.code)
+
+        else:
+            pattern = f"%{term}%"
+            courses_query = courses_query.filter(
+                or_(Course.title.ilike(pattern), Course.code.ilike(pattern))
+            ).order_by(Course.code)
+
+        # Fetch one extra row to know whether another page exists without a COUNT
+        rows = courses_query.offset((page - 1) * size).limit(size + 1).all()
+
+        return {
+            # Plain values, the result may be shared with other sessions
+            "items": [CatalogEntry.from_course(course) for course in rows[:size]],
+            "page": page,
+            "size": size,
+            "has_more": len(rows) > size
+        }
     
 
 
     @staticmethod
-    def create_course(db: Session, course: CourseCreate) -> Course:
+    def create_course(db: Session, course: CourseCreate, current_admin: Optional[User] = None) -> Course:
         # Check for duplicate course code
         existing = db.query(Course).filter(Course.code == course.code).first()
         if existing:
@@ -45,7 +204,13 @@ class CourseService:
 
         db.add(new_course)
         db.commit()
+        course_catalog.bump_version()
         db.refresh(new_course)
+        audit_logger.record(
+            "course.created", "course", new_course.id,
+            actor_id=current_admin.id if current_admin else None,
+            details={"code": new_course.code}
+        )
 
         return new_course
     
@@ -54,9 +219,14 @@ class CourseService:
     def update_course(
         db: Session,
         course_id: UUID,
-        course_data: CourseUpdate
+        course_data: CourseUpdate,
+        current_admin: Optional[User] = None,
+        expected_versions: Optional[Set[int]] = None
     ) -> Course:
-
+        """
+        Apply a partial update. With `expected_versions` (from If-Match) the
+        update only goes through if the course is still at one of them.
+        """
         db_course = db.query(Course).filter(Course.id == course_id).first()
 
         if not db_course:
@@ -65,6 +235,13 @@ class CourseService:
                 detail="Course not found"
             )
 
+        if expected_versions is not None and db_course.version not in expected_versions:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Course was modified by someone else, reload it and retry",
+                headers={"ETag": version_etag(db_course.version)}
+            )
+
         # If code is being updated, check for duplicates
         if course_data.code and course_data.code != db_course.code:
             existing = db.query(Course).filter(
@@ -83,14 +260,30 @@ class CourseService:
         for key, value in update_data.items():
             setattr(db_course, key, value)
 
-        db.commit()
+        # The UPDATE carries "WHERE version = <version we read>", so a write
+        # that landed since our read makes it match no row
+        try:
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Course was modified by someone else, reload it and retry"
+            )
+        course_catalog.bump_version()
+        seat_feed.publish(course_id)
         db.refresh(db_course)
+        audit_logger.record(
+            "course.updated", "course", db_course.id,
+            actor_id=current_admin.id if current_admin else None,
+            details={"fields": sorted(update_data)}
+        )
 
         return db_course
     
 
     @staticmethod
-    def deactivate_course(db: Session, course_id: UUID) -> dict:
+    def deactivate_course(db: Session, course_id: UUID, current_admin: Optional[User] = None) -> dict:
         course = db.query(Course).filter(Course.id == course_id).first()
 
         if not course:
@@ -107,6 +300,12 @@ class CourseService:
 
         course.is_active = False
         db.commit()
+        course_catalog.bump_version()
+        seat_feed.publish(course.id)
+        audit_logger.record(
+            "course.deactivated", "course", course.id,
+            actor_id=current_admin.id if current_admin else None
+        )
 
         return {
             "message": "Course deactivated successfully",
@@ -115,7 +314,7 @@ class CourseService:
     
 
     @staticmethod
-    def activate_course(db: Session, course_id: UUID) -> dict:
+    def activate_course(db: Session, course_id: UUID, current_admin: Optional[User] = None) -> dict:
         course = db.query(Course).filter(Course.id == course_id).first()
 
         if not course:
@@ -132,6 +331,12 @@ class CourseService:
 
         course.is_active = True
         db.commit()
+        course_catalog.bump_version()
+        seat_feed.publish(course.id)
+        audit_logger.record(
+            "course.activated", "course", course.id,
+            actor_id=current_admin.id if current_admin else None
+        )
 
         return {
             "message": "Course activated successfully",
@@ -140,7 +345,43 @@ class CourseService:
     
 
     @staticmethod
-    def delete_course(db: Session, course_id: UUID) -> dict:
+    def bulk_set_active(
+        db: Session,
+        selection: CourseBulkStatusRequest,
+        is_active: bool,
+        current_admin: Optional[User] = None
+    ) -> dict:
+        """
+        Activate or deactivate every selected course in one statement.
+        """
+        if selection.ids is None and selection.code_prefix is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Select courses by ids or code_prefix"
+            )
+
+        criteria = []
+        if selection.code_prefix is not None:
+            criteria.append(Course.code.startswith(selection.code_prefix, autoescape=True))
+
+        result = set_active_flag(db, Course, is_active, criteria, ids=selection.ids)
+        db.commit()
+
+        if result["changed"]:
+            course_catalog.bump_version()
+        for course_id in result["changed_ids"]:
+            seat_feed.publish(course_id)
+        audit_logger.record(
+            "course.activated_bulk" if is_active else "course.deactivated_bulk", "course",
+            actor_id=current_admin.id if current_admin else None,
+            details={"changed": result["changed"], "code_prefix": selection.code_prefix}
+        )
+
+        return result
+    
+
+    @staticmethod
+    def delete_course(db: Session, course_id: UUID, current_admin: Optional[User] = None) -> dict:
         db_course = db.query(Course).filter(Course.id == course_id).first()
 
         if not db_course:
@@ -149,8 +390,34 @@ class CourseService:
                 detail="Course not found!"
             )
 
+        code = db_course.code
+        actor_id = current_admin.id if current_admin else None
+        enrollments = db.query(func.count(Enrollment.id)).filter(Enrollment.course_id == course_id).scalar()
+
+        # Big courses are closed now and emptied in chunks by a background job
+        if enrollments >= settings.COURSE_DELETE_SYNC_LIMIT:
+            db_course.is_active = False
+            db.commit()
+            course_catalog.bump_version()
+            seat_feed.publish(course_id)
+            job = course_deletions.submit(course_id, code, enrollments, actor_id=actor_id)
+            return {
+                "message": "Course deletion started",
+                **course_deletions.describe(job.id)
+            }
+
+        # Enrollments are removed by the database through ON DELETE CASCADE
+        enrollment_stats.record_removed(db, Enrollment.course_id == course_id)
+        record_enrollments_removed(db, Enrollment.course_id == course_id, reason="course.deleted", removed_by=actor_id)
         db.delete(db_course)
         db.commit()
+        course_catalog.bump_version()
+        seat_feed.publish(course_id)
+        audit_logger.record(
+            "course.deleted", "course", course_id,
+            actor_id=actor_id,
+            details={"code": code}
+        )
 
         return {"message": "Course deleted successfully"}
     
@@ -1,30 +1,60 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session, Query
 from uuid import UUID
+from datetime import datetime
 from fastapi import HTTPException, status
-from typing import List, Dict
-from app.models.enrollment_model import Enrollment
+from typing import Callable, List, Dict, Optional
+from app.core.config import settings
+from app.core.terms import active_since
+from app.db.bulk import in_values
+from app.models.enrollment_model import Enrollment, EnrollmentArchive
 from app.schemas.enrollment_schema import EnrollmentCreate
 from app.models.user_model import User
-from app.models.course_model import Course
+from app.services.catalog_service import course_catalog
+from app.services.audit_service import audit_logger
+from app.services.seat_feed_service import seat_feed
+from app.services.outbox_service import record_event
+from app.services.stats_service import enrollment_stats
 
 
 
 
+def active_enrollments(db: Session) -> Query:
+    """
+    Enrollments of the active terms only, for listings and reports. The
+    created_at bound lets PostgreSQL skip the partitions of older terms.
+    Seat, duplicate and removal checks must see every live enrollment, so
+    they query Enrollment directly; old terms leave it by being archived.
+    """
+    query = db.query(Enrollment)
+    if settings.ENROLLMENT_ACTIVE_TERMS > 0:
+        query = query.filter(Enrollment.created_at >= active_since(settings.ENROLLMENT_ACTIVE_TERMS))
+    return query
+
+
+
 class EnrollmentService:
 
 
     @staticmethod
     def enroll_student(db: Session, student: User, enrollment_data: EnrollmentCreate) -> Enrollment:
-        # Check if course exists
-        course = db.query(Course).filter(Course.id == enrollment_data.course_id).first()
+        # Check if course exists, served from the in-memory catalog
+        course = course_catalog.get(db, enrollment_data.course_id)
         if not course or not course.is_active:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Course not found or inactive"
             )
 
+        # Seats taken and whether this student holds one, in a single query
+        enrolled_count, existing = db.query(Enrollment).filter(
+            Enrollment.course_id == course.id
+        ).with_entities(
+            func.count(),
+            func.count().filter(Enrollment.user_id == student.id)
+        ).one()
+
         # Check course capacity
-        enrolled_count = db.query(Enrollment).filter(Enrollment.course_id == course.id).count()
         if enrolled_count >= course.capacity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -32,10 +62,6 @@ class EnrollmentService:
             )
 
         # Check if student already enrolled
-        existing = db.query(Enrollment).filter(
-            Enrollment.course_id == course.id,
-            Enrollment.user_id == student.id
-        ).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,7 +74,15 @@ class EnrollmentService:
             course_id=course.id
         )
         db.add(new_enrollment)
+        db.flush()
+        enrollment_stats.record_enrolled(db, course.id, student.id)
+        record_event(db, "enrollment.created", new_enrollment.id, {
+            "enrollment_id": new_enrollment.id,
+            "user_id": student.id,
+            "course_id": course.id
+        })
         db.commit()
+        seat_feed.publish(course.id)
         db.refresh(new_enrollment)
 
         return new_enrollment
@@ -60,7 +94,7 @@ class EnrollmentService:
         """
         Retrieve all enrollments from the database.
         """
-        return db.query(Enrollment).all()
+        return active_enrollments(db).all()
     
 
 
@@ -69,7 +103,7 @@ class EnrollmentService:
         """
         Retrieve all enrollments for a specific course.
         """
-        enrollments = db.query(Enrollment).filter(Enrollment.course_id == course_id).all()
+        enrollments = active_enrollments(db).filter(Enrollment.course_id == course_id).all()
 
         if not enrollments:
             raise HTTPException(
@@ -101,8 +135,16 @@ class EnrollmentService:
                 detail="Enrollment not found"
             )
 
+        enrollment_id = enrollment.id
         db.delete(enrollment)
+        enrollment_stats.record_dropped(db, course_id, student.id)
+        record_event(db, "enrollment.dropped", enrollment_id, {
+            "enrollment_id": enrollment_id,
+            "user_id": student.id,
+            "course_id": course_id
+        })
         db.commit()
+        seat_feed.publish(course_id)
 
         return {
             "message": "You deregistered successfully",
@@ -112,7 +154,12 @@ class EnrollmentService:
 
 
     @staticmethod
-    def remove_student(db: Session, student_id: UUID, course_id: UUID) -> dict:
+    def remove_student(
+        db: Session,
+        student_id: UUID,
+        course_id: UUID,
+        current_admin: Optional[User] = None
+    ) -> dict:
         """
         Remove a specific student from a specific course.
         """
@@ -127,8 +174,22 @@ class EnrollmentService:
                 detail="Enrollment not found"
             )
 
+        enrollment_id = enrollment.id
         db.delete(enrollment)
+        enrollment_stats.record_dropped(db, course_id, student_id)
+        record_event(db, "enrollment.removed", enrollment_id, {
+            "enrollment_id": enrollment_id,
+            "user_id": student_id,
+            "course_id": course_id,
+            "removed_by": current_admin.id if current_admin else None
+        })
         db.commit()
+        seat_feed.publish(course_id)
+        audit_logger.record(
+            "enrollment.removed", "enrollment", enrollment_id,
+            actor_id=current_admin.id if current_admin else None,
+            details={"user_id": str(student_id), "course_id": str(course_id)}
+        )
 
         return {
             "message": "Student removed successfully",
@@ -137,6 +198,51 @@ class EnrollmentService:
         }
     
 
+
+    @staticmethod
+    def archive_enrollments(
+        db: Session,
+        before: datetime,
+        batch_size: int = 5000,
+        on_batch: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Move enrollments created before `before` into enrollments_archive,
+        committing every `batch_size` rows so locks stay short.
+        """
+        archived = 0
+
+        while True:
+            ids = [
+                row.id for row in db.query(Enrollment.id)
+                .filter(Enrollment.created_at < before)
+                .order_by(Enrollment.id)
+                .limit(batch_size)
+            ]
+            if not ids:
+                return archived
+
+            db.execute(
+                insert(EnrollmentArchive).from_select(
+                    ["id", "user_id", "course_id", "created_at"],
+                    select(
+                        Enrollment.id,
+                        Enrollment.user_id,
+                        Enrollment.course_id,
+                        Enrollment.created_at
+                    ).where(in_values(db, Enrollment.id, ids), Enrollment.created_at < before)
+                )
+            )
+            batch = (in_values(db, Enrollment.id, ids), Enrollment.created_at < before)
+            enrollment_stats.record_removed(db, *batch)
+            db.execute(delete(Enrollment).where(*batch))
+            db.commit()
+
+            archived += len(ids)
+            if on_batch:
+                on_batch(archived)
+    
+
 enrollment_service = EnrollmentService()
 
 
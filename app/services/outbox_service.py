@@ -0,0 +1,377 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+import httpx
+from app.core.config import settings
+from app.db.bulk import in_values
+from app.db.session import SessionLocal
+from app.models.enrollment_model import Enrollment
+from app.models.outbox_model import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key; only one dispatcher drains the outbox at a time
+_DISPATCH_LOCK_KEY = 0x6F7574626F78
+
+
+
+def record_event(db: Session, event_type: str, aggregate_id: Any, payload: Dict[str, Any]) -> None:
+    """
+    Queue an event in the caller's transaction; it is delivered only if that
+    transaction commits. Values that are not JSON types are stored as strings.
+    """
+    db.add(OutboxEvent(
+        created_at=datetime.now(timezone.utc),
+        event_type=event_type,
+        aggregate_id=str(aggregate_id) if aggregate_id is not None else None,
+        payload=json.loads(json.dumps(payload, default=str)),
+        txid=func.txid_current() if db.get_bind().dialect.name == "postgresql" else 0
+    ))
+
+
+def record_enrollments_removed(db: Session, *criteria, **details: Any) -> int:
+    """
+    Queue one "enrollment.removed" event per enrollment matching `criteria`,
+    for removals that bypass the service (bulk DELETE, ON DELETE CASCADE).
+    Call before the DELETE, in its transaction; `details` go into every
+    payload. Returns the number of events.
+    """
+    rows = db.execute(
+        select(Enrollment.id, Enrollment.user_id, Enrollment.course_id).where(*criteria)
+    ).all()
+    if not rows:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    txid = func.txid_current() if db.get_bind().dialect.name == "postgresql" else 0
+    db.execute(insert(OutboxEvent).values(txid=txid), [
+        {
+            "created_at": now,
+            "event_type": "enrollment.removed",
+            "aggregate_id": str(enrollment_id),
+            "payload": json.loads(json.dumps({
+                "enrollment_id": enrollment_id,
+                "user_id": user_id,
+                "course_id": course_id,
+                **details
+            }, default=str))
+        }
+        for enrollment_id, user_id, course_id in rows
+    ])
+    return len(rows)
+
+
+
+class FileSink:
+    """
+    Appends each event as one JSON line and fsyncs before reporting success.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+
+    def send(self, events: List[dict]) -> None:
+        with open(self.path, "a", encoding="utf-8") as out:
+            for event in events:
+                out.write(json.dumps(event, separators=(",", ":")) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+
+    def __repr__(self) -> str:
+        return f"FileSink({self.path!r})"
+
+
+
+class HttpSink:
+    """
+    POSTs {"events": [...]} to `url`; any non-2xx answer fails the batch.
+    Receivers must deduplicate on the event id, delivery is at least once.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0, client: Optional[httpx.Client] = None):
+        self.url = url
+        self.client = client or httpx.Client(timeout=timeout)
+
+
+    def send(self, events: List[dict]) -> None:
+        response = self.client.post(self.url, json={"events": events})
+        response.raise_for_status()
+
+
+    def __repr__(self) -> str:
+        return f"HttpSink({self.url!r})"
+
+
+
+def build_sinks(spec: str) -> list:
+    """
+    Sinks from a comma separated list of http(s):// URLs and file paths,
+    e.g. "file:/var/lib/app/outbox.jsonl,http://127.0.0.1:9100/events".
+    """
+    sinks = []
+    for target in filter(None, (part.strip() for part in spec.split(","))):
+        if target.startswith(("http://", "https://")):
+            sinks.append(HttpSink(target, timeout=settings.OUTBOX_HTTP_TIMEOUT))
+        else:
+            sinks.append(FileSink(target[len("file:"):] if target.startswith("file:") else target))
+    return sinks
+
+
+
+class OutboxDispatcher:
+    """
+    Delivers outbox events to every sink, `batch_size` at a time.
+
+    Delivery follows the order in which the writing transactions started,
+    then id. On PostgreSQL only rows of transactions older than every one
+    still running are read (txid below the snapshot xmin), so a row that
+    commits late can never turn up behind rows already sent. SQLite runs
+    one writer at a time, so id order is commit order there.
+
+    A batch is claimed for `claim_timeout` seconds in a short transaction,
+    sent with no transaction open, and marked dispatched once every sink
+    accepted it. If any sink fails, the claim is dropped and the whole batch
+    retried after an exponential backoff capped at `max_backoff` seconds;
+    nothing behind it is sent meanwhile, so a sink may see a batch twice.
+    While the oldest pending row is claimed other dispatchers wait, and on
+    PostgreSQL an advisory lock keeps two of them from claiming at once.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sinks: list,
+        batch_size: int,
+        poll_interval: float,
+        max_backoff: float = 60.0,
+        retention: timedelta = timedelta(hours=24),
+        claim_timeout: float = 60.0
+    ):
+        self.session_factory = session_factory
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self.claim_timeout = claim_timeout
+
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._dispatch_lock = threading.Lock()
+
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_prune = 0.0
+        self._dispatched_total = 0
+        self._batches_total = 0
+        self._failed_batches_total = 0
+        self._last_dispatch_lag: Optional[float] = None
+
+
+    def dispatch_once(self) -> int:
+        """
+        Deliver the oldest pending batch. Returns the number of events
+        delivered, 0 when idle, backing off, or another dispatcher has it.
+        """
+        if not self.sinks or time.monotonic() < self._retry_at:
+            return 0
+
+        with self._dispatch_lock:
+            db = self.session_factory()
+            try:
+                return self._dispatch_batch(db)
+            finally:
+                db.close()
+
+
+    def _claim(self, db: Session) -> List[dict]:
+        """
+        Claim the next batch for this dispatcher and return it as events
+        ready to send; commits before returning.
+        """
+        postgres = db.get_bind().dialect.name == "postgresql"
+        if postgres and not db.execute(select(func.pg_try_advisory_xact_lock(_DISPATCH_LOCK_KEY))).scalar():
+            db.rollback()
+            return []
+
+        query = db.query(OutboxEvent).filter(OutboxEvent.dispatched_at.is_(None))
+        if postgres:
+            query = query.filter(OutboxEvent.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()))
+        rows = query.order_by(OutboxEvent.txid, OutboxEvent.id).limit(self.batch_size).all()
+
+        now = datetime.now(timezone.utc)
+        claimed_until = rows[0].claimed_until if rows else None
+        if claimed_until is not None and claimed_until.tzinfo is None:
+            claimed_until = claimed_until.replace(tzinfo=timezone.utc)
+        if not rows or (claimed_until is not None and claimed_until > now):
+            db.rollback()
+            return []
+
+        events = [
+            {
+                "id": row.id,
+                "type": row.event_type,
+                "aggregate_id": row.aggregate_id,
+                "created_at": row.created_at.isoformat(),
+                "payload": row.payload
+            }
+            for row in rows
+        ]
+        db.execute(
+            update(OutboxEvent)
+            .where(in_values(db, OutboxEvent.id, [event["id"] for event in events]))
+            .values(claimed_until=now + timedelta(seconds=self.claim_timeout))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return events
+
+
+    def _dispatch_batch(self, db: Session) -> int:
+        events = self._claim(db)
+        if not events:
+            return 0
+        ids = [event["id"] for event in events]
+
+        try:
+            for sink in self.sinks:
+                sink.send(events)
+        except Exception as exc:
+            db.execute(
+                update(OutboxEvent)
+                .where(in_values(db, OutboxEvent.id, ids))
+                .values(
+                    attempts=OutboxEvent.attempts + 1,
+                    last_error=f"{type(exc).__name__}: {exc}"[:1000],
+                    claimed_until=None
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+            self._failures += 1
+            self._failed_batches_total += 1
+            backoff = min(self.max_backoff, self.poll_interval * 2 ** self._failures)
+            self._retry_at = time.monotonic() + backoff
+            logger.warning("Outbox batch starting at %d failed (%s), retrying in %.1fs", ids[0], exc, backoff)
+            return 0
+
+        now = datetime.now(timezone.utc)
+        db.execute(
+            update(OutboxEvent)
+            .where(in_values(db, OutboxEvent.id, ids))
+            .values(dispatched_at=now, claimed_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        oldest = datetime.fromisoformat(events[0]["created_at"])
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        self._last_dispatch_lag = (now - oldest).total_seconds()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._dispatched_total += len(ids)
+        self._batches_total += 1
+        return len(ids)
+
+
+    def prune(self) -> int:
+        """
+        Delete events delivered longer than `retention` ago. Without sinks
+        nothing is ever delivered, so events older than that go regardless.
+        """
+        cutoff = datetime.now(timezone.utc) - self.retention
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                delete(OutboxEvent)
+                .where(
+                    OutboxEvent.dispatched_at < cutoff if self.sinks
+                    else OutboxEvent.created_at < cutoff
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                # Keep draining while full batches come back
+                while self.dispatch_once() == self.batch_size and not self._stopping.is_set():
+                    pass
+                if time.monotonic() - self._last_prune > 3600:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception:
+                logger.exception("Outbox dispatcher iteration failed")
+            # Without sinks the worker only prunes
+            self._stopping.wait(self.poll_interval if self.sinks else 60)
+
+
+    def start(self) -> None:
+        if not self.sinks:
+            logger.info(
+                "No OUTBOX_SINKS configured, outbox events are kept undelivered for %s", self.retention
+            )
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._worker.start()
+
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+
+    def metrics(self) -> dict:
+        db = self.session_factory()
+        try:
+            pending, oldest = db.query(
+                func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)
+            ).filter(OutboxEvent.dispatched_at.is_(None)).one()
+        finally:
+            db.close()
+
+        if oldest is not None and oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        return {
+            "sinks": [repr(sink) for sink in self.sinks],
+            "pending": pending,
+            "lag_seconds": round((datetime.now(timezone.utc) - oldest).total_seconds(), 3) if oldest else 0.0,
+            "last_dispatch_lag_seconds": self._last_dispatch_lag,
+            "dispatched_total": self._dispatched_total,
+            "batches_total": self._batches_total,
+            "failed_batches_total": self._failed_batches_total,
+            "consecutive_failures": self._failures,
+            "retry_in_seconds": round(max(0.0, self._retry_at - time.monotonic()), 3)
+        }
+
+
+
+outbox_dispatcher = OutboxDispatcher(
+    session_factory=SessionLocal,
+    sinks=build_sinks(settings.OUTBOX_SINKS),
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    max_backoff=settings.OUTBOX_MAX_BACKOFF,
+    retention=timedelta(hours=settings.OUTBOX_RETENTION_HOURS),
+    claim_timeout=settings.OUTBOX_CLAIM_TIMEOUT
+)
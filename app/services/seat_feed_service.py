@@ -0,0 +1,296 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.bulk import in_values
+from app.db.session import SessionLocal
+from app.models.course_model import Course
+from app.models.enrollment_model import Enrollment
+
+
+logger = logging.getLogger(__name__)
+
+
+
+def seat_counts(db: Session, course_ids: Iterable[UUID]) -> Dict[UUID, dict]:
+    """
+    Remaining seats per course, counted the way enroll_student checks capacity.
+    Courses that no longer exist are reported closed with no seats.
+    """
+    course_ids = list(course_ids)
+    courses = {
+        course_id: (capacity, is_active)
+        for course_id, capacity, is_active in db.query(Course.id, Course.capacity, Course.is_active)
+        .filter(in_values(db, Course.id, course_ids))
+    }
+    enrolled = dict(
+        db.query(Enrollment.course_id, func.count())
+        .filter(in_values(db, Enrollment.course_id, list(courses)))
+        .group_by(Enrollment.course_id)
+        .all()
+    ) if courses else {}
+
+    counts = {}
+    for course_id in course_ids:
+        capacity, is_active = courses.get(course_id, (0, False))
+        taken = enrolled.get(course_id, 0)
+        counts[course_id] = {
+            "course_id": str(course_id),
+            "capacity": capacity,
+            "enrolled": taken,
+            "seats_left": max(0, capacity - taken),
+            "open": is_active and taken < capacity
+        }
+    return counts
+
+
+def format_event(data: dict, event: str = "seats") -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+
+class SeatSubscription:
+    """
+    One stream's view of the feed. Updates for a course replace each other
+    until the stream reads them, so a slow client only gets the latest count.
+    Lives on the event loop; the feed hands updates over thread-safely.
+    """
+
+    def __init__(self, course_ids: Set[UUID], loop: asyncio.AbstractEventLoop):
+        self.course_ids = frozenset(course_ids)
+        self.loop = loop
+        self.closed = False
+        self._pending: Dict[UUID, dict] = {}
+        self._ready = asyncio.Event()
+
+
+    def _push(self, updates: Dict[UUID, dict]) -> None:
+        self._pending.update(updates)
+        self._ready.set()
+
+
+    def _close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+
+    async def next_updates(self, timeout: float) -> List[dict]:
+        """
+        Wait up to `timeout` seconds for updates; an empty list on timeout.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        updates, self._pending = list(self._pending.values()), {}
+        return updates
+
+
+
+class SeatFeed:
+    """
+    Pushes remaining-seat counts to subscribed streams.
+
+    Enrollment writes call publish(course_id) after they commit, which only
+    marks the course dirty when someone watches it. Every `interval` seconds
+    a worker thread reads the counts of all dirty courses in one query and
+    fans them out, so a burst of enrollments in a course costs one query and
+    one event per subscriber however many rows it wrote. Counts identical to
+    the last ones sent are dropped.
+
+    The feed only hears about writes made by its own process. With several
+    workers, every watched course is also re-read each `resync_interval`
+    seconds, which bounds how stale a stream can get.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float,
+        resync_interval: float = 0.0,
+        loader: Callable[[Session, Iterable[UUID]], Dict[UUID, dict]] = seat_counts
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.resync_interval = resync_interval
+        self.loader = loader
+
+        self._lock = threading.Lock()
+        self._subscriptions: Set[SeatSubscription] = set()
+        self._watched: Dict[UUID, int] = {}
+        self._dirty: Set[UUID] = set()
+        self._last_sent: Dict[UUID, dict] = {}
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self._flushes_total = 0
+        self._events_total = 0
+
+
+    def subscribe(self, course_ids: Iterable[UUID]) -> SeatSubscription:
+        """
+        Register a stream for `course_ids`; call from the event loop.
+        """
+        subscription = SeatSubscription(set(course_ids), asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+            for course_id in subscription.course_ids:
+                self._watched[course_id] = self._watched.get(course_id, 0) + 1
+        return subscription
+
+
+    def unsubscribe(self, subscription: SeatSubscription) -> None:
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+            for course_id in subscription.course_ids:
+                remaining = self._watched.get(course_id, 0) - 1
+                if remaining > 0:
+                    self._watched[course_id] = remaining
+                else:
+                    self._watched.pop(course_id, None)
+                    self._dirty.discard(course_id)
+                    self._last_sent.pop(course_id, None)
+
+
+    def publish(self, course_id: UUID) -> None:
+        # Cheap no-op while nobody watches the course
+        if course_id not in self._watched:
+            return
+        with self._lock:
+            self._dirty.add(course_id)
+
+
+    def snapshot(self, course_ids: Iterable[UUID]) -> Dict[UUID, dict]:
+        db = self.session_factory()
+        try:
+            return self.loader(db, course_ids)
+        finally:
+            db.close()
+
+
+    def flush(self, resync: bool = False) -> int:
+        """
+        Send the current counts of every dirty course, or of every watched
+        one with `resync`. Returns the number of events handed to subscribers.
+        """
+        with self._lock:
+            dirty = set(self._watched) if resync else self._dirty & set(self._watched)
+            self._dirty = set()
+            subscriptions = list(self._subscriptions)
+        if not dirty:
+            return 0
+
+        try:
+            counts = self.snapshot(dirty)
+        except Exception:
+            logger.exception("Reading seat counts failed, retrying next flush")
+            with self._lock:
+                self._dirty |= dirty
+            return 0
+
+        with self._lock:
+            dirty = {
+                course_id for course_id in dirty
+                if course_id in self._watched and self._last_sent.get(course_id) != counts[course_id]
+            }
+            for course_id in dirty:
+                self._last_sent[course_id] = counts[course_id]
+
+        sent = 0
+        for subscription in subscriptions:
+            updates = {course_id: counts[course_id] for course_id in subscription.course_ids & dirty}
+            if not updates:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, updates)
+            except RuntimeError:
+                # Its event loop is gone
+                self.unsubscribe(subscription)
+                continue
+            sent += len(updates)
+
+        self._flushes_total += 1
+        self._events_total += sent
+        return sent
+
+
+    async def events(self, subscription: SeatSubscription, initial: Dict[UUID, dict], keepalive: float):
+        """
+        Server-Sent Events body: the initial counts, then every update, with a
+        comment line after `keepalive` quiet seconds so proxies keep the
+        connection open. Unsubscribes when the client goes away.
+        """
+        try:
+            for update in initial.values():
+                yield format_event(update)
+            while not subscription.closed:
+                updates = await subscription.next_updates(keepalive)
+                if not updates and not subscription.closed:
+                    yield ": keepalive\n\n"
+                for update in updates:
+                    yield format_event(update)
+        finally:
+            self.unsubscribe(subscription)
+
+
+    def _run(self) -> None:
+        next_resync = time.monotonic() + self.resync_interval
+        while not self._stopping.wait(self.interval):
+            resync = self.resync_interval > 0 and time.monotonic() >= next_resync
+            if resync:
+                next_resync = time.monotonic() + self.resync_interval
+            self.flush(resync=resync)
+
+
+    def start(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="seat-feed", daemon=True)
+        self._worker.start()
+
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker and end every open stream so shutdown is not held
+        up by clients that never disconnect.
+        """
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._close)
+            except RuntimeError:
+                pass
+            self.unsubscribe(subscription)
+
+
+    def metrics(self) -> dict:
+        return {
+            "subscriptions": len(self._subscriptions),
+            "watched_courses": len(self._watched),
+            "flushes_total": self._flushes_total,
+            "events_total": self._events_total
+        }
+
+
+
+seat_feed = SeatFeed(
+    session_factory=SessionLocal,
+    interval=settings.SEAT_FEED_INTERVAL,
+    resync_interval=settings.SEAT_FEED_RESYNC_INTERVAL
+)
@@ -0,0 +1,306 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from uuid import UUID
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.bulk import in_values
+from app.db.session import SessionLocal
+from app.models.course_model import Course
+from app.models.enrollment_model import Enrollment
+from app.models.outbox_model import OutboxEvent
+from app.models.stats_model import CourseEnrollmentStats, StudentEnrollmentStats, EnrollmentHourlyStats
+
+
+logger = logging.getLogger(__name__)
+
+# Outbox events counted by the hourly series
+_ENROLLED_EVENTS = ("enrollment.created",)
+_DROPPED_EVENTS = ("enrollment.dropped", "enrollment.removed")
+
+
+
+def _hour(at: datetime) -> datetime:
+    return at.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def hour_bucket(db: Session, column):
+    """
+    SQL expression truncating a timestamp column to its UTC hour.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.date_trunc("hour", func.timezone("UTC", column))
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    raise RuntimeError(f"Enrollment statistics do not support {dialect}")
+
+
+def _as_hour(value) -> datetime:
+    # SQLite hands the bucket back as text, PostgreSQL as a naive UTC timestamp
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _upsert(db: Session, model, key: dict, values: Dict[str, int], add: bool = True) -> None:
+    """
+    INSERT the key with `values`, or on conflict add them to the existing
+    row (`add`) or overwrite it.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise RuntimeError(f"Enrollment statistics do not support {dialect}")
+
+    statement = insert(model).values(**key, **values)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=list(key),
+        set_={
+            column: getattr(model, column) + getattr(statement.excluded, column) if add
+            else getattr(statement.excluded, column)
+            for column in values
+        }
+    ))
+
+
+
+class EnrollmentStatsService:
+    """
+    Rollups behind the admin statistics. Enrollment writes call record_*()
+    before they commit, so the per-course and per-student counters change
+    atomically with the rows and the dashboard never has to scan enrollments.
+
+    The hourly series is not touched by writes: every enrollment would update
+    the same current-hour row and queue behind its lock. It is rolled up in
+    the background from the enrollment events in the outbox instead.
+    """
+
+    @staticmethod
+    def record_enrolled(db: Session, course_id: UUID, user_id: UUID) -> None:
+        _upsert(db, CourseEnrollmentStats, {"course_id": course_id}, {"enrolled": 1})
+        _upsert(db, StudentEnrollmentStats, {"user_id": user_id}, {"enrolled": 1})
+
+
+    @staticmethod
+    def record_dropped(db: Session, course_id: UUID, user_id: UUID) -> None:
+        EnrollmentStatsService._subtract(db, {course_id: 1}, {user_id: 1})
+
+
+    @staticmethod
+    def record_removed(db: Session, *criteria) -> None:
+        """
+        Account for enrollments about to be removed in bulk (archiving, course
+        deletion). Call before the DELETE, with the criteria it will use.
+        """
+        by_course = dict(db.execute(
+            select(Enrollment.course_id, func.count()).where(*criteria).group_by(Enrollment.course_id)
+        ).all())
+        by_student = dict(db.execute(
+            select(Enrollment.user_id, func.count()).where(*criteria).group_by(Enrollment.user_id)
+        ).all())
+        EnrollmentStatsService._subtract(db, by_course, by_student)
+
+
+    @staticmethod
+    def _subtract(db: Session, by_course: Dict[UUID, int], by_student: Dict[UUID, int]) -> None:
+        for course_id, count in by_course.items():
+            db.execute(
+                update(CourseEnrollmentStats)
+                .where(CourseEnrollmentStats.course_id == course_id)
+                .values(enrolled=CourseEnrollmentStats.enrolled - count)
+                .execution_options(synchronize_session=False)
+            )
+
+        for user_id, count in by_student.items():
+            db.execute(
+                update(StudentEnrollmentStats)
+                .where(StudentEnrollmentStats.user_id == user_id)
+                .values(enrolled=StudentEnrollmentStats.enrolled - count)
+                .execution_options(synchronize_session=False)
+            )
+
+        if by_student:
+            db.execute(
+                delete(StudentEnrollmentStats)
+                .where(
+                    in_values(db, StudentEnrollmentStats.user_id, list(by_student)),
+                    StudentEnrollmentStats.enrolled <= 0
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+
+    @staticmethod
+    def roll_up_hourly(db: Session, hours: int = 2) -> int:
+        """
+        Recount the last `hours` hours of the hourly series from the outbox
+        events, replacing what is stored for them. Idempotent, so late commits
+        are picked up by the next run. Events are pruned once delivered and
+        OUTBOX_RETENTION_HOURS old, so `hours` must not exceed that.
+        Returns the number of hours with activity.
+        """
+        since = _hour(datetime.now(timezone.utc)) - timedelta(hours=hours - 1)
+        bucket = hour_bucket(db, OutboxEvent.created_at)
+        rows = db.execute(
+            select(
+                bucket,
+                func.count().filter(OutboxEvent.event_type.in_(_ENROLLED_EVENTS)),
+                func.count().filter(OutboxEvent.event_type.in_(_DROPPED_EVENTS))
+            )
+            .where(
+                OutboxEvent.created_at >= since,
+                OutboxEvent.event_type.in_(_ENROLLED_EVENTS + _DROPPED_EVENTS)
+            )
+            .group_by(bucket)
+        ).all()
+
+        db.execute(
+            delete(EnrollmentHourlyStats)
+            .where(EnrollmentHourlyStats.hour >= since)
+            .execution_options(synchronize_session=False)
+        )
+        for hour, enrolled, dropped in rows:
+            # Another worker may roll up the same hours concurrently
+            _upsert(
+                db, EnrollmentHourlyStats, {"hour": _as_hour(hour)},
+                {"enrolled": enrolled, "dropped": dropped}, add=False
+            )
+        db.commit()
+        return len(rows)
+
+
+    @staticmethod
+    def rebuild(db: Session) -> None:
+        """
+        Recompute the rollups from the enrollments table. For the initial
+        backfill or after writes that bypassed the service; one full scan.
+        Hours older than the outbox retention only count enrollments that
+        still exist, with `dropped` at zero.
+        """
+        for model in (CourseEnrollmentStats, StudentEnrollmentStats, EnrollmentHourlyStats):
+            db.execute(delete(model).execution_options(synchronize_session=False))
+
+        for course_id, count in db.execute(
+            select(Enrollment.course_id, func.count()).group_by(Enrollment.course_id)
+        ).all():
+            db.add(CourseEnrollmentStats(course_id=course_id, enrolled=count))
+
+        for user_id, count in db.execute(
+            select(Enrollment.user_id, func.count()).group_by(Enrollment.user_id)
+        ).all():
+            db.add(StudentEnrollmentStats(user_id=user_id, enrolled=count))
+
+        bucket = hour_bucket(db, Enrollment.created_at)
+        for hour, count in db.execute(select(bucket, func.count()).group_by(bucket)).all():
+            db.add(EnrollmentHourlyStats(hour=_as_hour(hour), enrolled=count, dropped=0))
+
+        db.commit()
+        EnrollmentStatsService.roll_up_hourly(db, hours=settings.OUTBOX_RETENTION_HOURS)
+
+
+    @staticmethod
+    def get_statistics(db: Session, hours: int = 24) -> dict:
+        """
+        Fill rate per course, enrolled student total and the hourly series,
+        all read from the rollup tables. The series trails the counters by up
+        to ENROLLMENT_STATS_ROLLUP_INTERVAL seconds.
+        """
+        courses = db.query(
+            Course.id, Course.code, Course.title, Course.capacity,
+            func.coalesce(CourseEnrollmentStats.enrolled, 0)
+        ).outerjoin(
+            CourseEnrollmentStats, CourseEnrollmentStats.course_id == Course.id
+        ).filter(Course.is_active.is_(True)).order_by(Course.code).all()
+
+        since = _hour(datetime.now(timezone.utc)) - timedelta(hours=hours - 1)
+        hourly = db.query(EnrollmentHourlyStats).filter(
+            EnrollmentHourlyStats.hour >= since
+        ).order_by(EnrollmentHourlyStats.hour).all()
+
+        return {
+            "total_enrollments": sum(enrolled for *_, enrolled in courses),
+            "total_enrolled_students": db.query(func.count(StudentEnrollmentStats.user_id)).scalar(),
+            "courses": [
+                {
+                    "course_id": course_id,
+                    "code": code,
+                    "title": title,
+                    "capacity": capacity,
+                    "enrolled": enrolled,
+                    "fill_rate": round(enrolled / capacity, 4) if capacity else 0.0
+                }
+                for course_id, code, title, capacity, enrolled in courses
+            ],
+            "hourly": [
+                {"hour": row.hour, "enrolled": row.enrolled, "dropped": row.dropped}
+                for row in hourly
+            ]
+        }
+
+
+
+class HourlyStatsRollup:
+    """
+    Keeps the hourly series current by re-running roll_up_hourly() every
+    `interval` seconds on a worker thread. The first run covers the whole
+    outbox retention, so hours missed while the app was down are filled in.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float, catch_up_hours: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.catch_up_hours = catch_up_hours
+
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+
+    def run_once(self, hours: int = 2) -> int:
+        db = self.session_factory()
+        try:
+            return EnrollmentStatsService.roll_up_hourly(db, hours=hours)
+        finally:
+            db.close()
+
+
+    def _run(self) -> None:
+        hours = self.catch_up_hours
+        while not self._stopping.is_set():
+            try:
+                self.run_once(hours)
+                hours = 2
+            except Exception:
+                logger.exception("Hourly enrollment rollup failed")
+            self._stopping.wait(self.interval)
+
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._worker is not None and self._worker.is_alive()):
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="hourly-stats-rollup", daemon=True)
+        self._worker.start()
+
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+
+
+enrollment_stats = EnrollmentStatsService()
+
+hourly_stats_rollup = HourlyStatsRollup(
+    session_factory=SessionLocal,
+    interval=settings.ENROLLMENT_STATS_ROLLUP_INTERVAL,
+    catch_up_hours=max(1, settings.OUTBOX_RETENTION_HOURS)
+)
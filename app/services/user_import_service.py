@@ -0,0 +1,335 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterable, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.core.security import get_pwd_hash
+from app.db.bulk import in_values
+from app.models.user_model import User
+from app.schemas.user_schema import UserCreate
+from app.services.audit_service import audit_logger
+
+
+
+def read_upload(stream: BinaryIO, max_bytes: Optional[int] = None) -> str:
+    """
+    Read an uploaded import file as text. Reads at most one byte past the
+    limit, so an oversized upload is refused without loading all of it.
+    """
+    max_bytes = max_bytes or settings.USER_IMPORT_MAX_BYTES
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {max_bytes} bytes"
+        )
+
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be UTF-8 encoded"
+        )
+
+
+def parse_user_rows(content: str, fmt: str) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Parse a CSV (header: name,email,password,role) or JSON lines document.
+
+    Returns (row_number, data, error) tuples; rows that cannot be parsed carry
+    an error instead of data so they still show up in the import report.
+    """
+    rows = []
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        for number, record in enumerate(reader, start=1):
+            rows.append((number, {k.strip(): (v or "").strip() for k, v in record.items() if k}, None))
+        return rows
+
+    if fmt == "jsonl":
+        numbered = (line for line in content.splitlines() if line.strip())
+        for number, line in enumerate(numbered, start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                rows.append((number, None, f"invalid JSON: {exc.msg}"))
+                continue
+            if not isinstance(record, dict):
+                rows.append((number, None, "expected a JSON object"))
+                continue
+            rows.append((number, record, None))
+        return rows
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Unsupported import format, use csv or jsonl"
+    )
+
+
+def guess_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "jsonl"
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cannot tell the import format, pass format=csv or format=jsonl"
+    )
+
+
+
+class HashingPool:
+    """
+    Long-lived process pool for bulk password hashing, created by the app
+    lifespan (or on first use by the CLI) and shared by every import.
+
+    Processes are spawned, not forked: the server process runs threads, and
+    a forked child can inherit a lock one of them held and hang on it.
+    The executor starts its processes on demand, so creating it is cheap.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+
+    def start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+
+    def map(self, fn, items: List, chunksize: int = 1) -> List:
+        return list(self.start().map(fn, items, chunksize=chunksize))
+
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+
+hashing_pool = HashingPool(workers=settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1)
+
+
+
+class UserImportService:
+
+    @staticmethod
+    def hash_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+        """
+        Hash passwords on the shared process pool so every core is busy with
+        bcrypt. Falls back to the current process for one worker or a handful
+        of rows.
+        """
+        workers = min(workers or hashing_pool.workers, len(passwords))
+
+        if workers <= 1:
+            return [get_pwd_hash(password) for password in passwords]
+
+        return hashing_pool.map(get_pwd_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4)))
+
+
+    @staticmethod
+    def _existing_emails(db: Session, emails: Iterable[str], chunk_size: int) -> Set[str]:
+        """
+        The given emails already registered, lowercased like the unique index.
+        """
+        emails = list({email.lower() for email in emails})
+        existing = set()
+        for start in range(0, len(emails), chunk_size):
+            chunk = emails[start:start + chunk_size]
+            existing.update(
+                email for (email,) in db.query(func.lower(User.email)).filter(
+                    in_values(db, func.lower(User.email), chunk)
+                )
+            )
+        return existing
+
+
+    @staticmethod
+    def import_users(
+        db: Session,
+        rows: List[Tuple[int, Optional[dict], Optional[str]]],
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        current_admin: Optional[User] = None
+    ) -> dict:
+        """
+        Create users in bulk and report the outcome of every row.
+
+        Rows are validated first, duplicate emails (in the file or already
+        registered) are found with one set-based query, passwords are hashed in
+        parallel and the new users are inserted in batches, one commit each.
+        """
+        batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+        report = {}
+        candidates: List[Tuple[int, UserCreate]] = []
+        seen = set()
+
+        for number, data, error in rows:
+            if error is not None:
+                report[number] = {"row": number, "email": None, "status": "invalid", "detail": error}
+                continue
+
+            try:
+                user = UserCreate(**data)
+            except ValidationError as exc:
+                first = exc.errors()[0]
+                field = ".".join(str(part) for part in first["loc"])
+                report[number] = {
+                    "row": number,
+                    "email": data.get("email"),
+                    "status": "invalid",
+                    "detail": f"{field}: {first['msg']}"
+                }
+                continue
+
+            if user.email.lower() in seen:
+                report[number] = {
+                    "row": number,
+                    "email": user.email,
+                    "status": "duplicate",
+                    "detail": "Email appears earlier in the file"
+                }
+                continue
+
+            seen.add(user.email.lower())
+            candidates.append((number, user))
+
+        existing = UserImportService._existing_emails(db, seen, batch_size)
+        for number, user in candidates:
+            if user.email.lower() in existing:
+                report[number] = {
+                    "row": number,
+                    "email": user.email,
+                    "status": "duplicate",
+                    "detail": "User with email already exist"
+                }
+        candidates = [(number, user) for number, user in candidates if user.email.lower() not in existing]
+
+        hashes = UserImportService.hash_passwords([user.password for _, user in candidates], workers)
+
+        for start in range(0, len(candidates), batch_size):
+            batch = [
+                (number, {
+                    "id": uuid7(),
+                    "name": user.name,
+                    "email": user.email,
+                    "role": user.role,
+                    "hashed_pwd": hashed,
+                    "is_active": True
+                })
+                for (number, user), hashed in zip(candidates[start:start + batch_size], hashes[start:start + batch_size])
+            ]
+            UserImportService._insert_batch(db, batch, report)
+
+        created = sum(1 for row in report.values() if row["status"] == "created")
+        duplicates = sum(1 for row in report.values() if row["status"] == "duplicate")
+        invalid = sum(1 for row in report.values() if row["status"] == "invalid")
+        failed = sum(1 for row in report.values() if row["status"] == "failed")
+
+        audit_logger.record(
+            "users.imported", "user",
+            actor_id=current_admin.id if current_admin else None,
+            details={"created": created, "duplicates": duplicates, "invalid": invalid, "failed": failed}
+        )
+
+        return {
+            "created": created,
+            "duplicates": duplicates,
+            "invalid": invalid,
+            "failed": failed,
+            "rows": [report[number] for number in sorted(report)]
+        }
+
+
+    @staticmethod
+    def _insert_batch(db: Session, batch: List[Tuple[int, dict]], report: dict, attempts: int = 2) -> None:
+        """
+        Insert a batch in one statement. When it fails, someone registered
+        one of these emails since we checked: mark those as duplicates and
+        try the rest again. After `attempts` failures insert row by row, so
+        one row that keeps failing cannot fail the others.
+        """
+        for _ in range(attempts):
+            try:
+                db.execute(insert(User), [values for _, values in batch])
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                batch = UserImportService._drop_taken(db, batch, report)
+                if not batch:
+                    return
+                continue
+
+            for number, values in batch:
+                UserImportService._report_created(number, values, report)
+            return
+
+        for number, values in batch:
+            try:
+                db.execute(insert(User), [values])
+                db.commit()
+            except IntegrityError as exc:
+                db.rollback()
+                if not UserImportService._drop_taken(db, [(number, values)], report):
+                    continue
+                report[number] = {
+                    "row": number,
+                    "email": values["email"],
+                    "status": "failed",
+                    "detail": f"Could not be inserted: {exc.orig}"[:300]
+                }
+                continue
+            UserImportService._report_created(number, values, report)
+
+
+    @staticmethod
+    def _drop_taken(db: Session, batch: List[Tuple[int, dict]], report: dict) -> List[Tuple[int, dict]]:
+        """
+        Report rows whose email is registered by now as duplicates; returns the others.
+        """
+        taken = UserImportService._existing_emails(db, (values["email"] for _, values in batch), len(batch))
+        for number, values in batch:
+            if values["email"].lower() in taken:
+                report[number] = {
+                    "row": number,
+                    "email": values["email"],
+                    "status": "duplicate",
+                    "detail": "User with email already exist"
+                }
+        return [(number, values) for number, values in batch if values["email"].lower() not in taken]
+
+
+    @staticmethod
+    def _report_created(number: int, values: dict, report: dict) -> None:
+        report[number] = {
+            "row": number,
+            "email": values["email"],
+            "status": "created",
+            "user_id": values["id"]
+        }
+
+
+
+user_import_service = UserImportService()
@@ -1,13 +1,30 @@
+import os
 import pytest
+import threading
 import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+
+# Cheap bcrypt for the suite; must be set before settings are loaded
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.db.base import Base
 from app.api.deps import get_db
+from app.db.session import enable_sqlite_foreign_keys
+from app.db.slow_queries import slow_query_log
 from app.models.user_model import User
 from app.models.course_model import Course
+from app.services.catalog_service import course_catalog
+from app.services.audit_service import audit_logger
+from app.services.course_deletion_service import course_deletions
+from app.services.seat_feed_service import seat_feed
+from app.services.outbox_service import outbox_dispatcher
+from app.services.stats_service import hourly_stats_rollup
 
 
 
@@ -17,6 +34,8 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+enable_sqlite_foreign_keys(engine)
+slow_query_log.install(engine)
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -31,9 +50,13 @@ def setup_database():
 
 @pytest.fixture(autouse=True)
 def clean_db():
+    # Write audit events left by the previous test before its tables go away
+    audit_logger.flush()
     # Drop all tables and recreate them before each test
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Tests write courses straight to the DB, so drop any cached catalog
+    course_catalog.bump_version()
     yield
 
 
@@ -48,11 +71,134 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+audit_logger.session_factory = TestingSessionLocal
+course_deletions.session_factory = TestingSessionLocal
+seat_feed.session_factory = TestingSessionLocal
+outbox_dispatcher.session_factory = TestingSessionLocal
+hourly_stats_rollup.session_factory = TestingSessionLocal
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements sent through `engine` while active, from any
+    thread, so sync endpoints running in the threadpool are included.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self._lock = threading.Lock()
+
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    with query_budget(3):
+        client.post("/enrollments/", ...)
+
+    Fails when the block issues more than the given number of statements.
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        with QueryCounter(engine) as counter:
+            yield counter
+        assert counter.count <= max_queries, (
+            f"{counter.count} queries, budget is {max_queries}:\n  " + "\n  ".join(counter.statements)
+        )
+
+    return budget
+
+
+# pytest app/tests --query-report: statements per request, grouped by route
+def pytest_addoption(parser):
+    parser.addoption(
+        "--query-report",
+        action="store_true",
+        help="list the SQL statement count of every route the tests call"
+    )
+
+
+_request_queries: ContextVar = ContextVar("request_queries", default=None)
+_route_queries = defaultdict(list)
+
+
+def _count_request_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class _QueryReportApp:
+    """
+    Wraps the app under test and files each request's statement count under
+    its route template. The counter travels in a context variable, which the
+    threadpool copies into sync endpoints and dependencies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _request_queries.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_queries.reset(token)
+            route = scope.get("route")
+            _route_queries[(scope["method"], getattr(route, "path", scope["path"]))].append(counter[0])
+
+
+@pytest.fixture(scope="session", autouse=True)
+def query_report(request):
+    enabled = request.config.getoption("--query-report", default=False)
+    if enabled:
+        event.listen(engine, "before_cursor_execute", _count_request_query)
+    yield enabled
+    if enabled:
+        event.remove(engine, "before_cursor_execute", _count_request_query)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.getoption("--query-report", default=False) or not _route_queries:
+        return
+
+    terminalreporter.section("queries per request")
+    terminalreporter.write_line(f"{'max':>4} {'mean':>5} {'calls':>5}  route")
+    rows = sorted(_route_queries.items(), key=lambda item: (-max(item[1]), item[0][1], item[0][0]))
+    for (method, path), counts in rows:
+        terminalreporter.write_line(
+            f"{max(counts):>4} {sum(counts) / len(counts):>5.1f} {len(counts):>5}  {method} {path}"
+        )
 
 
 @pytest.fixture
-def client():
-    return TestClient(app)
+def client(query_report):
+    return TestClient(_QueryReportApp(app) if query_report else app)
 
 
 def mock_admin_user():
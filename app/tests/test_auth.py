@@ -1,6 +1,15 @@
-from app.core.security import verify_pwd, get_pwd_hash
+from app.core.security import (
+    verify_pwd, get_pwd_hash, create_access_token, verify_token,
+    get_signing_keys, token_cache, VerifiedTokenCache
+)
+from app.schemas.auth_schema import TokenData
+import pytest
+import time
+from fastapi import HTTPException
+from datetime import datetime, timedelta, timezone
 from .conftest import TestingSessionLocal, mock_admin_user
 from app.models.user_model import User
+from app.models.refresh_token_model import RefreshToken
 import jwt
 import uuid
 from app.main import app
@@ -350,3 +359,411 @@ def test_activate_user_not_found(client):
     response = client.patch(f"/api/v1/{random_id}/activate")
     assert response.status_code == 404
     assert response.json()["detail"] == "User not found"
+
+
+
+def test_verify_token_served_from_cache():
+    token = create_access_token({"sub": "cached@example.com"}, expires_delta=timedelta(minutes=5))
+
+    first = verify_token(token)
+    assert first.email == "cached@example.com"
+    # The second call skips jwt.decode and returns the cached result
+    assert verify_token(token) is first
+
+
+def test_token_cache_expires_and_evicts():
+    cache = VerifiedTokenCache(maxsize=2)
+    data = TokenData(email="a@example.com")
+
+    cache.put("expired", data, time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.put("one", data, time.time() + 60)
+    cache.put("two", data, time.time() + 60)
+    cache.get("one")
+    cache.put("three", data, time.time() + 60)
+
+    # "two" was the least recently used entry
+    assert cache.get("two") is None
+    assert cache.get("one") is data
+    assert cache.get("three") is data
+
+
+def test_tampered_token_rejected_even_after_cache_hit():
+    token = create_access_token({"sub": "tamper@example.com"}, expires_delta=timedelta(minutes=5))
+    verify_token(token)
+
+    with pytest.raises(HTTPException) as error:
+        verify_token(token[:-2] + ("aa" if not token.endswith("aa") else "bb"))
+    assert error.value.status_code == 401
+
+
+def test_asymmetric_es256_tokens(monkeypatch):
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+    monkeypatch.setattr(settings, "ALGORITHM", "ES256")
+    monkeypatch.setattr(settings, "PRIVATE_KEY", private_pem)
+    monkeypatch.setattr(settings, "PUBLIC_KEY", public_pem)
+    get_signing_keys.cache_clear()
+    token_cache.clear()
+    try:
+        token = create_access_token({"sub": "es256@example.com"}, expires_delta=timedelta(minutes=5))
+        assert jwt.get_unverified_header(token)["alg"] == "ES256"
+        assert jwt.decode(token, public_pem, algorithms=["ES256"])["sub"] == "es256@example.com"
+        assert verify_token(token).email == "es256@example.com"
+    finally:
+        get_signing_keys.cache_clear()
+        token_cache.clear()
+
+
+def _login_student(client, email="refresh@example.com", password="refreshpassword"):
+    db = TestingSessionLocal()
+    db.add(User(
+        name="Refresh User",
+        email=email,
+        hashed_pwd=get_pwd_hash(password),
+        role="student",
+        is_active=True
+    ))
+    db.commit()
+
+    response = client.post("/api/v1/token", data={"username": email, "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_token_rotation_skips_password_check(client, monkeypatch):
+    tokens = _login_student(client)
+    assert tokens["refresh_token"]
+
+    def no_bcrypt(*args, **kwargs):
+        raise AssertionError("refresh must not verify the password")
+    monkeypatch.setattr("app.services.auth_service.verify_and_update_pwd", no_bcrypt)
+
+    response = client.post("/api/v1/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    renewed = response.json()
+
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+    assert verify_token(renewed["access_token"]).email == "refresh@example.com"
+
+    # Only the hash is stored
+    db = TestingSessionLocal()
+    stored = [row.token_hash for row in db.query(RefreshToken).all()]
+    assert tokens["refresh_token"] not in stored
+    assert len(stored) == 2
+
+
+def test_refresh_token_reuse_revokes_all_sessions(client):
+    tokens = _login_student(client)
+    renewed = client.post("/api/v1/token/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+    # Replaying the rotated token is treated as theft
+    response = client.post("/api/v1/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    response = client.post("/api/v1/token/refresh", json={"refresh_token": renewed["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_revoked_or_expired_refresh_token_rejected(client):
+    tokens = _login_student(client)
+
+    response = client.post("/api/v1/token/revoke", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    response = client.post("/api/v1/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    second = client.post(
+        "/api/v1/token",
+        data={"username": "refresh@example.com", "password": "refreshpassword"}
+    ).json()
+    db = TestingSessionLocal()
+    db.query(RefreshToken).filter(RefreshToken.revoked.is_(False)).update(
+        {RefreshToken.expires_at: datetime.now(timezone.utc) - timedelta(minutes=1)}
+    )
+    db.commit()
+
+    response = client.post("/api/v1/token/refresh", json={"refresh_token": second["refresh_token"]})
+    assert response.status_code == 401
+    assert client.post("/api/v1/token/refresh", json={"refresh_token": "unknown"}).status_code == 401
+
+
+
+def test_expired_refresh_tokens_are_pruned(client):
+    from app.services.auth_service import AuthService
+
+    tokens = _login_student(client)
+    rotated = client.post("/api/v1/token/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+    db = TestingSessionLocal()
+    assert db.query(RefreshToken).count() == 2
+
+    # Revoked but unexpired rows stay, a replay must still be recognised
+    assert AuthService.prune_refresh_tokens(db) == 0
+
+    db.query(RefreshToken).update({RefreshToken.expires_at: datetime.now(timezone.utc) - timedelta(minutes=1)})
+    db.commit()
+    # Signing in drops the user's own expired tokens
+    client.post("/api/v1/token", data={"username": "refresh@example.com", "password": "refreshpassword"})
+    assert db.query(RefreshToken).count() == 1
+
+    db.query(RefreshToken).update({RefreshToken.expires_at: datetime.now(timezone.utc) - timedelta(minutes=1)})
+    db.commit()
+    assert AuthService.prune_refresh_tokens(db, batch_size=1) == 1
+    assert db.query(RefreshToken).count() == 0
+    assert client.post("/api/v1/token/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+    db.close()
+
+
+
+def test_login_rehashes_outdated_password_hash(client):
+    from passlib.context import CryptContext
+
+    db = TestingSessionLocal()
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("rehashpassword")
+    db.add(User(
+        name="Rehash User",
+        email="rehash@example.com",
+        hashed_pwd=old_hash,
+        role="student",
+        is_active=True
+    ))
+    db.commit()
+
+    response = client.post("/api/v1/token", data={"username": "rehash@example.com", "password": "rehashpassword"})
+    assert response.status_code == 200
+
+    db.expire_all()
+    user = db.query(User).filter(User.email == "rehash@example.com").first()
+    assert user.hashed_pwd != old_hash
+    assert user.hashed_pwd.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert verify_pwd("rehashpassword", user.hashed_pwd) is True
+
+
+def test_bulk_import_users_reports_every_row(client):
+    db = TestingSessionLocal()
+    db.add(User(
+        name="Existing",
+        email="existing@example.com",
+        hashed_pwd=get_pwd_hash("existingpassword"),
+        role="student",
+        is_active=True
+    ))
+    db.commit()
+
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+
+    content = (
+        "name,email,password,role\n"
+        "Ada,ada@example.com,adapassword,student\n"
+        "Existing,existing@example.com,whatever,student\n"
+        "Bad,not-an-email,badpassword,student\n"
+        "Ada Again,ada@example.com,otherpassword,student\n"
+        "Grace,grace@example.com,gracepassword,admin\n"
+    )
+    response = client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("intake.csv", content, "text/csv")}
+    )
+    assert response.status_code == 200
+    result = response.json()
+
+    assert (result["created"], result["duplicates"], result["invalid"]) == (2, 2, 1)
+    assert [row["status"] for row in result["rows"]] == [
+        "created", "duplicate", "invalid", "duplicate", "created"
+    ]
+
+    grace = db.query(User).filter(User.email == "grace@example.com").first()
+    assert str(grace.id) == result["rows"][4]["user_id"]
+    assert grace.role == "admin"
+    assert verify_pwd("gracepassword", grace.hashed_pwd) is True
+
+
+def test_bulk_import_hashes_on_a_process_pool():
+    from app.services.user_import_service import UserImportService
+
+    hashes = UserImportService.hash_passwords(["one", "two", "three"], workers=2)
+    assert len(hashes) == 3
+    assert all(verify_pwd(pw, hashed) for pw, hashed in zip(["one", "two", "three"], hashes))
+
+
+def test_bulk_import_rejects_undecodable_or_oversized_files(client, monkeypatch):
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+
+    response = client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("intake.csv", "name,email\nJos\xe9,jose@example.com\n".encode("latin-1"), "text/csv")}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File must be UTF-8 encoded"
+
+    monkeypatch.setattr(settings, "USER_IMPORT_MAX_BYTES", 16)
+    response = client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("intake.csv", "name,email,password,role\n", "text/csv")}
+    )
+    assert response.status_code == 413
+
+
+def test_bulk_import_batch_survives_repeated_conflicts():
+    from app.services.user_import_service import UserImportService
+
+    db = TestingSessionLocal()
+    taken = User(
+        name="Taken",
+        email="taken@example.com",
+        hashed_pwd=get_pwd_hash("takenpassword"),
+        role="student",
+        is_active=True
+    )
+    db.add(taken)
+    db.commit()
+
+    def row(email, user_id=None):
+        return {
+            "id": user_id or uuid.uuid4(),
+            "name": email.split("@")[0],
+            "email": email,
+            "role": "student",
+            "hashed_pwd": "x",
+            "is_active": True
+        }
+
+    # Registered after the import's duplicate check, and a row that keeps
+    # failing on something other than its email
+    report = {}
+    UserImportService._insert_batch(db, [
+        (1, row("fresh@example.com")),
+        (2, row("TAKEN@example.com")),
+        (3, row("clash@example.com", user_id=taken.id))
+    ], report)
+
+    assert [report[number]["status"] for number in (1, 2, 3)] == ["created", "duplicate", "failed"]
+    assert db.query(User).filter(User.email == "fresh@example.com").count() == 1
+    assert db.query(User).filter(User.email == "clash@example.com").count() == 0
+    db.close()
+
+
+def test_bulk_import_jsonl_with_broken_line(client):
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+
+    content = (
+        '{"name": "Lin", "email": "lin@example.com", "password": "linpassword", "role": "student"}\n'
+        '{"name": "Broken"\n'
+    )
+    response = client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("intake.jsonl", content, "application/x-ndjson")}
+    )
+    assert response.status_code == 200
+    rows = response.json()["rows"]
+    assert rows[0]["status"] == "created"
+    assert rows[1]["status"] == "invalid"
+    assert rows[1]["detail"].startswith("invalid JSON")
+
+
+def test_bulk_deactivate_users_keeps_self_guard(client, query_budget):
+    db = TestingSessionLocal()
+    admin = mock_admin_user()
+    admin.hashed_pwd = get_pwd_hash("adminpassword")
+    students = [
+        User(
+            id=uuid.uuid4(),
+            name=f"Student {i}",
+            email=f"bulk{i}@example.com",
+            hashed_pwd="x",
+            role="student",
+            is_active=i != 2
+        )
+        for i in range(3)
+    ]
+    db.add_all([admin, *students])
+    db.commit()
+
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+
+    response = client.patch(
+        "/api/v1/admin/users/deactivate",
+        json={"ids": [str(students[0].id), str(admin.id)]}
+    )
+    assert response.status_code == 403
+
+    # A role filter that covers the admin leaves them alone
+    response = client.patch("/api/v1/admin/users/deactivate", json={"role": "admin"})
+    assert response.json()["changed"] == 0
+
+    response = client.patch("/api/v1/admin/users/deactivate", json={"role": "student"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["changed"], result["unchanged"], result["not_found"]) == (2, 1, 0)
+
+    db.expire_all()
+    assert db.query(User).filter(User.id == admin.id).first().is_active is True
+    assert db.query(User).filter(User.role == "student", User.is_active.is_(True)).count() == 0
+
+    response = client.patch("/api/v1/admin/users/activate", json={"ids": [str(students[2].id)]})
+    assert response.json()["changed_ids"] == [str(students[2].id)]
+
+    # Ids the role filter leaves out are skipped, not missing
+    unknown = uuid.uuid4()
+    payload = {"ids": [str(students[0].id), str(admin.id), str(unknown)], "role": "student"}
+    # The UPDATE ... RETURNING plus one read of the requested ids
+    with query_budget(2):
+        response = client.patch("/api/v1/admin/users/activate", json=payload)
+    result = response.json()
+    assert (result["changed"], result["not_found"]) == (1, 1)
+    assert result["skipped"] == [str(admin.id)]
+
+
+def test_emails_match_case_insensitively(client):
+    from sqlalchemy.exc import IntegrityError
+
+    response = client.post(
+        "/api/v1/register",
+        json={"name": "Mixed", "email": "Mixed.Case@example.com", "password": "mixedpassword", "role": "student"}
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        "/api/v1/register",
+        json={"name": "Lower", "email": "mixed.case@example.com", "password": "lowerpassword", "role": "student"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "User with email already exist"
+
+    response = client.post(
+        "/api/v1/token",
+        data={"username": "MIXED.CASE@example.com", "password": "mixedpassword"}
+    )
+    assert response.status_code == 200
+
+    token = create_access_token({"sub": "mixed.case@EXAMPLE.com"}, expires_delta=timedelta(minutes=5))
+    response = client.get("/api/v1/profile", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+    response = client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("intake.csv", "name,email,password,role\nDup,MIXED.case@example.com,duppassword,student\n", "text/csv")}
+    )
+    assert response.json()["rows"][0]["status"] == "duplicate"
+
+    # The unique index itself ignores case
+    db = TestingSessionLocal()
+    db.add(User(name="Raw", email="MIXED.CASE@EXAMPLE.COM", hashed_pwd="x", role="student", is_active=True))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+    db.close()
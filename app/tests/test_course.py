@@ -1,10 +1,14 @@
 from fastapi import HTTPException
 from app.core.security import  get_pwd_hash
 from .conftest import TestingSessionLocal, mock_admin_user
+import pytest
+import threading
+import time
 import uuid
 from app.main import app
 from app.api.deps import get_current_active_admin
 from app.models.course_model import Course
+from app.services.catalog_service import course_catalog
 
 
 
@@ -293,3 +297,448 @@ def test_delete_course_not_found(client):
 
 
 
+def test_search_courses_ranked(client):
+    db = TestingSessionLocal()
+
+    db.add_all([
+        Course(id=uuid.uuid4(), title="Linear Algebra", code="MATH201", capacity=30, is_active=True),
+        Course(id=uuid.uuid4(), title="Mathematical Logic", code="PHIL110", capacity=30, is_active=True),
+        Course(id=uuid.uuid4(), title="Organic Chemistry", code="CHEM210", capacity=30, is_active=True),
+        Course(id=uuid.uuid4(), title="Math Olympiad", code="MATH999", capacity=30, is_active=False)
+    ])
+    db.commit()
+
+    response = client.get("/courses/search", params={"q": "math"})
+    assert response.status_code == 200
+    data = response.json()
+
+    codes = [item["code"] for item in data["items"]]
+    # code matches outrank title matches, inactive courses are hidden
+    assert codes == ["MATH201", "PHIL110"]
+    assert data["has_more"] is False
+
+
+def test_search_courses_pagination(client):
+    db = TestingSessionLocal()
+
+    for number in range(5):
+        db.add(Course(id=uuid.uuid4(), title=f"Biology {number}", code=f"BIO10{number}", capacity=30, is_active=True))
+    db.commit()
+
+    first = client.get("/courses/search", params={"q": "bio", "size": 2}).json()
+    last = client.get("/courses/search", params={"q": "bio", "size": 2, "page": 3}).json()
+
+    assert len(first["items"]) == 2
+    assert first["has_more"] is True
+    assert len(last["items"]) == 1
+    assert last["has_more"] is False
+
+
+def test_search_courses_reflects_updates(client):
+    db = TestingSessionLocal()
+
+    course = Course(id=uuid.uuid4(), title="History", code="HIST100", capacity=30, is_active=True)
+    db.add(course)
+    db.commit()
+
+    course.title = "Ancient History"
+    db.commit()
+
+    data = client.get("/courses/search", params={"q": "ancient"}).json()
+    assert [item["code"] for item in data["items"]] == ["HIST100"]
+
+
+def test_search_courses_requires_query(client):
+    response = client.get("/courses/search")
+    assert response.status_code == 422
+
+    response = client.get("/courses/search", params={"q": "   "})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Search query must not be blank"
+
+
+def test_catalog_served_from_snapshot(client):
+    db = TestingSessionLocal()
+
+    db.add(Course(id=uuid.uuid4(), title="Math", code="Basic Math", capacity=30, is_active=True))
+    db.commit()
+
+    assert len(client.get("/courses").json()) == 1
+
+    # A row written behind CourseService's back is not visible until the version moves
+    db.add(Course(id=uuid.uuid4(), title="Physics", code="Basic Physics", capacity=30, is_active=True))
+    db.commit()
+    assert len(client.get("/courses").json()) == 1
+
+    course_catalog.bump_version()
+    assert len(client.get("/courses").json()) == 2
+
+
+def test_catalog_miss_keeps_the_snapshot():
+    db = TestingSessionLocal()
+    db.add(Course(id=uuid.uuid4(), title="Math", code="MTH100", capacity=30, is_active=True))
+    db.commit()
+
+    snapshot = course_catalog.snapshot(db)
+    version = course_catalog.version
+    # Loaded as plain rows, not ORM objects held by the session
+    assert len(db.identity_map) == 0
+
+    # Written outside CourseService: found in the database, snapshot kept
+    outside = uuid.uuid4()
+    db.add(Course(id=outside, title="Art", code="ART100", capacity=30, is_active=True))
+    db.commit()
+    db.expunge_all()
+    assert course_catalog.get(db, outside).code == "ART100"
+    assert course_catalog.get(db, uuid.uuid4()) is None
+    assert course_catalog.version == version
+    assert course_catalog.snapshot(db) is snapshot
+    db.close()
+
+
+def test_catalog_refreshed_after_course_mutation(client):
+    db = TestingSessionLocal()
+
+    admin = mock_admin_user()
+    admin.hashed_pwd = get_pwd_hash("adminpassword")
+    db.add(admin)
+
+    course_id = uuid.uuid4()
+    db.add(Course(id=course_id, title="Math", code="Basic Math", capacity=30, is_active=True))
+    db.commit()
+
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+
+    assert client.get(f"/courses/{course_id}").json()["title"] == "Math"
+    version = course_catalog.version
+
+    client.patch(f"/courses/{course_id}", json={"title": "Advanced Math"})
+    assert course_catalog.version > version
+    assert client.get(f"/courses/{course_id}").json()["title"] == "Advanced Math"
+
+    client.patch(f"/courses/{course_id}/deactivate")
+    assert client.get("/courses").json() == []
+
+
+def test_bulk_deactivate_courses(client):
+    db = TestingSessionLocal()
+    ids = [uuid.uuid4() for _ in range(3)]
+    db.add_all([
+        Course(id=ids[0], title="Algebra", code="MTH101", capacity=30, is_active=True),
+        Course(id=ids[1], title="Calculus", code="MTH201", capacity=30, is_active=False),
+        Course(id=ids[2], title="Physics", code="PHY101", capacity=30, is_active=True),
+    ])
+    db.commit()
+
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+    assert len(client.get("/courses/").json()) == 2
+
+    missing = uuid.uuid4()
+    response = client.patch(
+        "/courses/bulk/deactivate",
+        json={"ids": [str(ids[0]), str(ids[1]), str(missing)]}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["changed"], result["unchanged"], result["not_found"]) == (1, 1, 1)
+    assert result["changed_ids"] == [str(ids[0])]
+
+    # The catalog picks the change up straight away
+    assert [c["code"] for c in client.get("/courses/").json()] == ["PHY101"]
+
+    response = client.patch("/courses/bulk/activate", json={"code_prefix": "MTH"})
+    assert response.json()["changed"] == 2
+    assert client.patch("/courses/bulk/activate", json={}).status_code == 400
+
+
+def _course_with_enrollments(db, count):
+    from app.models.enrollment_model import Enrollment
+    from app.models.user_model import User
+
+    course = Course(id=uuid.uuid4(), title="History", code="HIS900", capacity=300, is_active=True)
+    students = [
+        User(id=uuid.uuid4(), name=f"S{i}", email=f"s{i}@example.com", hashed_pwd="x", role="student", is_active=True)
+        for i in range(count)
+    ]
+    db.add_all([course, *students])
+    db.flush()
+    db.add_all([Enrollment(user_id=student.id, course_id=course.id) for student in students])
+    db.commit()
+    return course.id
+
+
+def test_delete_course_cascades_in_database(client):
+    from app.models.enrollment_model import Enrollment
+    from app.models.outbox_model import OutboxEvent
+
+    db = TestingSessionLocal()
+    course_id = _course_with_enrollments(db, 3)
+    enrolled = {str(user_id) for (user_id,) in db.query(Enrollment.user_id)}
+    admin = mock_admin_user()
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+
+    response = client.delete(f"/courses/{course_id}")
+    assert response.status_code == 200
+    assert db.query(Enrollment).filter(Enrollment.course_id == course_id).count() == 0
+
+    # Downstream consumers hear about every student the cascade dropped
+    events = db.query(OutboxEvent).all()
+    assert {event.event_type for event in events} == {"enrollment.removed"}
+    assert {event.payload["user_id"] for event in events} == enrolled
+    assert all(event.payload["reason"] == "course.deleted" for event in events)
+    assert all(event.payload["removed_by"] == str(admin.id) for event in events)
+
+
+def test_delete_large_course_runs_in_background(client, monkeypatch):
+    from app.core.config import settings
+    from app.models.enrollment_model import Enrollment
+    from app.models.outbox_model import OutboxEvent
+    from app.services.course_deletion_service import course_deletions
+
+    monkeypatch.setattr(settings, "COURSE_DELETE_SYNC_LIMIT", 2)
+    monkeypatch.setattr(course_deletions, "batch_size", 2)
+
+    db = TestingSessionLocal()
+    course_id = _course_with_enrollments(db, 5)
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+
+    response = client.delete(f"/courses/{course_id}")
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["Location"] == f"/courses/delete-jobs/{job['job_id']}"
+    assert job["total_enrollments"] == 5
+
+    course_deletions.wait(job["job_id"], timeout=10)
+
+    status = client.get(f"/courses/delete-jobs/{job['job_id']}").json()
+    assert status["status"] == "done"
+    assert status["deleted_enrollments"] == 5
+
+    db.expire_all()
+    assert db.query(Course).filter(Course.id == course_id).first() is None
+    assert db.query(Enrollment).count() == 0
+    assert db.query(OutboxEvent).filter(OutboxEvent.event_type == "enrollment.removed").count() == 5
+    assert client.get("/courses/delete-jobs/unknown").status_code == 404
+
+    # Finished jobs are forgotten once the retention has passed
+    monkeypatch.setattr(course_deletions, "retention", 0)
+    assert client.get(f"/courses/delete-jobs/{job['job_id']}").status_code == 404
+    assert course_deletions._threads == {}
+
+
+def test_course_list_served_precompressed(client):
+    import gzip
+    import json
+    from app.services.course_service import course_service
+
+    db = TestingSessionLocal()
+    db.add_all([
+        Course(id=uuid.uuid4(), title=f"Course number {i}", code=f"CRS{i:03d}", capacity=30, is_active=True)
+        for i in range(40)
+    ])
+    db.commit()
+
+    response = client.get("/courses/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 40
+
+    # Compressed once per catalog snapshot
+    payload = course_service.get_all_courses_payload(db)
+    assert course_service.get_all_courses_payload(db) is payload
+    assert json.loads(gzip.decompress(payload.encodings["gzip"])) == response.json()
+
+    response = client.get("/courses/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert len(response.json()) == 40
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/courses/", headers={"Accept-Encoding": "gzip"})
+    assert response.json() == []
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_update_course_with_if_match(client):
+    db = TestingSessionLocal()
+    course_id = uuid.uuid4()
+    db.add(Course(id=course_id, title="Chemistry", code="CHM101", capacity=30, is_active=True))
+    db.commit()
+
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+
+    etag = client.get(f"/courses/{course_id}").headers["ETag"]
+    assert etag == '"1"'
+
+    first = client.patch(f"/courses/{course_id}", json={"capacity": 40}, headers={"If-Match": etag})
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"2"'
+    assert first.json()["version"] == 2
+
+    # A second editor still holding the old ETag loses instead of overwriting
+    second = client.patch(f"/courses/{course_id}", json={"capacity": 50}, headers={"If-Match": etag})
+    assert second.status_code == 412
+    assert second.headers["ETag"] == '"2"'
+
+    db.expire_all()
+    assert db.query(Course).filter(Course.id == course_id).first().capacity == 40
+
+    assert client.patch(f"/courses/{course_id}", json={"capacity": 50}, headers={"If-Match": "*"}).status_code == 200
+
+
+def test_update_course_detects_concurrent_write():
+    from fastapi import HTTPException
+    from sqlalchemy import event
+    from app.schemas.course_schema import CourseUpdate
+    from app.services.course_service import course_service
+
+    db = TestingSessionLocal()
+    course_id = uuid.uuid4()
+    db.add(Course(id=course_id, title="Geology", code="GEO101", capacity=30, is_active=True))
+    db.commit()
+
+    # Another session commits between our read and our write
+    def concurrent_edit(session, flush_context, instances):
+        other = TestingSessionLocal()
+        other.query(Course).filter(Course.id == course_id).first().title = "Geology II"
+        other.commit()
+        other.close()
+    event.listen(db, "before_flush", concurrent_edit, once=True)
+
+    with pytest.raises(HTTPException) as exc:
+        course_service.update_course(db, course_id, CourseUpdate(capacity=45))
+    assert exc.value.status_code == 412
+
+    db.expire_all()
+    course = db.query(Course).filter(Course.id == course_id).first()
+    assert (course.title, course.capacity, course.version) == ("Geology II", 30, 2)
+
+
+def test_concurrent_course_searches_share_one_query(client):
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlalchemy import event
+    from app.services.course_service import course_reads, course_service
+    from .conftest import engine
+
+    db = TestingSessionLocal()
+    db.add(Course(id=uuid.uuid4(), title="Shared Algebra", code="ALG101", capacity=30, is_active=True))
+    db.commit()
+
+    queries = []
+    gate = threading.Event()
+
+    def count_and_wait(conn, cursor, statement, parameters, context, executemany):
+        if "courses_fts" in statement:
+            queries.append(statement)
+            gate.wait(5)
+
+    event.listen(engine, "before_cursor_execute", count_and_wait)
+    try:
+        def search():
+            session = TestingSessionLocal()
+            try:
+                return course_service.search_courses(session, "Algebra")
+            finally:
+                session.close()
+
+        before = course_reads.metrics()["coalesced_total"]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(search) for _ in range(4)]
+            while course_reads.metrics()["coalesced_total"] - before < 3:
+                time.sleep(0.001)
+            gate.set()
+            results = [future.result() for future in futures]
+    finally:
+        event.remove(engine, "before_cursor_execute", count_and_wait)
+
+    assert len(queries) == 1
+    assert all(result["items"][0].code == "ALG101" for result in results)
+
+
+def test_catalog_query_budgets(client, query_budget):
+    db = TestingSessionLocal()
+    courses = [
+        Course(id=uuid.uuid4(), title=f"Budget {i}", code=f"BGT{i:03d}", capacity=30, is_active=True)
+        for i in range(20)
+    ]
+    db.add_all(courses)
+    db.commit()
+    course_path = f"/courses/{courses[0].id}"
+    db.close()
+
+    # A cold catalog loads once, warm requests are served from memory
+    with query_budget(1):
+        assert len(client.get("/courses/").json()) == 20
+    with query_budget(0):
+        assert client.get(course_path).status_code == 200
+        assert client.get("/courses/").status_code == 200
+    with query_budget(1):
+        assert len(client.get("/courses/search?q=Budget&size=50").json()["items"]) == 20
+
+
+def test_new_courses_get_time_ordered_ids_and_page_by_creation(client, monkeypatch):
+    from app.core.ids import uuid7, uuid7_time
+
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+    codes = [f"ORD{i:03d}" for i in range(7)]
+    created = [
+        client.post("/courses/", json={"title": code, "code": code, "capacity": 10}).json()
+        for code in codes
+    ]
+    ids = [uuid.UUID(course["id"]) for course in created]
+    assert all(course_id.version == 7 for course_id in ids)
+    assert ids == sorted(ids)
+    assert abs(uuid7_time(ids[0]) - time.time()) < 60
+    assert len({uuid7() for _ in range(10000)}) == 10000
+
+    def walk(url):
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen += [course["code"] for course in response.json()]
+            link = response.headers.get("Link")
+            url = link[1:link.index(">")] if link else None
+        return seen
+
+    # Keyset pages follow creation order, from the catalog and from the database
+    assert walk("/courses/?limit=3") == codes
+    monkeypatch.setattr(course_catalog, "ttl_seconds", 0)
+    assert walk("/courses/?limit=3") == codes
+    assert [course["code"] for course in client.get(f"/courses/?after={ids[4]}").json()] == codes[5:]
+
+
+def test_active_courses_listed_in_code_order_from_partial_index(client, monkeypatch):
+    from app.db.slow_queries import slow_query_log
+
+    db = TestingSessionLocal()
+    db.add_all([
+        Course(id=uuid.uuid4(), title="Chemistry", code="CHM100", capacity=30, is_active=True),
+        Course(id=uuid.uuid4(), title="Algebra", code="ALG100", capacity=30, is_active=True),
+        Course(id=uuid.uuid4(), title="Biology", code="BIO100", capacity=30, is_active=False),
+        Course(id=uuid.uuid4(), title="Drama", code="DRM100", capacity=30, is_active=True)
+    ])
+    db.commit()
+    db.close()
+
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+
+    def listing_plans():
+        slow_query_log.clear()
+        assert [course["code"] for course in client.get("/courses/").json()] == ["ALG100", "CHM100", "DRM100"]
+        statements = [entry for entry in slow_query_log.entries() if "FROM courses" in entry["statement"]]
+        slow_query_log.clear()
+        return [entry["plan"] for entry in statements]
+
+    # The catalog snapshot is loaded through the partial index
+    plans = listing_plans()
+    assert len(plans) == 1 and "ix_courses_active_code" in plans[0]
+
+    # And so is the listing query without the catalog
+    monkeypatch.setattr(course_catalog, "ttl_seconds", 0)
+    plans = listing_plans()
+    assert len(plans) == 1 and "ix_courses_active_code" in plans[0]
@@ -1,14 +1,21 @@
 from fastapi import HTTPException
 from app.core.security import verify_pwd, get_pwd_hash
 from .conftest import TestingSessionLocal, mock_student_user, mock_admin_user, mock_course
+import json
 import jwt
+import time
 import uuid
 from app.main import app
-from app.api.deps import get_current_active_admin, get_current_active_student
+from app.api.deps import get_current_active_admin, get_current_active_student, get_current_user
 from app.core.config import settings 
 from app.models.course_model import Course
-from app.models.enrollment_model import Enrollment
+from app.models.enrollment_model import Enrollment, EnrollmentArchive
 from app.models.user_model import User
+from app.api.v1 import enrollment_route
+from app.core.admission import AdmissionQueue, TicketStatus
+from app.core.terms import active_since
+from app.services.enrollment_service import enrollment_service
+from datetime import datetime, timezone
 
 
 
@@ -375,4 +382,447 @@ def test_remove_student_not_found(client):
     # Attempt to remove non-existent enrollment
     response = client.delete(f"/enrollments/{uuid.uuid4()}/{uuid.uuid4()}")
     assert response.status_code == 404
-    assert "not found" in response.json()["detail"].lower()
\ No newline at end of file
+    assert "not found" in response.json()["detail"].lower()
+
+
+
+def test_admission_queue_is_fifo_with_one_ticket_per_student():
+    queue = AdmissionQueue(max_active=1, admit_window=30, poll_timeout=60)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    running = queue.acquire(first)
+    assert running.status == TicketStatus.ACTIVE
+
+    waiting = queue.acquire(second)
+    assert waiting.status == TicketStatus.WAITING
+    assert queue.acquire(third).status == TicketStatus.WAITING
+    assert queue.poll(queue.acquire(third).token)["position"] == 2
+
+    # Retrying while queued keeps the same place in line
+    assert queue.acquire(second).token == waiting.token
+    assert queue.metrics()["queue_depth"] == 2
+
+    queue.release(running)
+    assert queue.poll(waiting.token)["status"] == "admitted"
+    assert queue.acquire(second).status == TicketStatus.ACTIVE
+    assert queue.metrics()["queue_depth"] == 1
+
+
+def test_admission_queue_reclaims_unclaimed_slot():
+    queue = AdmissionQueue(max_active=1, admit_window=0, poll_timeout=60)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    running = queue.acquire(first)
+    second_ticket = queue.acquire(second)
+    third_ticket = queue.acquire(third)
+    queue.release(running)
+
+    # The second student never claimed their slot, so it passes down the line
+    assert queue.poll(third_ticket.token)["status"] == "admitted"
+    assert queue.poll(second_ticket.token) is None
+
+
+def test_enroll_queued_when_slots_busy(client, monkeypatch, query_budget):
+    from app.core.security import create_access_token
+
+    db = TestingSessionLocal()
+
+    student = mock_student_user()
+    student.hashed_pwd = get_pwd_hash("studentpassword")
+    db.add(student)
+    course = mock_course()
+    db.add(course)
+    db.commit()
+
+    queue = AdmissionQueue(max_active=1, admit_window=30, poll_timeout=60)
+    monkeypatch.setattr(enrollment_route, "enrollment_admission", queue)
+    busy = queue.acquire("someone@example.com")
+
+    # The real auth dependencies, so the queued request could reach the database
+    app.dependency_overrides.pop(get_current_active_student, None)
+    app.dependency_overrides.pop(get_current_user, None)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': student.email})}"}
+    payload = {"course_id": str(course.id)}
+
+    # Queued before the session or the user lookup
+    with query_budget(0):
+        response = client.post("/enrollments", json=payload, headers=headers)
+    assert response.status_code == 202
+    assert response.headers["Retry-After"] == "1"
+    token = response.json()["token"]
+    assert response.json()["position"] == 1
+
+    assert client.get(f"/enrollments/queue/{token}").json()["status"] == "waiting"
+
+    queue.release(busy)
+    assert client.get(f"/enrollments/queue/{token}").json()["status"] == "admitted"
+
+    response = client.post("/enrollments", json=payload, headers=headers)
+    assert response.status_code == 201
+    assert queue.metrics()["slots_in_use"] == 0
+
+
+def test_enrollment_queue_unknown_token(client):
+    response = client.get("/enrollments/queue/not-a-token")
+    assert response.status_code == 404
+
+
+def test_enrollments_from_past_terms_are_pruned_and_archived(client):
+    db = TestingSessionLocal()
+
+    admin = mock_admin_user()
+    admin.hashed_pwd = get_pwd_hash("adminpassword")
+    student = mock_student_user()
+    student.hashed_pwd = get_pwd_hash("studentpassword")
+    course = mock_course()
+    db.add_all([admin, student, course])
+    db.commit()
+
+    old = Enrollment(user_id=student.id, course_id=course.id, created_at=datetime(2020, 3, 1, tzinfo=timezone.utc))
+    db.add(old)
+    db.commit()
+
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+
+    # The 2020 enrollment falls outside the active terms
+    assert client.get("/enrollments").json() == []
+
+    archived = enrollment_service.archive_enrollments(db, before=active_since(2), batch_size=1)
+    assert archived == 1
+    assert db.query(Enrollment).count() == 0
+
+    row = db.query(EnrollmentArchive).one()
+    assert row.user_id == student.id
+    assert row.course_id == course.id
+
+
+def test_unarchived_enrollments_from_past_terms_still_count(client):
+    db = TestingSessionLocal()
+
+    student = mock_student_user()
+    student.hashed_pwd = "x"
+    other = mock_student_user()
+    other.hashed_pwd = "x"
+    course = Course(id=uuid.uuid4(), title="Old", code="OLD101", capacity=1, is_active=True)
+    db.add_all([student, other, course])
+    db.commit()
+    db.add(Enrollment(user_id=student.id, course_id=course.id, created_at=datetime(2020, 3, 1, tzinfo=timezone.utc)))
+    db.commit()
+    course_id, student_id = course.id, student.id
+
+    # Hidden from listings, but still holding the only seat
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+    assert client.get(f"/enrollments/{course_id}/enrollments").status_code == 404
+
+    app.dependency_overrides[get_current_active_student] = lambda: other
+    response = client.post("/enrollments", json={"course_id": str(course_id)})
+    assert response.json()["detail"] == "Course capacity full"
+
+    app.dependency_overrides[get_current_active_student] = lambda: student
+    response = client.post("/enrollments", json={"course_id": str(course_id)})
+    assert response.status_code == 400
+    assert client.delete(f"/enrollments/{course_id}").status_code == 200
+
+    assert db.query(Enrollment).filter(Enrollment.user_id == student_id).count() == 0
+    db.close()
+
+
+def test_enrollment_statistics_follow_enrollment_events(client):
+    from app.services.stats_service import enrollment_stats, hourly_stats_rollup
+
+    db = TestingSessionLocal()
+    students = [mock_student_user() for _ in range(3)]
+    for student in students:
+        student.hashed_pwd = "x"
+    course = Course(id=uuid.uuid4(), title="Stats", code="STA101", capacity=4, is_active=True)
+    other = Course(id=uuid.uuid4(), title="Empty", code="EMP101", capacity=10, is_active=True)
+    db.add_all([*students, course, other])
+    db.commit()
+
+    for student in students:
+        # No default argument: FastAPI would treat it as a request parameter
+        app.dependency_overrides[get_current_active_student] = (lambda user: lambda: user)(student)
+        assert client.post("/enrollments", json={"course_id": str(course.id)}).status_code == 201
+
+    app.dependency_overrides[get_current_active_student] = lambda: students[0]
+    assert client.delete(f"/enrollments/{course.id}").status_code == 200
+
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+    # Writes leave the hourly series alone, the rollup fills it from the outbox
+    assert client.get("/api/v1/admin/stats").json()["hourly"] == []
+    assert hourly_stats_rollup.run_once() == 1
+
+    response = client.get("/api/v1/admin/stats")
+    assert response.status_code == 200
+    stats = response.json()
+
+    assert stats["total_enrollments"] == 2
+    assert stats["total_enrolled_students"] == 2
+    by_code = {row["code"]: row for row in stats["courses"]}
+    assert by_code["STA101"]["enrolled"] == 2
+    assert by_code["STA101"]["fill_rate"] == 0.5
+    assert by_code["EMP101"]["enrolled"] == 0
+    assert sum(row["enrolled"] for row in stats["hourly"]) == 3
+    assert sum(row["dropped"] for row in stats["hourly"]) == 1
+
+    # A rebuild from the enrollments table agrees with the incremental counters
+    enrollment_stats.rebuild(db)
+    rebuilt = client.get("/api/v1/admin/stats").json()
+    assert rebuilt["courses"] == stats["courses"]
+    assert rebuilt["hourly"] == stats["hourly"]
+    assert rebuilt["total_enrolled_students"] == 2
+
+    # Deleting the course takes its enrollments out of the totals
+    assert client.delete(f"/courses/{course.id}").status_code == 200
+    assert client.get("/api/v1/admin/stats").json()["total_enrolled_students"] == 0
+
+
+def test_seat_feed_coalesces_enrollment_changes():
+    import asyncio
+    from app.schemas.enrollment_schema import EnrollmentCreate
+    from app.services.course_service import course_service
+    from app.services.seat_feed_service import seat_feed
+
+    db = TestingSessionLocal()
+    course = mock_course()
+    other = Course(id=uuid.uuid4(), title="Art", code="ART101", capacity=5, is_active=True)
+    students = [mock_student_user() for _ in range(3)]
+    for student in students:
+        student.hashed_pwd = "not-used"
+    db.add_all([course, other, *students])
+    db.commit()
+
+    async def scenario():
+        subscription = seat_feed.subscribe({course.id})
+        stream = seat_feed.events(subscription, seat_feed.snapshot({course.id}), keepalive=0.01)
+        try:
+            first = await stream.__anext__()
+            assert '"seats_left":10' in first
+
+            # Writes run in worker threads in the app
+            def writes():
+                for student in students:
+                    enrollment_service.enroll_student(db, student, EnrollmentCreate(course_id=course.id))
+                enrollment_service.deregister_student(db, students[0], course.id)
+                enrollment_service.enroll_student(db, students[0], EnrollmentCreate(course_id=other.id))
+                return seat_feed.flush()
+
+            assert await asyncio.to_thread(writes) == 1
+            update = await stream.__anext__()
+            assert update.startswith("event: seats\n")
+            assert '"enrolled":2' in update and '"seats_left":8' in update
+
+            # Re-reading every watched course only sends counts that changed
+            assert await asyncio.to_thread(seat_feed.flush, True) == 0
+
+            # Nothing pending: the stream sends a keepalive comment
+            assert await stream.__anext__() == ": keepalive\n\n"
+
+            # Closing the course reaches the stream as well
+            def close():
+                course_service.deactivate_course(db, course.id)
+                return seat_feed.flush()
+
+            assert await asyncio.to_thread(close) == 1
+            assert '"open":false' in await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+        assert course.id not in seat_feed._watched
+
+    asyncio.run(scenario())
+    # Unwatched courses are not even marked dirty
+    seat_feed.publish(course.id)
+    assert seat_feed.flush() == 0
+
+
+def test_seat_stream_rejects_too_many_courses(client, monkeypatch):
+    monkeypatch.setattr(settings, "SEAT_FEED_MAX_COURSES", 2)
+    ids = "&".join(f"course_id={uuid.uuid4()}" for _ in range(3))
+    assert client.get(f"/courses/seats/stream?{ids}").status_code == 400
+
+
+def test_seat_feed_metrics(client):
+    app.dependency_overrides[get_current_active_admin] = lambda: mock_admin_user()
+    metrics = client.get("/api/v1/admin/seat-feed").json()
+    assert set(metrics) == {"subscriptions", "watched_courses", "flushes_total", "events_total"}
+
+
+def test_enrollment_changes_are_written_to_the_outbox(client):
+    from app.models.outbox_model import OutboxEvent
+
+    db = TestingSessionLocal()
+    student = mock_student_user()
+    student.hashed_pwd = "not-used"
+    course = mock_course()
+    course.capacity = 1
+    late = mock_student_user()
+    late.hashed_pwd = "not-used"
+    db.add_all([student, late, course])
+    db.commit()
+
+    app.dependency_overrides[get_current_active_student] = (lambda user: lambda: user)(student)
+    assert client.post("/enrollments/", json={"course_id": str(course.id)}).status_code == 201
+    assert client.delete(f"/enrollments/{course.id}").status_code == 200
+    assert client.post("/enrollments/", json={"course_id": str(course.id)}).status_code == 201
+
+    # A rejected enrollment commits nothing, event included
+    app.dependency_overrides[get_current_active_student] = (lambda user: lambda: user)(late)
+    assert client.post("/enrollments/", json={"course_id": str(course.id)}).status_code == 400
+
+    events = db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    assert [event.event_type for event in events] == ["enrollment.created", "enrollment.dropped", "enrollment.created"]
+    assert events[0].payload["user_id"] == str(student.id)
+    assert events[0].payload["course_id"] == str(course.id)
+    assert events[1].aggregate_id == str(events[0].payload["enrollment_id"])
+    assert all(event.dispatched_at is None for event in events)
+
+
+def test_outbox_dispatcher_delivers_in_order_and_retries(tmp_path):
+    import httpx
+    from datetime import timedelta
+    from app.models.outbox_model import OutboxEvent
+    from app.services.outbox_service import FileSink, HttpSink, OutboxDispatcher, record_event
+
+    db = TestingSessionLocal()
+    for number in range(5):
+        record_event(db, "enrollment.created", number, {"number": number, "course_id": uuid.uuid4()})
+    db.commit()
+
+    received, answers = [], [503, 204, 204, 204]
+
+    def receiver(request: httpx.Request) -> httpx.Response:
+        status_code = answers.pop(0)
+        if status_code < 300:
+            received.append(request.read())
+        return httpx.Response(status_code)
+
+    http_sink = HttpSink("http://stub/events", client=httpx.Client(transport=httpx.MockTransport(receiver)))
+    file_sink = FileSink(str(tmp_path / "outbox.jsonl"))
+    dispatcher = OutboxDispatcher(
+        session_factory=TestingSessionLocal,
+        sinks=[file_sink, http_sink],
+        batch_size=3,
+        poll_interval=0.01,
+        retention=timedelta(0)
+    )
+
+    # The HTTP sink rejects the first batch: nothing is marked, a retry is scheduled
+    assert dispatcher.dispatch_once() == 0
+    assert dispatcher.metrics()["pending"] == 5
+    assert dispatcher.metrics()["consecutive_failures"] == 1
+    assert db.query(OutboxEvent).order_by(OutboxEvent.id).first().attempts == 1
+    assert dispatcher.dispatch_once() == 0  # still backing off
+
+    time.sleep(0.05)
+    assert dispatcher.dispatch_once() == 3
+    assert dispatcher.dispatch_once() == 2
+    assert dispatcher.dispatch_once() == 0
+
+    lines = [json.loads(line) for line in (tmp_path / "outbox.jsonl").read_text().splitlines()]
+    # At least once: the file sink saw the first batch twice, in order both times
+    assert [line["payload"]["number"] for line in lines] == [0, 1, 2, 0, 1, 2, 3, 4]
+    assert [event["payload"]["number"] for body in received for event in json.loads(body)["events"]] == [0, 1, 2, 3, 4]
+
+    metrics = dispatcher.metrics()
+    assert metrics["pending"] == 0 and metrics["lag_seconds"] == 0.0
+    assert metrics["dispatched_total"] == 5 and metrics["failed_batches_total"] == 1
+
+    assert dispatcher.prune() == 5
+
+
+def test_outbox_without_sinks_stays_bounded():
+    from datetime import timedelta
+    from app.models.outbox_model import OutboxEvent
+    from app.services.outbox_service import outbox_dispatcher, record_event
+
+    # The default configuration delivers nowhere
+    assert settings.OUTBOX_SINKS == "" and outbox_dispatcher.sinks == []
+
+    db = TestingSessionLocal()
+    for number in range(4):
+        record_event(db, "enrollment.created", number, {"number": number})
+    db.commit()
+    old = db.query(OutboxEvent).order_by(OutboxEvent.id).limit(3).all()
+    for event in old:
+        event.created_at = datetime.now(timezone.utc) - outbox_dispatcher.retention - timedelta(minutes=1)
+    db.commit()
+
+    assert outbox_dispatcher.prune() == 3
+    assert [event.payload["number"] for event in db.query(OutboxEvent)] == [3]
+    db.close()
+
+
+def test_outbox_batches_are_claimed_before_sending():
+    from datetime import timedelta
+    from app.models.outbox_model import OutboxEvent
+    from app.services.outbox_service import OutboxDispatcher, record_event
+
+    db = TestingSessionLocal()
+    for number in range(3):
+        record_event(db, "enrollment.created", number, {"number": number})
+    db.commit()
+
+    seen_claims = []
+
+    class CheckingSink:
+        def send(self, events):
+            # The claim is committed, so no transaction stays open while sending
+            other = TestingSessionLocal()
+            seen_claims.extend(claimed for (claimed,) in other.query(OutboxEvent.claimed_until))
+            other.close()
+
+    dispatcher = OutboxDispatcher(
+        session_factory=TestingSessionLocal, sinks=[CheckingSink()], batch_size=10, poll_interval=0.01
+    )
+
+    # Another dispatcher holds the oldest row: wait rather than send behind it
+    first = db.query(OutboxEvent).order_by(OutboxEvent.id).first()
+    first.claimed_until = datetime.now(timezone.utc) + timedelta(minutes=1)
+    db.commit()
+    assert dispatcher.dispatch_once() == 0
+
+    # Its claim ran out, so the batch is taken over
+    first.claimed_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    assert dispatcher.dispatch_once() == 3
+    assert len(seen_claims) == 3 and all(seen_claims)
+    assert db.query(OutboxEvent).filter(OutboxEvent.claimed_until.isnot(None)).count() == 0
+    db.close()
+
+
+def test_enrollment_query_budgets(client, query_budget):
+    db = TestingSessionLocal()
+    admin = mock_admin_user()
+    student = mock_student_user()
+    student.hashed_pwd = "not-used"
+    course = mock_course()
+    classmates = [mock_student_user() for _ in range(5)]
+    for classmate in classmates:
+        classmate.hashed_pwd = "not-used"
+    db.add_all([student, course, *classmates])
+    db.flush()
+    db.add_all([Enrollment(user_id=classmate.id, course_id=course.id) for classmate in classmates])
+    db.commit()
+    course_path = f"/enrollments/{course.id}"
+    payload = {"course_id": str(course.id)}
+    # Keep the student loaded, a refresh inside a budget would count
+    db.refresh(student)
+    db.close()
+
+    app.dependency_overrides[get_current_active_student] = (lambda user: lambda: user)(student)
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+    client.get("/courses/")  # warm the catalog
+
+    # Capacity check, insert, two rollups, outbox, reload
+    with query_budget(6):
+        assert client.post("/enrollments/", json=payload).status_code == 201
+    # Lookup, two rollup updates, empty rollup cleanup, outbox, delete
+    with query_budget(6):
+        assert client.delete(course_path).status_code == 200
+
+    # Listings stay flat however many rows they return
+    with query_budget(1):
+        assert len(client.get("/enrollments/").json()) == 5
+    with query_budget(1):
+        assert client.get(f"{course_path}/enrollments").json()["total_students"] == 5
@@ -0,0 +1,49 @@
+from app.core.load_shedding import AdaptiveLimiter, Priority, request_priority
+from app.core import load_shedding
+import uuid
+
+
+
+def test_overload_sheds_catalog_reads_before_enrollment_writes(client, monkeypatch):
+    limiter = AdaptiveLimiter(initial=10, min_limit=2, max_limit=20, window=5)
+    monkeypatch.setattr(load_shedding, "concurrency_limiter", limiter)
+
+    assert request_priority("GET", "/courses/") == Priority.LOW
+    assert request_priority("POST", "/enrollments/") == Priority.CRITICAL
+    assert request_priority("POST", "/api/v1/token") == Priority.HIGH
+
+    # Six requests in flight: past the catalog share (5), within the others
+    limiter.in_flight = 6
+    response = client.get("/courses/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    response = client.post("/enrollments/", json={"course_id": str(uuid.uuid4())})
+    assert response.status_code != 503
+    # Long-lived streams are never counted
+    assert client.get("/courses/seats/stream?course_id=x").status_code == 422
+    assert limiter.shed_total[Priority.LOW] == 1
+    assert limiter.in_flight == 6
+
+
+def test_concurrency_limit_follows_latency():
+    limiter = AdaptiveLimiter(initial=10, min_limit=2, max_limit=20, window=5, latency_floor=0.005)
+
+    # Fast and busy: grows by one per window
+    for _ in range(5):
+        assert limiter.try_acquire(Priority.NORMAL)
+    for _ in range(5):
+        limiter.release(Priority.NORMAL, 0.01)
+    assert limiter.limit == 11
+
+    # Latency at ten times the baseline: multiplicative decrease
+    for _ in range(5):
+        limiter.try_acquire(Priority.NORMAL)
+        limiter.release(Priority.NORMAL, 0.1)
+    assert limiter.limit == 11 * 0.9
+
+    # Slow endpoints are judged against their own baseline
+    for _ in range(5):
+        limiter.try_acquire(Priority.HIGH)
+        limiter.release(Priority.HIGH, 0.3)
+    assert limiter.limit == 11 * 0.9
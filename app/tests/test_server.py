@@ -0,0 +1,13 @@
+from app.core.config import settings
+from app.server import worker_count
+
+
+
+def test_server_worker_count_respects_db_budget():
+    # Per-process request state: one worker unless asked for more
+    assert worker_count(cpus=8, requested=settings.WEB_CONCURRENCY) == 1
+
+    assert worker_count(cpus=8, db_max_connections=1000, connections_per_worker=20) == 8
+    assert worker_count(cpus=8, db_max_connections=100, connections_per_worker=20) == 5
+    assert worker_count(cpus=8, db_max_connections=10, connections_per_worker=20) == 1
+    assert worker_count(cpus=8, db_max_connections=100, connections_per_worker=20, requested=2) == 2
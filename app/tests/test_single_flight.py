@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from app.core.single_flight import SingleFlight
+import pytest
+import threading
+import time
+
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight(max_waiters=3, timeout=5)
+    release = threading.Event()
+    calls = []
+
+    def slow_read():
+        calls.append(1)
+        release.wait(5)
+        return ("row",)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, "course", slow_read)]
+        # Let the leader start, then pile up identical calls behind it
+        while not calls:
+            time.sleep(0.001)
+        futures += [pool.submit(flight.do, "course", slow_read) for _ in range(4)]
+        while flight.metrics()["coalesced_total"] + flight.metrics()["bypassed_total"] < 4:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [("row",)] * 5
+    # Three waiters joined the leader, the fourth was over the bound and ran alone
+    assert len(calls) == 2
+    metrics = flight.metrics()
+    assert metrics["coalesced_total"] == 3
+    assert metrics["bypassed_total"] == 1
+    assert metrics["in_flight"] == 0
+
+    # Errors reach the caller, and nothing is cached afterwards
+    def failing():
+        raise HTTPException(status_code=404)
+
+    with pytest.raises(HTTPException) as exc:
+        flight.do("course", failing)
+    assert exc.value.status_code == 404
+    assert flight.do("course", lambda: "fresh") == "fresh"
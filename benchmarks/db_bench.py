@@ -0,0 +1,97 @@
+"""
+Query latency of the auth lookup and the enrollment path, per database driver.
+
+    DATABASE_URL=postgresql://u:p@localhost/app python -m benchmarks.db_bench \
+        --url postgresql://u:p@localhost/app \
+        --url postgresql+psycopg://u:p@localhost/app
+
+Each --url runs against an already migrated database (SQLite URLs get their
+tables created). A bench user and course are added for the run and removed
+afterwards; the enrollment insert is rolled back on every iteration.
+psycopg 3 prepares a statement after DB_PREPARE_THRESHOLD executions on the
+same connection, so the warm-up phase is what lets it switch to prepared plans.
+"""
+import argparse
+import statistics
+import time
+import uuid
+import app.main  # noqa: F401  configure every mapper
+from app.db.base import Base
+from app.db.session import build_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.course_model import Course
+from app.models.enrollment_model import Enrollment
+from app.models.user_model import User
+
+
+
+def timed(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples: list) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {statistics.median(samples):7.3f} ms  p99 {p99:7.3f} ms"
+
+
+def bench_url(url: str, iterations: int, warmup: int) -> None:
+    engine = build_engine(url)
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    user = User(id=uuid.uuid4(), name="Bench", email=email, hashed_pwd="x", role="student", is_active=True)
+    course = Course(id=uuid.uuid4(), title="Bench", code=f"BENCH-{uuid.uuid4().hex[:8]}", capacity=300, is_active=True)
+
+    db = Session()
+    db.add_all([user, course])
+    db.commit()
+    user_id, course_id = user.id, course.id
+
+    def auth_lookup():
+        db.query(User).filter(User.email == email).first()
+        db.rollback()
+
+    def enrollment_path():
+        db.query(Enrollment).filter(Enrollment.course_id == course_id).count()
+        db.query(Enrollment).filter(
+            Enrollment.course_id == course_id,
+            Enrollment.user_id == user_id
+        ).first()
+        db.add(Enrollment(user_id=user_id, course_id=course_id))
+        db.flush()
+        db.rollback()
+
+    try:
+        for name, fn in (("auth lookup", auth_lookup), ("enrollment path", enrollment_path)):
+            timed(fn, warmup)
+            print(f"{engine.url.drivername:<22} {name:<16} {summary(timed(fn, iterations))}")
+    finally:
+        db.rollback()
+        db.query(Course).filter(Course.id == course_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+        engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-driver query latency")
+    parser.add_argument("--url", action="append", required=True, help="database URL, repeat to compare drivers")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    for url in args.url:
+        bench_url(url, args.iterations, args.warmup)
+
+
+if __name__ == "__main__":
+    main()
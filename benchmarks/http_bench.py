@@ -0,0 +1,64 @@
+"""
+Closed-loop HTTP load harness: N connections each send requests back to back.
+
+    python -m benchmarks.http_bench http://127.0.0.1:8000/courses/ --connections 64 --seconds 15
+
+Reports requests/s and latency percentiles. Run it from another machine, or
+at least pin it to other cores, or it competes with the server for CPU.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+import httpx
+
+
+
+async def worker(client: httpx.AsyncClient, url: str, deadline: float, latencies: list, errors: list) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(url: str, connections: int, seconds: float) -> None:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    latencies, errors = [], []
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await client.get(url)
+        start = time.perf_counter()
+        deadline = start + seconds
+        await asyncio.gather(*(worker(client, url, deadline, latencies, errors) for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] if latencies else 0.0
+    print(f"{url}  connections={connections}")
+    print(f"  {len(latencies) / elapsed:9.1f} req/s  errors={len(errors)}")
+    if errors:
+        print("  " + "  ".join(f"{error}: {count}" for error, count in Counter(errors).most_common()))
+    if latencies:
+        print(f"  p50 {statistics.median(latencies):7.2f} ms  p90 {pick(0.9):7.2f} ms  p99 {pick(0.99):7.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP throughput and latency")
+    parser.add_argument("url")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args.url, args.connections, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
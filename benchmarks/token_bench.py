@@ -0,0 +1,70 @@
+"""
+Microbenchmark for JWT issue/verify throughput.
+
+    SECRET_KEY=... ALGORITHM=HS256 DATABASE_URL=sqlite:// python -m benchmarks.token_bench
+
+"baseline" repeats what security.py did before keys were preloaded and
+verified tokens cached: jwt.encode/jwt.decode with the raw settings strings
+on every call. It only applies to HS* algorithms. "current" goes through create_access_token/verify_token.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import jwt
+from app.core.config import settings
+from app.core.security import create_access_token, verify_token, token_cache
+from app.schemas.auth_schema import TokenData
+
+
+
+def rate(fn, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JWT encode/decode throughput")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    claims = {"sub": "bench@example.com", "role": "student"}
+    token = create_access_token(claims, expires_delta=timedelta(minutes=30))
+
+    def baseline_encode():
+        payload = dict(claims, exp=datetime.utcnow() + timedelta(minutes=30))
+        jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    def baseline_decode():
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM)
+        TokenData(email=payload.get("sub"))
+
+    def current_encode():
+        create_access_token(claims, expires_delta=timedelta(minutes=30))
+
+    def current_decode_cold():
+        token_cache.clear()
+        verify_token(token)
+
+    def current_decode():
+        verify_token(token)
+
+    print(f"algorithm: {settings.ALGORITHM}")
+    results = [
+        ("encode baseline", baseline_encode),
+        ("encode current", current_encode),
+        ("decode baseline", baseline_decode),
+        ("verify current, cache miss", current_decode_cold),
+        ("verify current, cache hit", current_decode),
+    ]
+    for name, fn in results:
+        print(f"{name:<28} {rate(fn, args.seconds):>12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
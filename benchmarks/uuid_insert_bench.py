@@ -0,0 +1,79 @@
+"""
+Insert rate and primary key index size with random (v4) and time-ordered (v7) ids.
+
+    python -m benchmarks.uuid_insert_bench --url postgresql://u:p@localhost/app
+    python -m benchmarks.uuid_insert_bench --url sqlite:///./bench.db --rows 200000
+
+Each run inserts into a scratch table shaped like `courses` (uuid primary key
+plus a few columns) that is dropped afterwards, committing every --batch rows.
+Random ids land all over the primary key index, so once it outgrows memory
+most inserts touch a cold page; v7 ids always go to the right-most page.
+Index size is reported on PostgreSQL only.
+"""
+import argparse
+import time
+import uuid
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, select
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.ids import uuid7
+from app.db.session import build_engine
+
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+
+def scratch_table(name: str) -> Table:
+    return Table(
+        name, MetaData(),
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("code", String, nullable=False),
+        Column("title", String, nullable=False),
+        Column("capacity", Integer, nullable=False)
+    )
+
+
+def bench(engine, kind: str, rows: int, batch: int) -> None:
+    table = scratch_table(f"uuid_bench_{kind}")
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    new_id = GENERATORS[kind]
+
+    try:
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            for offset in range(0, rows, batch):
+                conn.execute(table.insert(), [
+                    {"id": new_id(), "code": f"B-{number}", "title": "Bench", "capacity": 30}
+                    for number in range(offset, min(rows, offset + batch))
+                ])
+                conn.commit()
+        elapsed = time.perf_counter() - start
+
+        line = f"{kind}  {rows / elapsed:10.0f} rows/s"
+        if engine.dialect.name == "postgresql":
+            with engine.connect() as conn:
+                size = conn.execute(select(func.pg_relation_size(f"{table.name}_pkey"))).scalar()
+            line += f"  pkey {size / 1024 / 1024:8.1f} MiB"
+        print(line)
+    finally:
+        table.drop(engine, checkfirst=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="uuid4 vs uuid7 insert rate")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.url)
+    try:
+        for kind in GENERATORS:
+            bench(engine, kind, args.rows, args.batch)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()